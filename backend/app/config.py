@@ -1,14 +1,64 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     # Ollama settings
     ollama_model: str = "llama3.2:latest"
     ollama_host: str = "http://localhost:11434"
+    ollama_timeout: float = 120.0  # seconds to wait for a completion
+    ollama_connect_timeout: float = 5.0
+    ollama_max_connections: int = 10  # pooled connections to ollama_host
+    ollama_max_concurrency: int = 4  # in-flight LLM calls per process
+    ollama_keep_alive: str = "30m"  # how long Ollama keeps the model loaded after a request
+    ollama_preload: bool = True  # load the model at startup instead of on the first request
+    llm_context_tokens: int = 4096  # prompt token budget, also sent as num_ctx
+    llm_context_overrides: str = ""  # per model budgets: "model=tokens,..."
+    
+    # LLM response cache: "memory", "sqlite" or "none"
+    llm_cache_backend: str = "memory"
+    llm_cache_ttl: int = 3600  # seconds
+    llm_cache_max_entries: int = 1000
+    llm_cache_path: str = "./llm_cache.db"
+    
+    # Agent settings
+    # "demo" keeps the paced thinking delays for the UI, "production" drops them
+    latency_profile: str = "production"
+    # "lazy" skips LLM calls whose output the response doesn't use, "eager" runs them all
+    agent_llm_mode: str = "lazy"
+    # Constrain extraction and flight selection to a JSON schema (Ollama >= 0.5)
+    llm_structured_output: bool = True
+    # Merge prompts queued while waiting for an LLM slot into one multi-task completion
+    llm_batching: bool = True
+    llm_batch_window_ms: float = 0.0  # extra wait for more prompts before sending a batch
+    llm_batch_max_tasks: int = 4
     
     # API settings
     flight_api_key: str = ""
     flight_api_url: str = ""
+    # Comma separated providers: "mock", "live" (flight_api_url) or "name=https://..."
+    flight_providers: str = "mock"
+    flight_search_quorum: int = 1  # providers to wait for before returning
+    flight_search_deadline: float = 3.0  # seconds before returning whatever has arrived
+    flight_api_timeout: float = 10.0
+    flight_api_connect_timeout: float = 3.0
+    flight_api_max_connections: int = 20  # per provider host
+    flight_api_max_retries: int = 2
+    flight_api_http2: bool = True
+    flight_api_breaker_threshold: int = 5  # consecutive failures before the circuit opens
+    flight_api_breaker_reset: float = 30.0  # seconds before a trial call is allowed
+    flight_cache_ttl: int = 300  # seconds a search stays fresh, 0 disables the cache
+    flight_cache_stale_ttl: int = 600  # extra seconds stale results are served while refreshing
+    flight_cache_max_entries: int = 1000
+    
+    # Hotel catalog (.json or .csv); empty uses the bundled sample catalog
+    hotel_catalog_path: str = ""
+    
+    # Mock providers: a seed makes results depend only on the search params
+    mock_seed: Optional[int] = None
+    mock_latency_ms: float = 0.0
+    mock_latency_jitter_ms: float = 0.0
+    mock_failure_rate: float = 0.0  # 0-1, chance a mock call raises
     
     # Server settings
     frontend_url: str = "http://localhost:5173"
@@ -16,6 +66,25 @@ class Settings(BaseSettings):
     
     # Database settings
     database_url: str = "sqlite:///./travel_booking.db"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800  # seconds
+    list_count_cache_ttl: int = 30  # seconds to reuse totals for text-filtered lists
+    
+    # Chat sessions: kept in memory, written behind to the conversations table
+    chat_session_idle_ttl: int = 1800  # seconds before an idle session leaves memory
+    chat_session_max_active: int = 10000
+    chat_flush_interval: float = 2.0  # seconds between write-behind flushes
+    chat_history_max_messages: int = 50
+    chat_context_tokens: int = 1024  # conversation history sent with follow-up questions
+    # Resolve common phrasings ("5 days", "50k", known cities) with rules before calling the LLM
+    chat_fast_extract: bool = True
+    
+    # Metrics (/metrics) and per-request Server-Timing header
+    metrics_enabled: bool = True
+    metrics_loop_lag_interval: float = 0.5  # seconds between event loop lag samples
+    metrics_timing_header: bool = False
     
     class Config:
         env_file = ".env"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -42,6 +42,11 @@ class SearchHistory(Base):
     # Relationships
     user = relationship("User", back_populates="searches")
     bookings = relationship("Booking", back_populates="search")
+    
+    __table_args__ = (
+        # Keyset pagination in /api/history
+        Index("ix_search_history_created_at_id", "created_at", "id"),
+    )
 
 class Booking(Base):
     """Bookings table"""
@@ -81,6 +86,13 @@ class Booking(Base):
     # Relationships
     user = relationship("User", back_populates="bookings")
     search = relationship("SearchHistory", back_populates="bookings")
+    
+    __table_args__ = (
+        # Bookings are loaded per search page in /api/history
+        Index("ix_bookings_search_id_created_at", "search_id", "created_at"),
+        # Keyset pagination in /api/bookings
+        Index("ix_bookings_created_at_id", "created_at", "id"),
+    )
 
 class TravelPlan(Base):
     """Travel plans table - for conversational planning"""
@@ -136,4 +148,11 @@ class Conversation(Base):
     plan_id = Column(String(100), nullable=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class RowCount(Base):
+    """Incrementally maintained row counts for list endpoint totals"""
+    __tablename__ = "row_counts"
+    
+    key = Column(String(200), primary_key=True)  # "<table>" or "<table>:status=<status>"
+    count = Column(Integer, default=0, nullable=False)
@@ -1,8 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import router
 from app.config import get_settings
-from app.database import init_db
+from app.database import init_db, close_db
+from app.services.llm_client import close_llm_batcher, close_ollama_client, preload_model
+from app.services.http_client import close_http_clients
+from app.services.conversations import get_conversation_store
+from app.metrics import http_request_seconds, loop_lag_monitor, start_request_timings, server_timing_header
+import asyncio
+import time
 
 settings = get_settings()
 
@@ -21,6 +27,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency and optional Server-Timing header
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    if not settings.metrics_enabled:
+        return await call_next(request)
+    
+    timings = start_request_timings() if settings.metrics_timing_header else None
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    
+    # Label by route template so ids in paths don't create new series
+    route = request.scope.get("route")
+    http_request_seconds.observe(elapsed, request.method, getattr(route, "path", "unmatched"), str(response.status_code))
+    if timings is not None:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed * 1000)
+    return response
+
 # Initialize database on startup
 @app.on_event("startup")
 def startup_event():
@@ -28,6 +52,28 @@ def startup_event():
     init_db()
     print("✅ Database initialized successfully!")
 
+@app.on_event("startup")
+async def start_background_tasks():
+    """Start the chat session writer, the event loop lag monitor and the model preload"""
+    get_conversation_store().start()
+    if settings.metrics_enabled:
+        loop_lag_monitor.start()
+    # In the background so startup doesn't wait on Ollama
+    app.state.preload_task = asyncio.create_task(preload_model()) if settings.ollama_preload else None
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled connections on shutdown"""
+    preload_task = getattr(app.state, "preload_task", None)
+    if preload_task is not None:
+        preload_task.cancel()
+    await loop_lag_monitor.stop()
+    await get_conversation_store().close()
+    await close_llm_batcher()
+    await close_ollama_client()
+    await close_http_clients()
+    await close_db()
+
 # Include routes
 app.include_router(router)
 
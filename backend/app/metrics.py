@@ -0,0 +1,197 @@
+"""
+Lightweight in-process metrics: timing spans, an event-loop lag monitor and
+Prometheus text exposition for /metrics.
+
+Recording a span is a perf_counter call, a bisect and a few dict updates,
+so it's cheap enough to leave on in production.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional, Tuple, Callable, Iterator
+from app.config import get_settings
+import asyncio
+import time
+
+settings = get_settings()
+
+# Seconds; covers sub-millisecond parsing up to slow LLM completions
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values"""
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *label_values: str):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in sorted(self._series.items()):
+            labels = _format_labels(self.labels, label_values)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels + ('le',), label_values + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Gauge:
+    """Single-value gauge, optionally computed when scraped"""
+    def __init__(self, name: str, help: str, value: float = 0.0, collect: Optional[Callable[[], Dict[LabelValues, float]]] = None, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.value = value
+        self.collect = collect
+
+    def set(self, value: float):
+        self.value = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        if self.collect is None:
+            lines.append(f"{self.name} {self.value}")
+        else:
+            for label_values, value in sorted(self.collect().items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+span_seconds = registry.register(Histogram(
+    "tripscout_span_seconds", "Time spent in instrumented operations", ("span",)
+))
+http_request_seconds = registry.register(Histogram(
+    "tripscout_http_request_seconds", "HTTP request latency until response headers", ("method", "route", "status")
+))
+loop_lag_seconds = registry.register(Histogram(
+    "tripscout_event_loop_lag_seconds", "How late the event loop ran a periodic timer",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+))
+loop_lag_last = registry.register(Gauge(
+    "tripscout_event_loop_lag_last_seconds", "Most recent event loop lag sample"
+))
+
+# Span durations (ms) for the current request, when a timing header was asked for
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+def record_span(name: str, seconds: float):
+    if not settings.metrics_enabled:
+        return
+    span_seconds.observe(seconds, name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds * 1000
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block (sync or containing awaits) as the named span"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
+
+def timed(name: str):
+    """Decorator timing an async function as the named span"""
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                record_span(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def start_request_timings() -> Dict[str, float]:
+    """Collect this request's spans for the Server-Timing header"""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+def server_timing_header(timings: Dict[str, float], total_ms: float) -> str:
+    parts = [f"{name.replace(' ', '_')};dur={ms:.1f}" for name, ms in timings.items()]
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+class LoopLagMonitor:
+    """
+    Background task measuring how late a periodic sleep wakes up. With
+    keep_samples, each lag (seconds) is also kept in samples, so a benchmark
+    can summarize the run it started.
+    """
+    def __init__(self, interval: float = 0.5, keep_samples: bool = False):
+        self.interval = interval
+        self.keep_samples = keep_samples
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            loop_lag_seconds.observe(lag)
+            loop_lag_last.set(lag)
+            if self.keep_samples:
+                self.samples.append(lag)
+
+    def start(self):
+        if self._task is None:
+            self.samples = []
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> List[float]:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        return self.samples
+
+loop_lag_monitor = LoopLagMonitor(settings.metrics_loop_lag_interval)
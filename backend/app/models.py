@@ -35,6 +35,8 @@ class AgentThought(BaseModel):
     thought: str
     action: str
     timestamp: str
+    elapsed_ms: Optional[float] = Field(None, description="Time since the run started when this step began")
+    duration_ms: Optional[float] = Field(None, description="Time spent in this step, set when the next step starts")
 
 class SearchResponse(BaseModel):
     search_id: str
@@ -43,6 +45,8 @@ class SearchResponse(BaseModel):
     flights: List[Flight]
     message: str
     search_params: Dict[str, Any]
+    timings: Dict[str, float] = Field(default={}, description="Milliseconds spent in each agent step, e.g. search_flights")
+    skipped_llm_calls: List[str] = Field(default=[], description="LLM outputs the run didn't generate because nothing consumed them")
 
 class BookingRequest(BaseModel):
     flight_id: str
@@ -67,6 +71,8 @@ class AutonomousBookingResponse(BaseModel):
     selection_reason: str
     booking_result: Dict[str, Any]
     message: str
+    timings: Dict[str, float] = Field(default={}, description="Milliseconds spent in each agent step, e.g. select_flight")
+    skipped_llm_calls: List[str] = Field(default=[], description="LLM outputs the run didn't generate because nothing consumed them")
 
 class HistoryItem(BaseModel):
     search_id: str
@@ -83,14 +89,22 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str = Field(..., description="User message")
-    conversation_history: List[ChatMessage] = Field(default=[], description="Previous conversation")
-    extracted_info: Optional[Dict[str, Any]] = Field(default={}, description="Previously extracted travel info")
+    conversation_id: Optional[str] = Field(None, max_length=100, description="Conversation to continue; omit to start a new one")
+    conversation_history: List[ChatMessage] = Field(default=[], description="Deprecated: only used to seed a new conversation")
+    extracted_info: Optional[Dict[str, Any]] = Field(default={}, description="Deprecated: only used to seed a new conversation")
 
 class ChatResponse(BaseModel):
+    conversation_id: str = Field(..., description="Send this back with the next message")
     message: str = Field(..., description="AI response")
     extracted_info: Dict[str, Any] = Field(..., description="Extracted travel information")
     is_ready_to_plan: bool = Field(..., description="Whether we have enough info to generate plan")
-    conversation_history: List[ChatMessage] = Field(..., description="Updated conversation history")
+    conversation_history: List[ChatMessage] = Field(default=[], description="Messages added this turn")
+
+class ConversationResponse(BaseModel):
+    conversation_id: str
+    messages: List[ChatMessage]
+    extracted_info: Dict[str, Any]
+    is_ready_to_plan: bool
 
 class TravelPlanRequest(BaseModel):
     destination: str
@@ -133,6 +147,7 @@ class TravelPlan(BaseModel):
     itinerary: List[DayItinerary]
     summary: str
     interests: List[str]
+    step_timings: Dict[str, float] = Field(default={}, description="Milliseconds spent in each planning step")
 
 class CompletePlanBookingRequest(BaseModel):
     plan: TravelPlan
@@ -143,4 +158,19 @@ class CompletePlanBookingResponse(BaseModel):
     flight_booking: Dict[str, Any]
     hotel_booking: Dict[str, Any]
     total_cost: float
-    message: str
\ No newline at end of file
+    message: str
+
+# Structured LLM outputs (sent to Ollama as the format schema)
+
+class TravelInfoExtraction(BaseModel):
+    destination: Optional[str] = Field(None, description="Destination city")
+    origin: Optional[str] = Field(None, description="Departure city")
+    budget: Optional[float] = Field(None, description="Total budget in INR")
+    days: Optional[int] = Field(None, description="Trip length in days")
+    interests: List[str] = Field(default=[], description="Interests like beach, food, culture")
+    departure_date: Optional[str] = Field(None, description="YYYY-MM-DD")
+    passengers: Optional[int] = Field(None, description="Number of travellers")
+
+class FlightSelection(BaseModel):
+    flight_id: str = Field(..., description="flight_id of the chosen flight")
+    reason: str = Field(..., description="One sentence on why it is the best choice")
@@ -0,0 +1,160 @@
+from sqlalchemy import select, insert, func, update, literal, and_, or_, event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from app.config import get_settings
+from app.database import async_engine
+from app.db_models import SearchHistory, Booking, RowCount
+import base64
+import json
+import time
+
+settings = get_settings()
+
+# Cursors
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor for the (created_at, id) position of a row"""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Reverse of encode_cursor. Raises a 400 for cursors we didn't issue"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def apply_keyset(query, model, cursor: Optional[str]):
+    """
+    Newest-first keyset pagination on (created_at, id).
+    Rows after the cursor are found through the index, so deep pages
+    cost the same as the first one.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id)
+        ))
+    return query.order_by(model.created_at.desc(), model.id.desc())
+
+async def fetch_page(db: AsyncSession, query, model, cursor: Optional[str], offset: int, limit: int):
+    """
+    Fetch one page. Returns (rows, next_cursor).
+    offset is only honoured when no cursor is given, for older clients.
+    """
+    query = apply_keyset(query, model, cursor)
+    if not cursor and offset:
+        query = query.offset(offset)
+
+    rows = (await db.scalars(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+# Counts
+
+# Status column per counted table - totals are kept per table and per status
+_COUNTED_MODELS = {
+    SearchHistory.__tablename__: (SearchHistory, SearchHistory.search_status),
+    Booking.__tablename__: (Booking, Booking.status),
+}
+
+def _counter_keys(table: str, status: Optional[str]):
+    keys = [table]
+    if status:
+        keys.append(f"{table}:status={status}")
+    return keys
+
+def _bump(connection, table: str, status: Optional[str], delta: int, total: bool = True):
+    # Same transaction as the row change, so counters can't drift from the rows.
+    # Keys that haven't been seeded yet are skipped; seeding counts the row anyway.
+    keys = _counter_keys(table, status)
+    if not total:
+        keys = keys[1:]
+    if keys:
+        connection.execute(
+            update(RowCount)
+            .where(RowCount.key.in_(keys))
+            .values(count=RowCount.count + delta)
+        )
+
+def _make_listeners(table: str, status_attr: str):
+    def after_insert(mapper, connection, target):
+        _bump(connection, table, getattr(target, status_attr), 1)
+
+    def after_delete(mapper, connection, target):
+        _bump(connection, table, getattr(target, status_attr), -1)
+
+    def after_update(mapper, connection, target):
+        # A status change moves the row between status counters; the total stays
+        history = inspect(target).attrs[status_attr].history
+        if not history.has_changes():
+            return
+        for old in history.deleted:
+            _bump(connection, table, old, -1, total=False)
+        for new in history.added:
+            _bump(connection, table, new, 1, total=False)
+
+    return {"after_insert": after_insert, "after_delete": after_delete, "after_update": after_update}
+
+for _table, (_model, _status_column) in _COUNTED_MODELS.items():
+    for _event, _listener in _make_listeners(_table, _status_column.key).items():
+        event.listen(_model, _event, _listener)
+
+_filtered_counts: Dict[Any, Tuple[int, float]] = {}
+
+async def _seed_count(table: str, key: str, status: Optional[str]):
+    """
+    Create a counter from one INSERT ... SELECT COUNT(*), so no row can be
+    inserted between the count and the counter appearing. Runs in its own
+    transaction, leaving the caller's session alone.
+    """
+    model, status_column = _COUNTED_MODELS[table]
+    count_query = select(literal(key), func.count()).select_from(model)
+    if status:
+        count_query = count_query.where(status_column == status)
+    try:
+        async with async_engine.begin() as conn:
+            await conn.execute(insert(RowCount).from_select(["key", "count"], count_query))
+    except IntegrityError:
+        # Another request seeded it first
+        pass
+
+async def _maintained_count(db: AsyncSession, table: str, status: Optional[str]) -> int:
+    """Read an incrementally maintained counter, seeding it the first time"""
+    key = _counter_keys(table, status)[-1]
+    query = select(RowCount.count).where(RowCount.key == key)
+    count = await db.scalar(query)
+    if count is None:
+        await _seed_count(table, key, status)
+        count = await db.scalar(query)
+    return count or 0
+
+async def count_rows(db: AsyncSession, query, table: str, status: Optional[str] = None, has_text_filters: bool = False) -> int:
+    """
+    Total for a list endpoint without running COUNT(*) on every call.
+    Unfiltered and status-filtered totals come from maintained counters;
+    free-text filters fall back to a COUNT cached for
+    settings.list_count_cache_ttl seconds, so those totals are approximate.
+    """
+    if not has_text_filters:
+        return await _maintained_count(db, table, status)
+
+    cache_key = str(query.compile(compile_kwargs={"literal_binds": True}))
+    cached = _filtered_counts.get(cache_key)
+    if cached and cached[1] > time.time():
+        return cached[0]
+
+    count = await db.scalar(select(func.count()).select_from(query.subquery()))
+    _filtered_counts[cache_key] = (count, time.time() + settings.list_count_cache_ttl)
+    if len(_filtered_counts) > 1000:
+        _filtered_counts.clear()
+    return count
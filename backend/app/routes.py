@@ -1,19 +1,27 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from app.models import (
     SearchRequest, SearchResponse, BookingRequest, 
     BookingResponse, HistoryItem, AutonomousBookingRequest,
     AutonomousBookingResponse, ChatRequest, ChatResponse,
     TravelPlanRequest, TravelPlan, CompletePlanBookingRequest,
-    CompletePlanBookingResponse, ChatMessage
+    CompletePlanBookingResponse, ChatMessage, ConversationResponse
 )
 from app.db_models import SearchHistory, Booking, TravelPlan as DBTravelPlan
-from app.database import get_db
-from app.services.agent import TravelAgent
-from app.services.llm_client import LLMClient
+from app.database import get_async_db, AsyncSessionLocal
+from app.pagination import fetch_page, count_rows
+from app.metrics import span, registry, Gauge
+from app.services.agent import TravelAgent, AgentRun
+from app.services.llm_client import LLMClient, get_llm_batcher
 from app.services.travel_planner import TravelPlanner
-from typing import List, Optional
+from app.services.conversations import get_conversation_store
+from typing import List, Optional, Callable, Awaitable
 import asyncio
+import json
 from datetime import datetime
 import uuid
 
@@ -21,104 +29,188 @@ router = APIRouter()
 agent = TravelAgent()
 llm_client = LLMClient()
 travel_planner = TravelPlanner()
+conversations = get_conversation_store()
+
+async def _save_search(db: AsyncSession, search_id: str, search_params: dict, result_count: int):
+    """Persist a successful search to search_history"""
+    db_search = SearchHistory(
+        search_id=search_id,
+        origin=search_params.get('origin'),
+        destination=search_params.get('destination'),
+        departure_date=search_params.get('departure_date'),
+        return_date=search_params.get('return_date'),
+        passengers=search_params.get('passengers', 1),
+        trip_type=search_params.get('trip_type', 'one_way'),
+        cabin_class=search_params.get('cabin_class', 'economy'),
+        result_count=result_count,
+        search_status='success'
+    )
+    db.add(db_search)
+    with span("db.commit"):
+        await db.commit()
+    return db_search
+
+async def _run_search(search_params: dict, db: AsyncSession, run: Optional[AgentRun] = None) -> SearchResponse:
+    """Run the search agent and save the result"""
+    response = await agent.process_search(search_params, run)
+    
+    # Save to database
+    if response.status == "success":
+        await _save_search(db, response.search_id, search_params, len(response.flights))
+    
+    return response
+
+async def _run_search_and_book(search_params: dict, passenger_details: dict, db: AsyncSession, run: Optional[AgentRun] = None) -> AutonomousBookingResponse:
+    """Run the autonomous booking agent and save the search and booking"""
+    result = await agent.process_search_and_book(search_params, passenger_details, run)
+    
+    if result['status'] == 'error':
+        raise HTTPException(status_code=400, detail=result['message'])
+    
+    # Save search to database
+    await _save_search(db, result['search_id'], search_params, len(result['all_flights']))
+    
+    # Save booking to database
+    db_booking = Booking(
+        booking_id=result['booking_result']['booking_id'],
+        search_id=result['search_id'],
+        flight_id=result['selected_flight']['flight_id'],
+        booking_type='autonomous',
+        passenger_first_name=passenger_details.get('firstName'),
+        passenger_last_name=passenger_details.get('lastName'),
+        passenger_email=passenger_details.get('email'),
+        passenger_phone=passenger_details.get('phone'),
+        flight_details=result['selected_flight'],
+        total_amount=result['selected_flight']['price'],
+        currency=result['selected_flight']['currency'],
+        status='confirmed',
+        confirmation_code=result['booking_result'].get('confirmation_code')
+    )
+    db.add(db_booking)
+    with span("db.commit"):
+        await db.commit()
+    
+    return AutonomousBookingResponse(
+        search_id=result['search_id'],
+        status=result['status'],
+        thoughts=result['thoughts'],
+        all_flights=result['all_flights'],
+        selected_flight=result['selected_flight'],
+        selection_reason=result['selection_reason'],
+        booking_result=result['booking_result'],
+        message=result['message'],
+        timings=result['timings'],
+        skipped_llm_calls=result['skipped_llm_calls']
+    )
+
+def _sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event"""
+    if isinstance(data, BaseModel):
+        data = data.dict()
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _stream_agent_run(work: Callable[[AgentRun, AsyncSession], Awaitable[BaseModel]], run: Optional[AgentRun] = None) -> StreamingResponse:
+    """
+    Run an agent request in the background and stream its thoughts and
+    LLM tokens as SSE. The full response model is sent as the "result" event;
+    searches may follow it with "flights" events as late providers answer.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    run = run or AgentRun()
+    run.events = events
+    
+    async def runner():
+        # The request-scoped session is closed once streaming starts, so use our own
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await work(run, db)
+            events.put_nowait(("result", result))
+            await run.wait_background()
+        except HTTPException as e:
+            events.put_nowait(("error", {"status_code": e.status_code, "detail": e.detail}))
+        except Exception as e:
+            events.put_nowait(("error", {"status_code": 500, "detail": str(e)}))
+        finally:
+            events.put_nowait(None)
+    
+    async def event_stream():
+        task = asyncio.create_task(runner())
+        try:
+            yield _sse_event("start", {"search_id": run.search_id})
+            while True:
+                item = await events.get()
+                if item is None:
+                    break
+                yield _sse_event(*item)
+        finally:
+            # Client went away - stop the agent
+            if not task.done():
+                task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _search_run(raw: bool) -> AgentRun:
+    """Agent run for a search; raw results skip the LLM summary"""
+    outputs = set(AgentRun.DEFAULT_OUTPUTS)
+    if raw:
+        outputs.discard("search_summary")
+    return AgentRun(outputs=outputs)
 
 @router.post("/api/search", response_model=SearchResponse)
-async def search_flights(request: SearchRequest, db: Session = Depends(get_db)):
+async def search_flights(
+    request: SearchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    raw: bool = Query(False, description="Return flights without the AI summary")
+):
     """
     Search for flights based on user criteria
     """
     try:
-        search_params = request.dict()
-        response = await agent.process_search(search_params)
-        
-        # Save to database
-        if response.status == "success":
-            db_search = SearchHistory(
-                search_id=response.search_id,
-                origin=search_params.get('origin'),
-                destination=search_params.get('destination'),
-                departure_date=search_params.get('departure_date'),
-                return_date=search_params.get('return_date'),
-                passengers=search_params.get('passengers', 1),
-                trip_type=search_params.get('trip_type', 'one_way'),
-                cabin_class=search_params.get('cabin_class', 'economy'),
-                result_count=len(response.flights),
-                search_status='success'
-            )
-            db.add(db_search)
-            db.commit()
-            db.refresh(db_search)
-        
-        return response
+        return await _run_search(request.dict(), db, _search_run(raw))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/api/search/stream")
+async def search_flights_stream(
+    request: SearchRequest,
+    raw: bool = Query(False, description="Return flights without the AI summary")
+):
+    """
+    Streaming search: emits "thought" and "token" events as the agent works,
+    then the SearchResponse as the "result" event. Providers that missed the
+    search deadline send the updated flight list as "flights" events after it.
+    """
+    search_params = request.dict()
+    return _stream_agent_run(lambda run, db: _run_search(search_params, db, run), _search_run(raw))
+
 @router.post("/api/search-and-book", response_model=AutonomousBookingResponse)
-async def search_and_book_autonomous(request: AutonomousBookingRequest, db: Session = Depends(get_db)):
+async def search_and_book_autonomous(request: AutonomousBookingRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Autonomous booking: Search for flights and automatically book the best option
     """
     try:
-        search_params = request.search_params.dict()
-        passenger_details = request.passenger_details
-        
-        result = await agent.process_search_and_book(search_params, passenger_details)
-        
-        if result['status'] == 'error':
-            raise HTTPException(status_code=400, detail=result['message'])
-        
-        # Save search to database
-        db_search = SearchHistory(
-            search_id=result['search_id'],
-            origin=search_params.get('origin'),
-            destination=search_params.get('destination'),
-            departure_date=search_params.get('departure_date'),
-            return_date=search_params.get('return_date'),
-            passengers=search_params.get('passengers', 1),
-            trip_type=search_params.get('trip_type', 'one_way'),
-            cabin_class=search_params.get('cabin_class', 'economy'),
-            result_count=len(result['all_flights']),
-            search_status='success'
-        )
-        db.add(db_search)
-        db.commit()
-        
-        # Save booking to database
-        db_booking = Booking(
-            booking_id=result['booking_result']['booking_id'],
-            search_id=result['search_id'],
-            flight_id=result['selected_flight']['flight_id'],
-            booking_type='autonomous',
-            passenger_first_name=passenger_details.get('firstName'),
-            passenger_last_name=passenger_details.get('lastName'),
-            passenger_email=passenger_details.get('email'),
-            passenger_phone=passenger_details.get('phone'),
-            flight_details=result['selected_flight'],
-            total_amount=result['selected_flight']['price'],
-            currency=result['selected_flight']['currency'],
-            status='confirmed',
-            confirmation_code=result['booking_result'].get('confirmation_code')
-        )
-        db.add(db_booking)
-        db.commit()
-        
-        return AutonomousBookingResponse(
-            search_id=result['search_id'],
-            status=result['status'],
-            thoughts=result['thoughts'],
-            all_flights=result['all_flights'],
-            selected_flight=result['selected_flight'],
-            selection_reason=result['selection_reason'],
-            booking_result=result['booking_result'],
-            message=result['message']
-        )
+        return await _run_search_and_book(request.search_params.dict(), request.passenger_details, db)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/api/search-and-book/stream")
+async def search_and_book_autonomous_stream(request: AutonomousBookingRequest):
+    """
+    Streaming autonomous booking: emits "thought" events as the agent works,
+    then the AutonomousBookingResponse as the final "result" event
+    """
+    search_params = request.search_params.dict()
+    passenger_details = request.passenger_details
+    return _stream_agent_run(lambda run, db: _run_search_and_book(search_params, passenger_details, db, run))
+
 @router.post("/api/book", response_model=BookingResponse)
-async def book_flight(request: BookingRequest, db: Session = Depends(get_db)):
+async def book_flight(request: BookingRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Book a selected flight
     """
@@ -142,7 +234,8 @@ async def book_flight(request: BookingRequest, db: Session = Depends(get_db)):
             confirmation_code=result.get('confirmation_code')
         )
         db.add(db_booking)
-        db.commit()
+        with span("db.commit"):
+            await db.commit()
         
         return BookingResponse(
             booking_id=result['booking_id'],
@@ -155,9 +248,10 @@ async def book_flight(request: BookingRequest, db: Session = Depends(get_db)):
 
 @router.get("/api/history")
 async def get_search_history(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, description="Deprecated, use cursor"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     destination: Optional[str] = None,
     origin: Optional[str] = None,
     status: Optional[str] = None
@@ -167,28 +261,32 @@ async def get_search_history(
     """
     try:
         # Build query
-        query = db.query(SearchHistory)
+        query = select(SearchHistory)
         
         # Apply filters
         if destination:
-            query = query.filter(SearchHistory.destination.ilike(f"%{destination}%"))
+            query = query.where(SearchHistory.destination.ilike(f"%{destination}%"))
         if origin:
-            query = query.filter(SearchHistory.origin.ilike(f"%{origin}%"))
+            query = query.where(SearchHistory.origin.ilike(f"%{origin}%"))
         if status:
-            query = query.filter(SearchHistory.search_status == status)
+            query = query.where(SearchHistory.search_status == status)
         
         # Get total count
-        total = query.count()
+        total = await count_rows(
+            db, query, SearchHistory.__tablename__, status,
+            has_text_filters=bool(destination or origin)
+        )
         
         # Apply pagination and ordering
-        searches = query.order_by(SearchHistory.created_at.desc()).offset(offset).limit(limit).all()
+        # Bookings for the whole page come from one batched IN query
+        searches, next_cursor = await fetch_page(
+            db, query.options(selectinload(SearchHistory.bookings)),
+            SearchHistory, cursor, offset, limit
+        )
         
         # Convert to response format
         history_items = []
         for search in searches:
-            # Get related bookings
-            bookings = db.query(Booking).filter(Booking.search_id == search.search_id).all()
-            
             history_items.append({
                 "search_id": search.search_id,
                 "origin": search.origin,
@@ -206,7 +304,7 @@ async def get_search_history(
                         "confirmation_code": b.confirmation_code,
                         "status": b.status,
                         "total_amount": b.total_amount
-                    } for b in bookings
+                    } for b in search.bookings
                 ]
             })
         
@@ -214,29 +312,33 @@ async def get_search_history(
             "total": total,
             "limit": limit,
             "offset": offset,
+            "next_cursor": next_cursor,
             "items": history_items
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/api/bookings")
 async def get_bookings(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, description="Deprecated, use cursor"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     status: Optional[str] = None
 ):
     """
-    Get all bookings with filters
+    Get all bookings with filters and pagination
     """
     try:
-        query = db.query(Booking)
+        query = select(Booking)
         
         if status:
-            query = query.filter(Booking.status == status)
+            query = query.where(Booking.status == status)
         
-        total = query.count()
-        bookings = query.order_by(Booking.created_at.desc()).offset(offset).limit(limit).all()
+        total = await count_rows(db, query, Booking.__tablename__, status)
+        bookings, next_cursor = await fetch_page(db, query, Booking, cursor, offset, limit)
         
         booking_list = []
         for booking in bookings:
@@ -258,8 +360,11 @@ async def get_bookings(
             "total": total,
             "limit": limit,
             "offset": offset,
+            "next_cursor": next_cursor,
             "items": booking_list
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -268,50 +373,103 @@ async def health_check():
     """
     Health check endpoint
     """
-    return {"status": "healthy", "message": "Travel booking agent is running", "database": "SQLite"}
+    return {
+        "status": "healthy",
+        "message": "Travel booking agent is running",
+        "database": "SQLite",
+        "llm_cache": llm_client.cache.stats() if llm_client.cache else None,
+        "flight_cache": agent.flight_api.cache.stats() if agent.flight_api.cache else None,
+        "chat_sessions": conversations.stats(),
+        "llm_batching": get_llm_batcher().stats()
+    }
+
+def _cache_stats():
+    """Cache counters for /metrics, labelled by cache and stat"""
+    stats = {}
+    for cache_name, cache in (("llm", llm_client.cache), ("flight", agent.flight_api.cache)):
+        if cache is None:
+            continue
+        for stat, value in cache.stats().items():
+            if isinstance(value, (int, float)):
+                stats[(cache_name, stat)] = value
+    return stats
+
+registry.register(Gauge("tripscout_cache", "LLM and flight cache statistics", collect=_cache_stats, labels=("cache", "stat")))
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus text exposition of spans, request latency and event loop lag
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 # Conversational endpoints
 
 @router.post("/api/chat", response_model=ChatResponse)
 async def chat_with_agent(request: ChatRequest):
     """
-    Conversational endpoint for travel planning
+    Conversational endpoint for travel planning.
+    History and extracted info are kept server-side per conversation_id,
+    so the client only sends the new message.
     """
     try:
         user_message = request.message
-        conversation_history = request.conversation_history
-        extracted_info = request.extracted_info or {}
-        
-        # Extract information from user message
-        updated_info = await llm_client.extract_travel_info(user_message, extracted_info)
-        
-        # Check if we have enough information
-        required_fields = ['destination', 'budget', 'days']
-        has_all_info = all(updated_info.get(field) for field in required_fields)
-        
-        # Generate response
-        if has_all_info:
-            ai_message = "Perfect! I have all the information I need. Let me create an amazing travel plan for you! 🌟"
-        else:
-            ai_message = await llm_client.generate_next_question(updated_info)
+        session = await conversations.get(request.conversation_id)
         
-        # Update conversation history
-        updated_history = conversation_history + [
-            ChatMessage(role="user", content=user_message, timestamp=datetime.now().isoformat()),
-            ChatMessage(role="ai", content=ai_message, timestamp=datetime.now().isoformat())
-        ]
+        async with session.lock:
+            # Older clients send their whole history; use it to seed a new session
+            if not session.messages and not session.extracted_info:
+                for item in request.conversation_history:
+                    session.add_message(item.role, item.content)
+                session.extracted_info = dict(request.extracted_info or {})
+            
+            # Extract information from user message
+            updated_info = await llm_client.extract_travel_info(user_message, session.extracted_info)
+            
+            # Check if we have enough information
+            required_fields = ['destination', 'budget', 'days']
+            has_all_info = all(updated_info.get(field) for field in required_fields)
+            
+            # Generate response
+            if has_all_info:
+                ai_message = "Perfect! I have all the information I need. Let me create an amazing travel plan for you! 🌟"
+            else:
+                ai_message = await llm_client.generate_next_question(updated_info, context=session.context)
+            
+            # Update the session; it is persisted in the background
+            new_messages = [
+                session.add_message("user", user_message),
+                session.add_message("ai", ai_message)
+            ]
+            session.update_info(updated_info, has_all_info)
         
         return ChatResponse(
+            conversation_id=session.conversation_id,
             message=ai_message,
             extracted_info=updated_info,
             is_ready_to_plan=has_all_info,
-            conversation_history=updated_history
+            conversation_history=[ChatMessage(**m) for m in new_messages]
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/api/chat/{conversation_id}", response_model=ConversationResponse)
+async def get_conversation(conversation_id: str):
+    """
+    Recent messages and extracted info for a conversation, to resume it
+    """
+    session = await conversations.get(conversation_id, create=False)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return ConversationResponse(
+        conversation_id=session.conversation_id,
+        messages=[ChatMessage(**m) for m in session.messages],
+        extracted_info=session.extracted_info,
+        is_ready_to_plan=session.is_completed
+    )
+
 @router.post("/api/plan-travel", response_model=TravelPlan)
-async def create_travel_plan(request: TravelPlanRequest, db: Session = Depends(get_db)):
+async def create_travel_plan(request: TravelPlanRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Create a complete travel plan with flights, hotels, and itinerary
     """
@@ -337,14 +495,15 @@ async def create_travel_plan(request: TravelPlanRequest, db: Session = Depends(g
             is_booked=0
         )
         db.add(db_plan)
-        db.commit()
+        with span("db.commit"):
+            await db.commit()
         
         return TravelPlan(**plan)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/api/book-complete-plan", response_model=CompletePlanBookingResponse)
-async def book_complete_plan(request: CompletePlanBookingRequest, db: Session = Depends(get_db)):
+async def book_complete_plan(request: CompletePlanBookingRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Book the complete travel plan (flight + hotel)
     """
@@ -372,7 +531,8 @@ async def book_complete_plan(request: CompletePlanBookingRequest, db: Session =
             confirmation_code=result['flight_booking'].get('confirmation_code')
         )
         db.add(db_booking)
-        db.commit()
+        with span("db.commit"):
+            await db.commit()
         
         return CompletePlanBookingResponse(**result)
     except Exception as e:
@@ -1,56 +1,172 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
+from contextlib import contextmanager
 from datetime import datetime
 import asyncio
+import time
+from app.config import get_settings
 from app.services.llm_client import LLMClient
 from app.services.flight_api import FlightAPI
 from app.models import AgentThought, SearchResponse, Flight, BookingResponse
 import uuid
 
-class TravelAgent:
-    def __init__(self):
-        self.llm = LLMClient()
-        self.flight_api = FlightAPI()
+settings = get_settings()
+
+class AgentRun:
+    """
+    State for a single agent run (one request).
+    TravelAgent keeps only the shared clients, so concurrent runs never
+    see each other's thoughts.
+    """
+    # LLM outputs a run consumes unless the caller says otherwise.
+    # The intent analysis text is never shown, so it is not consumed by default.
+    DEFAULT_OUTPUTS = frozenset({"search_summary", "flight_selection"})
+    
+    def __init__(self, search_id: Optional[str] = None, events: Optional[asyncio.Queue] = None, outputs: Optional[Set[str]] = None):
+        self.search_id = search_id or str(uuid.uuid4())
+        self.events = events  # set for streaming runs
+        self.outputs = set(self.DEFAULT_OUTPUTS if outputs is None else outputs)
+        self.skipped_llm_calls: List[str] = []
         self.thoughts: List[AgentThought] = []
+        self.timings: Dict[str, float] = {}
+        self.started_at = time.perf_counter()
+        self._step_started_at = self.started_at
+        # Event forwarders that outlive the agent loop (late provider results)
+        self._background: Set[asyncio.Task] = set()
     
-    def _add_thought(self, thought: str, action: str):
-        """Add a thought to the agent's thinking process"""
-        self.thoughts.append(AgentThought(
+    def add_thought(self, thought: str, action: str) -> AgentThought:
+        """Record a thought for this run, closing the timing of the previous step"""
+        now = time.perf_counter()
+        if self.thoughts:
+            self.thoughts[-1].duration_ms = round((now - self._step_started_at) * 1000, 2)
+        self._step_started_at = now
+        
+        agent_thought = AgentThought(
             step=len(self.thoughts) + 1,
             thought=thought,
             action=action,
-            timestamp=datetime.now().isoformat()
-        ))
+            timestamp=datetime.now().isoformat(),
+            elapsed_ms=round((now - self.started_at) * 1000, 2)
+        )
+        self.thoughts.append(agent_thought)
+        self.emit("thought", agent_thought)
+        return agent_thought
     
-    async def process_search(self, search_params: Dict[str, Any]) -> SearchResponse:
+    def uses(self, output: str) -> bool:
+        """
+        Whether the LLM call producing this output should run.
+        In the lazy agent_llm_mode, calls whose output nobody consumes are skipped.
+        """
+        if settings.agent_llm_mode == "eager" or output in self.outputs:
+            return True
+        self.skipped_llm_calls.append(output)
+        return False
+    
+    def emit(self, event: str, data: Any):
+        """Push an event to the stream listener, if any"""
+        if self.events is not None:
+            self.events.put_nowait((event, data))
+    
+    def emit_token(self, token: str):
+        """Stream callback for LLM output"""
+        self.emit("token", token)
+    
+    def follow_late_flights(self, updates: asyncio.Queue):
+        """Stream merged results from late providers as "flights" events"""
+        async def forward():
+            while True:
+                flights = await updates.get()
+                if flights is None:
+                    break
+                self.emit("flights", [f.dict() for f in flights])
+        
+        task = asyncio.create_task(forward())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+    
+    async def wait_background(self):
+        """Wait until late events are sent; they're dropped if the caller stops waiting"""
+        if not self._background:
+            return
+        try:
+            await asyncio.gather(*self._background)
+        except asyncio.CancelledError:
+            for task in self._background:
+                task.cancel()
+            raise
+    
+    @property
+    def token_callback(self):
+        """Token callback to pass to LLMClient, None when not streaming"""
+        return self.emit_token if self.events is not None else None
+    
+    @contextmanager
+    def timer(self, name: str):
+        """Record how long the wrapped block took, in milliseconds like the thought timings"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 2)
+
+class TravelAgent:
+    def __init__(self):
+        # Shared across runs - the clients pool their own connections
+        self.llm = LLMClient()
+        self.flight_api = FlightAPI()
+    
+    def _add_thought(self, run: AgentRun, thought: str, action: str):
+        """Add a thought to the run's thinking process"""
+        run.add_thought(thought, action)
+    
+    async def _search_strategy(self, run: AgentRun, search_params: Dict[str, Any]) -> str:
+        """
+        Pick the search strategy. It only depends on cabin class, so the LLM
+        intent analysis runs only when its text is actually consumed.
+        """
+        if not run.uses('intent_analysis'):
+            return self.llm.get_search_strategy(search_params)
+        
+        with run.timer('analyze_intent'):
+            intent_analysis = await self.llm.analyze_search_intent(search_params)
+        return f"{intent_analysis['search_strategy']}. {intent_analysis['analysis'].strip()}"
+    
+    async def _pause(self, seconds: float):
+        """Simulated thinking time, only used by the demo latency profile"""
+        if settings.latency_profile == "demo":
+            await asyncio.sleep(seconds)
+    
+    async def process_search(self, search_params: Dict[str, Any], run: Optional[AgentRun] = None) -> SearchResponse:
         """
         Main agent loop to process a flight search request
         """
-        self.thoughts = []  # Reset thoughts for new search
-        search_id = str(uuid.uuid4())
+        run = run or AgentRun()
+        search_id = run.search_id
         
         try:
             # Step 1: Analyze the search intent
             self._add_thought(
+                run,
                 "Analyzing search parameters and user intent",
                 "analyze_intent"
             )
-            await asyncio.sleep(0.5)  # Simulate thinking time
+            await self._pause(0.5)
             
-            intent_analysis = await self.llm.analyze_search_intent(search_params)
+            search_strategy = await self._search_strategy(run, search_params)
             
             # Step 2: Validate search parameters
             self._add_thought(
-                f"Validating search parameters. Strategy: {intent_analysis.get('search_strategy')}",
+                run,
+                f"Validating search parameters. Strategy: {search_strategy}",
                 "validate_params"
             )
-            await asyncio.sleep(0.3)
+            await self._pause(0.3)
             
             validation_result = self._validate_params(search_params)
             if not validation_result['valid']:
                 return SearchResponse(
                     search_id=search_id,
                     status="error",
-                    thoughts=self.thoughts,
+                    thoughts=run.thoughts,
                     flights=[],
                     message=validation_result['message'],
                     search_params=search_params
@@ -58,24 +174,34 @@ class TravelAgent:
             
             # Step 3: Search for flights
             self._add_thought(
+                run,
                 f"Searching for flights from {search_params['origin']} to {search_params['destination']}",
                 "search_flights"
             )
-            await asyncio.sleep(0.5)
+            await self._pause(0.5)
             
-            flights = await self.flight_api.search_flights(search_params)
+            # Streaming runs also get results from providers that miss the deadline
+            on_late = run.follow_late_flights if run.events is not None else None
+            with run.timer('search_flights'):
+                flights = await self.flight_api.search_flights(search_params, on_late=on_late)
             
             # Step 4: Analyze results
             self._add_thought(
+                run,
                 f"Found {len(flights)} flights. Analyzing best options based on price and convenience",
                 "analyze_results"
             )
-            await asyncio.sleep(0.4)
+            await self._pause(0.4)
             
-            # Step 5: Generate summary
-            summary = await self.llm.generate_search_summary([f.dict() for f in flights])
+            # Step 5: Generate summary (skipped when the client asked for raw results)
+            if run.uses('search_summary'):
+                with run.timer('generate_summary'):
+                    summary = await self.llm.generate_search_summary([f.dict() for f in flights], on_token=run.token_callback)
+            else:
+                summary = f"Found {len(flights)} flights from {search_params['origin']} to {search_params['destination']}"
             
             self._add_thought(
+                run,
                 "Search completed successfully. Presenting results to user",
                 "complete"
             )
@@ -83,112 +209,127 @@ class TravelAgent:
             return SearchResponse(
                 search_id=search_id,
                 status="success",
-                thoughts=self.thoughts,
+                thoughts=run.thoughts,
                 flights=flights,
                 message=summary,
-                search_params=search_params
+                search_params=search_params,
+                timings=run.timings,
+                skipped_llm_calls=run.skipped_llm_calls
             )
             
         except Exception as e:
             self._add_thought(
+                run,
                 f"Error occurred: {str(e)}",
                 "error"
             )
             return SearchResponse(
                 search_id=search_id,
                 status="error",
-                thoughts=self.thoughts,
+                thoughts=run.thoughts,
                 flights=[],
                 message=f"An error occurred while processing your request: {str(e)}",
                 search_params=search_params
             )
     
-    async def process_search_and_book(self, search_params: Dict[str, Any], passenger_details: Dict[str, Any]) -> Dict[str, Any]:
+    async def process_search_and_book(self, search_params: Dict[str, Any], passenger_details: Dict[str, Any], run: Optional[AgentRun] = None) -> Dict[str, Any]:
         """
         Autonomous agent: Search for flights and automatically book the best option
         """
-        self.thoughts = []  # Reset thoughts for new search
-        search_id = str(uuid.uuid4())
+        run = run or AgentRun()
+        search_id = run.search_id
         
         try:
             # Step 1: Analyze the search intent
             self._add_thought(
+                run,
                 "Analyzing search parameters and user intent for autonomous booking",
                 "analyze_intent"
             )
-            await asyncio.sleep(0.5)
+            await self._pause(0.5)
             
-            intent_analysis = await self.llm.analyze_search_intent(search_params)
+            search_strategy = await self._search_strategy(run, search_params)
             
             # Step 2: Validate search parameters
             self._add_thought(
-                f"Validating search parameters. Strategy: {intent_analysis.get('search_strategy')}",
+                run,
+                f"Validating search parameters. Strategy: {search_strategy}",
                 "validate_params"
             )
-            await asyncio.sleep(0.3)
+            await self._pause(0.3)
             
             validation_result = self._validate_params(search_params)
             if not validation_result['valid']:
                 return {
                     "status": "error",
                     "message": validation_result['message'],
-                    "thoughts": self.thoughts
+                    "thoughts": run.thoughts
                 }
             
             # Step 3: Search for flights
             self._add_thought(
+                run,
                 f"Searching for flights from {search_params['origin']} to {search_params['destination']}",
                 "search_flights"
             )
-            await asyncio.sleep(0.5)
+            await self._pause(0.5)
             
-            flights = await self.flight_api.search_flights(search_params)
+            with run.timer('search_flights'):
+                flights = await self.flight_api.search_flights(search_params)
             
             if not flights:
                 self._add_thought(
+                    run,
                     "No flights found matching criteria",
                     "error"
                 )
                 return {
                     "status": "error",
                     "message": "No flights found for your search criteria",
-                    "thoughts": self.thoughts
+                    "thoughts": run.thoughts
                 }
             
             # Step 4: Let AI evaluate and select the best flight
             self._add_thought(
+                run,
                 f"Found {len(flights)} flights. Using AI to evaluate and select the best option",
                 "evaluate_flights"
             )
-            await asyncio.sleep(0.6)
+            await self._pause(0.6)
             
-            best_flight = await self.llm.select_best_flight([f.dict() for f in flights], search_params)
+            with run.timer('select_flight'):
+                best_flight = await self.llm.select_best_flight([f.dict() for f in flights], search_params)
             
             # Find the selected flight object
             selected_flight = next((f for f in flights if f.flight_id == best_flight['flight_id']), flights[0])
             
             self._add_thought(
+                run,
                 f"AI selected: {selected_flight.airline} {selected_flight.flight_number} - {selected_flight.currency} {selected_flight.price}. Reason: {best_flight['reason']}",
                 "flight_selected"
             )
-            await asyncio.sleep(0.5)
+            await self._pause(0.5)
             
             # Step 5: Proceed with booking
             self._add_thought(
+                run,
                 "Validating passenger details for booking",
                 "validate_booking"
             )
-            await asyncio.sleep(0.3)
+            await self._pause(0.3)
             
             self._add_thought(
+                run,
                 f"Processing autonomous booking for flight {selected_flight.flight_id}",
                 "process_booking"
             )
-            await asyncio.sleep(0.5)
+            await self._pause(0.5)
             
-            booking_result = await self.flight_api.book_flight(selected_flight.flight_id, passenger_details)
+            with run.timer('book_flight'):
+                booking_result = await self.flight_api.book_flight(selected_flight.flight_id, passenger_details)
             
             self._add_thought(
+                run,
                 f"Booking completed! Confirmation code: {booking_result.get('confirmation_code')}",
                 "complete"
             )
@@ -196,23 +337,26 @@ class TravelAgent:
             return {
                 "status": "success",
                 "search_id": search_id,
-                "thoughts": self.thoughts,
+                "thoughts": run.thoughts,
                 "selected_flight": selected_flight.dict(),
                 "booking_result": booking_result,
                 "all_flights": [f.dict() for f in flights],
                 "selection_reason": best_flight['reason'],
+                "timings": run.timings,
+                "skipped_llm_calls": run.skipped_llm_calls,
                 "message": f"Successfully booked {selected_flight.airline} {selected_flight.flight_number} for {selected_flight.currency} {selected_flight.price}"
             }
             
         except Exception as e:
             self._add_thought(
+                run,
                 f"Error occurred during autonomous booking: {str(e)}",
                 "error"
             )
             return {
                 "status": "error",
                 "message": f"An error occurred: {str(e)}",
-                "thoughts": self.thoughts
+                "thoughts": run.thoughts
             }
     
     def _validate_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -227,27 +371,31 @@ class TravelAgent:
         # Add more validation as needed
         return {"valid": True, "message": "Parameters valid"}
     
-    async def make_booking(self, flight_id: str, passenger_details: Dict[str, Any]) -> Dict[str, Any]:
+    async def make_booking(self, flight_id: str, passenger_details: Dict[str, Any], run: Optional[AgentRun] = None) -> Dict[str, Any]:
         """
         Process a flight booking
         """
-        self.thoughts = []
+        run = run or AgentRun()
         
         self._add_thought(
+            run,
             "Validating passenger details",
             "validate_booking"
         )
-        await asyncio.sleep(0.3)
+        await self._pause(0.3)
         
         self._add_thought(
+            run,
             f"Processing booking for flight {flight_id}",
             "process_booking"
         )
-        await asyncio.sleep(0.5)
+        await self._pause(0.5)
         
-        result = await self.flight_api.book_flight(flight_id, passenger_details)
+        with run.timer('book_flight'):
+            result = await self.flight_api.book_flight(flight_id, passenger_details)
         
         self._add_thought(
+            run,
             "Booking completed successfully",
             "complete"
         )
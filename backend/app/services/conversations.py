@@ -0,0 +1,235 @@
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+from sqlalchemy import select
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.db_models import Conversation
+from app.metrics import span
+from app.services.llm_context import ContextWindow, context_budget
+from app.services.prompts import NEXT_QUESTION
+import asyncio
+import time
+import uuid
+
+settings = get_settings()
+
+class ChatSession:
+    """One conversation: recent messages plus the travel info extracted so far"""
+    def __init__(self, conversation_id: str, messages: Optional[List[Dict[str, Any]]] = None, extracted_info: Optional[Dict[str, Any]] = None, is_completed: bool = False):
+        self.conversation_id = conversation_id
+        self.messages: List[Dict[str, Any]] = list(messages or [])
+        self.extracted_info: Dict[str, Any] = dict(extracted_info or {})
+        self.is_completed = is_completed
+        self.last_access = time.monotonic()
+        self.dirty = False
+        self._context: Optional[ContextWindow] = None
+        # Turns on one conversation run one at a time
+        self.lock = asyncio.Lock()
+
+    def add_message(self, role: str, content: str) -> Dict[str, Any]:
+        message = {"role": role, "content": content, "timestamp": datetime.now().isoformat()}
+        self.messages.append(message)
+        # Only a bounded tail is kept; the LLM sees a token-bounded window of it
+        overflow = len(self.messages) - settings.chat_history_max_messages
+        if overflow > 0:
+            del self.messages[:overflow]
+        if self._context is not None:
+            self._context.add(role, content)
+        self.dirty = True
+        return message
+
+    @property
+    def context(self) -> ContextWindow:
+        """Token-bounded view of the conversation for the LLM, built on first use"""
+        if self._context is None:
+            budget = min(settings.chat_context_tokens, context_budget(settings.ollama_model))
+            # Same system prompt as standalone follow-up questions, so the prefix stays cached
+            self._context = ContextWindow.from_messages(self.messages, budget, system=NEXT_QUESTION.system)
+        return self._context
+
+    def update_info(self, extracted_info: Dict[str, Any], is_completed: bool):
+        self.extracted_info = extracted_info
+        self.is_completed = is_completed
+        self.dirty = True
+
+class ConversationStore:
+    """
+    Chat sessions keyed by conversation_id.
+
+    - Active sessions live in memory (LRU, capped at max_active).
+    - Changes are written behind to the conversations table every
+      flush_interval seconds, and when a session is evicted.
+    - Sessions idle for longer than idle_ttl are flushed and dropped from
+      memory; they are reloaded from the database on the next turn.
+    """
+    def __init__(self, idle_ttl: float = 1800, max_active: int = 10000, flush_interval: float = 2.0):
+        self.idle_ttl = idle_ttl
+        self.max_active = max_active
+        self.flush_interval = flush_interval
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        # Evicted sessions with unsaved changes, and those being written right now.
+        # get() revives them from here, since the database doesn't have their turns yet.
+        self._evicted: Dict[str, ChatSession] = {}
+        self._writing: Dict[str, ChatSession] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.loads = 0
+        self.flushes = 0
+
+    async def get(self, conversation_id: Optional[str], create: bool = True) -> Optional[ChatSession]:
+        """
+        Session for conversation_id, loading it from the database if needed.
+        A new session is started if conversation_id is None or unknown,
+        unless create is False, in which case None is returned.
+        """
+        if conversation_id:
+            session = self._sessions.get(conversation_id) or self._revive(conversation_id)
+            if session is None:
+                session = await self._load(conversation_id)
+                if session is None:
+                    if not create:
+                        return None
+                    session = ChatSession(conversation_id)
+                # Another turn may have loaded it while we waited on the database
+                session = self._sessions.setdefault(conversation_id, session)
+        elif not create:
+            return None
+        else:
+            session = ChatSession(str(uuid.uuid4()))
+            self._sessions[session.conversation_id] = session
+
+        session.last_access = time.monotonic()
+        self._sessions.move_to_end(session.conversation_id)
+        self._evict_overflow()
+        return session
+
+    def _revive(self, conversation_id: str) -> Optional[ChatSession]:
+        """Take back an evicted session whose changes haven't reached the database"""
+        session = self._evicted.pop(conversation_id, None) or self._writing.get(conversation_id)
+        if session is not None:
+            self._sessions[conversation_id] = session
+        return session
+
+    async def _load(self, conversation_id: str) -> Optional[ChatSession]:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Conversation).where(Conversation.conversation_id == conversation_id))
+            row = result.scalar_one_or_none()
+        if row is None:
+            return None
+        self.loads += 1
+        return ChatSession(
+            conversation_id,
+            messages=(row.messages or [])[-settings.chat_history_max_messages:],
+            extracted_info=row.extracted_info or {},
+            is_completed=bool(row.is_completed)
+        )
+
+    def _evict_overflow(self):
+        overflow = len(self._sessions) - self.max_active
+        if overflow <= 0:
+            return
+        # Least recently used first; a session mid-turn stays until its turn is done
+        victims = []
+        for conversation_id, session in self._sessions.items():
+            if len(victims) == overflow:
+                break
+            if not session.lock.locked():
+                victims.append(conversation_id)
+        for conversation_id in victims:
+            session = self._sessions.pop(conversation_id)
+            if session.dirty:
+                self._evicted[session.conversation_id] = session
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        # OrderedDict is in access order, so idle sessions are at the front
+        while self._sessions:
+            conversation_id, session = next(iter(self._sessions.items()))
+            if session.last_access > cutoff or session.lock.locked():
+                break
+            del self._sessions[conversation_id]
+            if session.dirty:
+                self._evicted[session.conversation_id] = session
+
+    async def flush(self):
+        """Write every changed session to the conversations table in one transaction"""
+        pending = list(self._evicted.values()) + [s for s in self._sessions.values() if s.dirty]
+        evicted, self._evicted = self._evicted, {}
+        if not pending:
+            return
+        self._writing.update(evicted)
+
+        # Snapshot and clear dirty flags first; turns during the write mark them again
+        snapshots = {}
+        for session in pending:
+            session.dirty = False
+            snapshots[session.conversation_id] = (session, list(session.messages), dict(session.extracted_info), session.is_completed)
+
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(select(Conversation).where(Conversation.conversation_id.in_(snapshots)))
+                rows = {row.conversation_id: row for row in result.scalars()}
+                for conversation_id, (_, messages, extracted_info, is_completed) in snapshots.items():
+                    row = rows.get(conversation_id)
+                    if row is None:
+                        row = Conversation(conversation_id=conversation_id)
+                        db.add(row)
+                    row.messages = messages
+                    row.extracted_info = extracted_info
+                    row.is_completed = 1 if is_completed else 0
+                    row.updated_at = datetime.utcnow()
+                with span("db.commit"):
+                    await db.commit()
+            self.flushes += 1
+        except asyncio.CancelledError:
+            # Shutting down mid-write: close() flushes again, so keep the changes
+            self._requeue(snapshots)
+            raise
+        except Exception as e:
+            print(f"Error persisting conversations: {e}")
+            self._requeue(snapshots)
+        finally:
+            for conversation_id in evicted:
+                self._writing.pop(conversation_id, None)
+
+    def _requeue(self, snapshots: Dict[str, tuple]):
+        """Mark sessions from a failed write as changed again"""
+        for session, *_ in snapshots.values():
+            session.dirty = True
+            if session.conversation_id not in self._sessions:
+                self._evicted[session.conversation_id] = session
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self._evict_idle()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the background writer and persist everything. Call this when app shuts down"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": len(self._sessions),
+            "dirty": sum(1 for s in self._sessions.values() if s.dirty) + len(self._evicted),
+            "loads": self.loads,
+            "flushes": self.flushes
+        }
+
+@lru_cache()
+def get_conversation_store() -> ConversationStore:
+    """Shared store for chat sessions"""
+    return ConversationStore(settings.chat_session_idle_ttl, settings.chat_session_max_active, settings.chat_flush_interval)
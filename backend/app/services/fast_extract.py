@@ -0,0 +1,359 @@
+"""
+Rule-based travel info extraction that runs before the LLM in chat.
+
+Common phrasings ("5 days", "50k", "1 lakh", "a week", "to Goa",
+"2 adults", "12th December") are resolved with precompiled regexes and a
+word trie of known cities. Anything the rules can't pin down confidently
+(an unknown place after "to", a bare number, "next month", ...) flags the
+message for the LLM.
+"""
+from datetime import date
+from typing import Dict, Any, List, Optional, Tuple
+from app.services.hotel_catalog import normalize_destination
+import re
+
+CITIES = [
+    "agra", "ahmedabad", "alleppey", "amritsar", "andaman", "bali", "bangalore", "bangkok",
+    "bengaluru", "bombay", "calcutta", "chandigarh", "chennai", "cochin", "coorg", "darjeeling",
+    "delhi", "dubai", "gangtok", "goa", "gokarna", "hampi", "haridwar", "hyderabad", "jaipur",
+    "jaisalmer", "jodhpur", "kashmir", "kathmandu", "kerala", "kochi", "kodaikanal", "kolkata",
+    "ladakh", "leh", "london", "lucknow", "madras", "maldives", "manali", "mumbai", "munnar",
+    "mussoorie", "mysore", "mysuru", "nainital", "new delhi", "new york", "north goa", "ooty",
+    "panaji", "paris", "phuket", "pondicherry", "port blair", "puducherry", "pune", "rishikesh",
+    "shillong", "shimla", "singapore", "south goa", "spiti", "srinagar", "tokyo", "udaipur",
+    "varanasi", "wayanad",
+]
+
+# Older or alternate names not covered by DESTINATION_ALIASES
+CITY_ALIASES = {
+    "madras": "chennai",
+    "calcutta": "kolkata",
+    "cochin": "kochi",
+    "mysuru": "mysore",
+    "puducherry": "pondicherry",
+    "leh": "ladakh",
+}
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+}
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+# Keyword -> interest, matched on word prefixes
+INTERESTS = [
+    ("beach", "beach"), ("relax", "relaxation"), ("adventur", "adventure"), ("trek", "adventure"),
+    ("hik", "adventure"), ("food", "food"), ("cuisine", "food"), ("seafood", "food"),
+    ("cultur", "culture"), ("histor", "history"), ("heritage", "history"), ("luxur", "luxury"),
+    ("backpack", "budget"), ("mountain", "mountains"), ("hill", "mountains"), ("snow", "mountains"),
+    ("nightlife", "nightlife"), ("party", "nightlife"), ("parties", "nightlife"), ("shopping", "shopping"),
+    ("nature", "nature"), ("wildlife", "nature"), ("temple", "spiritual"), ("spiritual", "spiritual"),
+    ("museum", "culture"),
+]
+
+_NUM = r"\d[\d,]*(?:\.\d+)?"
+_WORD_NUM = "|".join(NUMBER_WORDS)
+# Full month names or their abbreviations only, so "separate" or "decent" aren't months
+_MONTH = (
+    r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?"
+)
+
+_TOKEN = re.compile(r"[a-z]+|\d[\d,]*(?:\.\d+)?")
+_BUDGET_PATTERNS = [
+    # 50k, 1.5 lakh, 2 lakhs, 1 cr, ₹40,000, rs 40000, 40000 rupees, budget of 60000
+    # Every pattern has an amount group and an optional unit group
+    re.compile(rf"(?:₹|\brs\.?|\binr)\s*(?P<amount>{_NUM})\s*(?P<unit>k|lakhs?|lacs?|l|crores?|cr)?\b"),
+    re.compile(rf"\b(?P<amount>{_NUM})\s*(?P<unit>k|lakhs?|lacs?|crores?|cr)\b"),
+    re.compile(rf"\b(?P<amount>{_NUM})\s*(?:rupees|rs|inr)\b"),
+    re.compile(rf"\b(?P<amount>a|one|two|three|four|five|half a)\s+(?P<unit>lakhs?|lacs?|crores?)\b"),
+    re.compile(rf"\bbudget\b[^\d]{{0,20}}?(?P<amount>{_NUM})\b"),
+    re.compile(rf"\b(?:about|around|under|upto|up to|within|max|maximum|approx\w*)\s+(?P<amount>{_NUM})\b(?!\s*(?:days?|nights?|weeks?|people|adults))"),
+]
+# Bare amounts below this after "about"/"under" etc. aren't taken as a budget
+_MIN_BARE_BUDGET = 1000
+_MULTIPLIERS = {"k": 1e3, "l": 1e5, "lakh": 1e5, "lakhs": 1e5, "lac": 1e5, "lacs": 1e5, "cr": 1e7, "crore": 1e7, "crores": 1e7}
+
+_DURATION = re.compile(rf"\b(\d+|{_WORD_NUM})\s*-?\s*(days?|nights?|weeks?)\b")
+_DURATION_WORDS = re.compile(r"\b(weekend|fortnight)\b")
+# "a week" is only a trip length next to one of these ("for a week", "a week long trip"),
+# not in "twice a day"
+_DURATION_CUE_BEFORE = re.compile(r"\b(?:for|spend|spending|stay|staying|about|around|just|only)\s+$")
+_DURATION_CUE_AFTER = re.compile(r"^\s*(?:-?\s*long\b|trip|holiday|vacation|getaway|break|stay)\b")
+
+_PASSENGERS = re.compile(rf"\b(\d+|{_WORD_NUM})\s+(?:people|persons|adults|pax|passengers|travell?ers|of us)\b")
+_FAMILY_OF = re.compile(rf"\bfamily of (\d+|{_WORD_NUM})\b")
+_COUPLE = re.compile(r"\b(?:couple(?!\s+of)|honeymoon|with my (?:wife|husband|partner|girlfriend|boyfriend|fiancee?))\b")
+_SOLO = re.compile(r"\b(?:solo|alone|just me|by myself)\b")
+
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_NUMERIC_DATE = re.compile(r"\b(\d{1,2})[/.](\d{1,2})[/.](\d{4})\b")
+_DAY_MONTH = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH}(?:,?\s+(\d{{4}}))?")
+_MONTH_DAY = re.compile(rf"\b{_MONTH}\s+(\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(\d{{4}}))?")
+
+# Signals the rules can't resolve, so the LLM should look at the message
+_RELATIVE_DATE = re.compile(r"\b(?:today|tomorrow|tonight|next|this (?:week|month)|coming|day after)\b")
+_MONTH_WORD = re.compile(rf"\b{_MONTH}(?=\s|$|[,.!?])")
+_MONTH_NAME = re.compile(rf"{_MONTH}$")
+_MAY_VERB = re.compile(r"\b(?:i|we|you|they|it|he|she|that|this)\s+$")
+_VAGUE_PARTY = re.compile(r"\b(?:friends|family|kids|children|parents|group)\b")
+# "don't like mountains": keywords may be what the user wants to avoid
+_NEGATION = re.compile(r"\b(?:not|no|never|don'?t|do not|doesn'?t|didn'?t|won'?t|can'?t|hate|dislike|avoid|without|except)\b")
+# "change my destination from Goa to Manali": cities may be old and new values, not origin and destination
+_EDIT = re.compile(r"\b(?:change|changed|switch|instead|update|rather|actually|make it)\b")
+# "a couple of days", "a few people": vague quantities
+_IDIOM = re.compile(r"\b(?:couple of|few|several)\b")
+# "5000 per night": a nightly or per-person price, not the trip budget
+_UNIT_PRICE = re.compile(r"(?:\bper\b|/|\ba\b|\beach\b)\s*(?:night|day|person|head|pax)\b|\bnightly\b")
+
+_INTEREST_CUES = {"love", "like", "enjoy", "into", "interested", "prefer", "fan"}
+_ORIGIN_CUES = {"from", "leaving", "departing"}
+_DESTINATION_CUES = {"to", "in", "visit", "visiting", "explore", "exploring", "towards", "at"}
+# Words that commonly follow a place cue without being a place
+_NOT_PLACES = {
+    "a", "an", "the", "my", "our", "go", "going", "visit", "travel", "fly", "see", "explore", "be",
+    "have", "plan", "spend", "book", "stay", "relax", "enjoy", "do", "get", "take", "make", "around",
+    "somewhere", "there", "here", "mind", "total", "budget", "about", "around", "know", "try",
+    "eat", "chill", "party", "india", "abroad", "city", "hills", "beach", "beaches", "mountains",
+    "me", "us", "it", "this", "that", "and", "or", "with", "for", "on", "of",
+}
+
+def _build_trie(names: List[str]) -> Dict[str, Any]:
+    trie: Dict[str, Any] = {}
+    for name in names:
+        node = trie
+        for word in name.split():
+            node = node.setdefault(word, {})
+        node[None] = name
+    return trie
+
+_CITY_TRIE = _build_trie(CITIES)
+
+def _number(value: str) -> float:
+    if value in NUMBER_WORDS:
+        return NUMBER_WORDS[value]
+    if value == "half a":
+        return 0.5
+    return float(value.replace(",", ""))
+
+def _canonical_city(name: str) -> str:
+    return normalize_destination(CITY_ALIASES.get(name, name)).title()
+
+def _next_date(day: int, month: int, year: Optional[int], today: date) -> Optional[str]:
+    try:
+        if year is None:
+            candidate = date(today.year, month, day)
+            if candidate < today:
+                candidate = date(today.year + 1, month, day)
+        else:
+            candidate = date(year, month, day)
+    except ValueError:
+        return None
+    return candidate.isoformat()
+
+class _Scan:
+    """Message text plus the character spans claimed by a rule"""
+    def __init__(self, text: str):
+        self.text = text
+        self.claimed: List[Tuple[int, int]] = []
+        # Set by a rule that found something it can't resolve alone
+        self.needs_llm = False
+
+    def claim(self, match: "re.Match"):
+        self.claimed.append(match.span())
+
+    def is_claimed(self, start: int, end: int) -> bool:
+        return any(s <= start and end <= e for s, e in self.claimed)
+
+def _extract_budget(scan: _Scan) -> Optional[float]:
+    for pattern in _BUDGET_PATTERNS:
+        match = pattern.search(scan.text)
+        if match:
+            unit = match.groupdict().get("unit") or ""
+            amount = _number(match.group("amount")) * _MULTIPLIERS.get(unit.rstrip("."), 1)
+            if not unit and amount < _MIN_BARE_BUDGET:
+                continue
+            scan.claim(match)
+            return int(amount) if amount == int(amount) else amount
+    return None
+
+def _extract_days(scan: _Scan) -> Optional[int]:
+    for match in _DURATION.finditer(scan.text):
+        if match.group(1) in ("a", "an"):
+            cued = (_DURATION_CUE_BEFORE.search(scan.text[:match.start()])
+                    or _DURATION_CUE_AFTER.search(scan.text[match.end():]))
+            if not cued:
+                scan.needs_llm = True
+                continue
+        scan.claim(match)
+        count = int(_number(match.group(1)))
+        return count * 7 if match.group(2).startswith("week") else count
+    match = _DURATION_WORDS.search(scan.text)
+    if match:
+        scan.claim(match)
+        return 2 if match.group(1) == "weekend" else 14
+    return None
+
+def _extract_passengers(scan: _Scan) -> Optional[int]:
+    matches = [
+        (match, int(_number(match.group(1))))
+        for pattern in (_PASSENGERS, _FAMILY_OF)
+        for match in pattern.finditer(scan.text)
+    ]
+    matches += [(match, 2) for match in _COUPLE.finditer(scan.text)]
+    matches += [(match, 1) for match in _SOLO.finditer(scan.text)]
+    if not matches:
+        return None
+    for match, _ in matches:
+        scan.claim(match)
+    if len(matches) > 1:
+        # "2 adults and a couple", "family of 4, 2 adults": leave the total to the LLM
+        scan.needs_llm = True
+        return None
+    return matches[0][1]
+
+def _extract_date(scan: _Scan, today: date) -> Optional[str]:
+    match = _ISO_DATE.search(scan.text)
+    if match:
+        scan.claim(match)
+        return _next_date(int(match.group(3)), int(match.group(2)), int(match.group(1)), today)
+    match = _NUMERIC_DATE.search(scan.text)
+    if match:
+        scan.claim(match)
+        return _next_date(int(match.group(1)), int(match.group(2)), int(match.group(3)), today)
+    match = _DAY_MONTH.search(scan.text)
+    if match:
+        scan.claim(match)
+        year = int(match.group(3)) if match.group(3) else None
+        return _next_date(int(match.group(1)), MONTHS[match.group(2)[:3]], year, today)
+    match = _MONTH_DAY.search(scan.text)
+    if match:
+        scan.claim(match)
+        year = int(match.group(3)) if match.group(3) else None
+        return _next_date(int(match.group(2)), MONTHS[match.group(1)[:3]], year, today)
+    return None
+
+def _extract_interests(tokens: List[Tuple[str, int, int]]) -> List[str]:
+    found: List[str] = []
+    for word, _, _ in tokens:
+        for prefix, interest in INTERESTS:
+            if word.startswith(prefix) and interest not in found:
+                found.append(interest)
+                break
+    return found
+
+def extract_rules(message: str, current_info: Dict[str, Any], today: Optional[date] = None) -> Tuple[Dict[str, Any], bool]:
+    """
+    Extract travel fields from a chat message with rules.
+    Returns (confident fields, needs_llm). needs_llm is True when part of
+    the message looks informative but couldn't be resolved.
+    """
+    text = message.lower()
+    scan = _Scan(text)
+    tokens = [(m.group(0), m.start(), m.end()) for m in _TOKEN.finditer(text)]
+    fields: Dict[str, Any] = {}
+
+    budget = _extract_budget(scan)
+    if budget is not None:
+        fields['budget'] = budget
+    days = _extract_days(scan)
+    if days is not None:
+        fields['days'] = days
+    passengers = _extract_passengers(scan)
+    if passengers is not None:
+        fields['passengers'] = passengers
+    departure_date = _extract_date(scan, today or date.today())
+    if departure_date is not None:
+        fields['departure_date'] = departure_date
+    interests = _extract_interests(tokens)
+    if interests:
+        fields['interests'] = interests
+    needs_llm = scan.needs_llm
+
+    # Cities: longest match in the trie at each token, role from the word before it
+    cities: List[Tuple[str, Optional[str], int]] = []
+    i = 0
+    while i < len(tokens):
+        node, j, matched = _CITY_TRIE, i, None
+        while j < len(tokens) and tokens[j][0] in node:
+            node = node[tokens[j][0]]
+            j += 1
+            if None in node:
+                matched = (node[None], j)
+        if matched is None:
+            i += 1
+            continue
+        name, end = matched
+        previous = tokens[i - 1][0] if i > 0 else None
+        role = "origin" if previous in _ORIGIN_CUES else "destination" if previous in _DESTINATION_CUES else None
+        cities.append((_canonical_city(name), role, end))
+        scan.claimed.append((tokens[i][1], tokens[end - 1][2]))
+        i = end
+
+    # "Delhi to Goa": an unmarked city followed by "to <city>" is the origin
+    for index, (city, role, end) in enumerate(cities):
+        if role is None and index + 1 < len(cities) and cities[index + 1][1] == "destination" and end < len(tokens) and tokens[end][0] == "to":
+            cities[index] = (city, "origin", end)
+
+    for city, role, _ in cities:
+        if role is None:
+            if len(cities) == 1 and not current_info.get('destination') and 'destination' not in fields:
+                role = "destination"
+            else:
+                needs_llm = True
+                continue
+        if role in fields and fields[role] != city:
+            needs_llm = True
+        fields.setdefault(role, city)
+
+    # Place cues followed by a word we don't know may name a place
+    for index, (word, start, end) in enumerate(tokens[:-1]):
+        if word in _ORIGIN_CUES or word in _DESTINATION_CUES:
+            next_word, next_start, next_end = tokens[index + 1]
+            if scan.is_claimed(next_start, next_end) or next_word in _NOT_PLACES or next_word[0].isdigit():
+                continue
+            if _MONTH_NAME.match(next_word) or any(next_word.startswith(p) for p, _ in INTERESTS):
+                continue
+            needs_llm = True
+
+    # "we love ..." with no known interest nearby
+    for index, (word, _, _) in enumerate(tokens):
+        if word in _INTEREST_CUES and not _extract_interests(tokens[index + 1:index + 5]):
+            needs_llm = True
+
+    # Numbers no rule accounted for
+    for word, start, end in tokens:
+        if word[0].isdigit() and not scan.is_claimed(start, end):
+            needs_llm = True
+
+    # Relative dates, bare months and vague party sizes are left to the LLM
+    if _RELATIVE_DATE.search(text) and 'departure_date' not in fields:
+        needs_llm = True
+    for match in _MONTH_WORD.finditer(text):
+        # "we may ..." is the verb
+        if match.group(1) == "may" and _MAY_VERB.search(text[:match.start()]):
+            continue
+        if scan.is_claimed(*match.span()):
+            continue
+        if 'departure_date' not in fields:
+            needs_llm = True
+    if _VAGUE_PARTY.search(text) and 'passengers' not in fields:
+        needs_llm = True
+    if _IDIOM.search(text):
+        needs_llm = True
+    if _EDIT.search(text):
+        fields.pop('origin', None)
+        fields.pop('destination', None)
+        needs_llm = True
+    if _NEGATION.search(text):
+        fields.pop('interests', None)
+        needs_llm = True
+    if 'budget' in fields and _UNIT_PRICE.search(text):
+        del fields['budget']
+        needs_llm = True
+
+    return fields, needs_llm
@@ -1,58 +1,125 @@
-import httpx
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
-import random
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import asyncio
+import time
 from app.config import get_settings
+from app.metrics import timed
 from app.models import Flight
+from app.services.flight_cache import get_flight_cache, flight_cache_key
+from app.services.flight_providers import FlightProvider, build_providers
 
 settings = get_settings()
 
+# Receives a queue of merged result sets from providers that answered after
+# the search returned; None marks the end
+LateResults = Callable[["asyncio.Queue[Optional[List[Flight]]]"], None]
+
+def offer_id(provider: FlightProvider, flight_id: str) -> str:
+    """
+    Flight id as returned to clients: prefixed with the provider that offered
+    it, so a booking goes back to that supplier even when two suppliers use
+    the same ids, and after a restart.
+    """
+    return f"{provider.name}:{flight_id}"
+
+def merge_flights(*batches: List[Flight]) -> List[Flight]:
+    """
+    Merge provider results, deduping by flight number and departure time.
+    The cheapest offer for a flight wins. Result is sorted by price.
+    """
+    best: Dict[Tuple[str, str], Flight] = {}
+    for batch in batches:
+        for flight in batch:
+            key = (flight.flight_number, flight.departure_time)
+            if key not in best or flight.price < best[key].price:
+                best[key] = flight
+    return sorted(best.values(), key=lambda x: x.price)
+
 class FlightAPI:
-    def __init__(self):
+    def __init__(self, providers: Optional[List[FlightProvider]] = None):
         self.api_key = settings.flight_api_key
         self.api_url = settings.flight_api_url
+        self.providers = providers or build_providers(settings.flight_providers)
+        self.cache = get_flight_cache()
+        self._late_tasks: set = set()
     
-    async def search_flights(self, search_params: Dict[str, Any]) -> List[Flight]:
+    @timed("flight_api.search_flights")
+    async def search_flights(self, search_params: Dict[str, Any], on_late: Optional[LateResults] = None) -> List[Flight]:
         """
         Search for flights based on the given parameters.
-        For now, this returns mock data. Replace with actual API calls.
+        Results are cached per route, date, cabin class and passenger count,
+        and identical concurrent searches share one provider call.
+        on_late is called if providers are still running when the search
+        returns (only for the search that actually queried them).
         """
-        # Mock data generation for demonstration
-        # In production, replace this with actual API calls
+        if self.cache is None:
+            return await self._fetch_flights(search_params, on_late=on_late)
         
-        airlines = ["Air India", "IndiGo", "SpiceJet", "Vistara", "GoAir"]
-        mock_flights = []
-        
-        base_price = 3000 if search_params.get('cabin_class') == 'economy' else 8000
+        key = flight_cache_key(search_params)
+        return await self.cache.get_or_fetch(
+            key,
+            lambda: self._fetch_flights(search_params, key, on_late)
+        )
+    
+    async def _fetch_flights(self, search_params: Dict[str, Any], cache_key=None, on_late: Optional[LateResults] = None) -> List[Flight]:
+        """
+        Query every provider concurrently and return once
+        settings.flight_search_quorum of them answered or the deadline hit.
+        Providers still running keep going in the background; their results
+        are merged into the cached entry and sent to on_late as they arrive.
+        """
+        tasks = {asyncio.create_task(self._search_provider(p, search_params)): p for p in self.providers}
+        quorum = min(settings.flight_search_quorum, len(tasks))
+        deadline = time.monotonic() + settings.flight_search_deadline
         
-        for i in range(10):
-            flight = Flight(
-                flight_id=f"FL{random.randint(1000, 9999)}",
-                airline=random.choice(airlines),
-                flight_number=f"{random.choice(['6E', 'AI', 'SG', 'UK', 'G8'])}{random.randint(100, 999)}",
-                departure_time=self._generate_time(search_params['departure_date'], i),
-                arrival_time=self._generate_time(search_params['departure_date'], i, hours_offset=random.randint(2, 8)),
-                duration=f"{random.randint(2, 8)}h {random.randint(0, 59)}m",
-                price=round(base_price + random.uniform(-1000, 3000), 2),
-                currency="INR",
-                stops=random.choice([0, 1, 2]),
-                origin=search_params['origin'],
-                destination=search_params['destination'],
-                cabin_class=search_params.get('cabin_class', 'economy')
-            )
-            mock_flights.append(flight)
+        batches: List[List[Flight]] = []
+        errors: List[Exception] = []
+        pending = set(tasks)
+        while pending and len(batches) < quorum:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    errors.append(task.exception())
+                else:
+                    batches.append(task.result())
         
-        # Sort by price
-        mock_flights.sort(key=lambda x: x.price)
+        if pending:
+            updates: Optional[asyncio.Queue] = None
+            if on_late is not None:
+                updates = asyncio.Queue()
+                on_late(updates)
+            late = asyncio.create_task(self._collect_late(pending, batches, cache_key, updates))
+            self._late_tasks.add(late)
+            late.add_done_callback(self._late_tasks.discard)
+        elif not batches and errors:
+            # Every provider failed
+            raise errors[0]
         
-        return mock_flights
+        return merge_flights(*batches)
     
-    def _generate_time(self, date_str: str, offset: int, hours_offset: int = 0) -> str:
-        """Generate a time string for mock data"""
-        base_hour = 6 + offset
-        hour = (base_hour + hours_offset) % 24
-        minute = random.randint(0, 59)
-        return f"{date_str}T{hour:02d}:{minute:02d}:00"
+    async def _search_provider(self, provider: FlightProvider, search_params: Dict[str, Any]) -> List[Flight]:
+        flights = await provider.search(search_params)
+        return [flight.copy(update={"flight_id": offer_id(provider, flight.flight_id)}) for flight in flights]
+    
+    async def _collect_late(self, pending: set, batches: List[List[Flight]], cache_key, updates: Optional[asyncio.Queue] = None):
+        """Fold results from providers that missed the deadline into the cache and any listener"""
+        results = list(batches)
+        try:
+            for task in asyncio.as_completed(pending):
+                try:
+                    results.append(await task)
+                except Exception as e:
+                    print(f"Flight provider failed after deadline: {e}")
+                    continue
+                if updates is not None:
+                    updates.put_nowait(merge_flights(*results))
+            if cache_key is not None and self.cache is not None:
+                self.cache.merge_late(cache_key, merge_flights(*results))
+        finally:
+            if updates is not None:
+                updates.put_nowait(None)
     
     async def get_flight_details(self, flight_id: str) -> Dict[str, Any]:
         """
@@ -66,14 +133,14 @@ class FlightAPI:
             "amenities": ["In-flight meals", "Entertainment", "WiFi"]
         }
     
+    @timed("flight_api.book_flight")
     async def book_flight(self, flight_id: str, passenger_details: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Book a flight (mock implementation)
+        Book a flight with the provider that offered it
         """
-        # In production, this would make actual booking API calls
-        return {
-            "booking_id": f"BK{random.randint(10000, 99999)}",
-            "confirmation_code": f"{''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=6))}",
-            "status": "confirmed",
-            "message": "Booking successful! Confirmation email sent."
-        }
\ No newline at end of file
+        name, _, provider_flight_id = flight_id.partition(":")
+        provider = next((p for p in self.providers if p.name == name), None) if provider_flight_id else None
+        if provider is None:
+            # Unprefixed ids (e.g. from before ids carried the provider)
+            provider, provider_flight_id = self.providers[0], flight_id
+        return await provider.book(provider_flight_id, passenger_details)
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple, Callable, Awaitable, Optional
+from app.config import get_settings
+import asyncio
+import time
+
+settings = get_settings()
+
+FlightCacheKey = Tuple[str, str, str, str, int]
+
+def flight_cache_key(search_params: Dict[str, Any]) -> FlightCacheKey:
+    """(origin, destination, departure_date, cabin_class, passengers)"""
+    return (
+        str(search_params.get('origin', '')).strip().lower(),
+        str(search_params.get('destination', '')).strip().lower(),
+        str(search_params.get('departure_date', '')).strip(),
+        str(search_params.get('cabin_class') or 'economy').strip().lower(),
+        int(search_params.get('passengers') or 1),
+    )
+
+class FlightSearchCache:
+    """
+    Flight search results keyed by route and date.
+
+    - Fresh entries (younger than ttl) are returned directly.
+    - Stale entries (up to ttl + stale_ttl) are returned immediately while
+      one background refresh runs.
+    - Concurrent misses for the same key share a single upstream call.
+    """
+    def __init__(self, ttl: float = 300, stale_ttl: float = 600, max_entries: int = 1000):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[FlightCacheKey, Tuple[List[Any], float]]" = OrderedDict()
+        self._in_flight: Dict[FlightCacheKey, asyncio.Task] = {}
+        self._refreshes: set = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_fetch(self, key: FlightCacheKey, fetch: Callable[[], Awaitable[List[Any]]]) -> List[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            flights, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(flights)
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._in_flight:
+                    task = asyncio.create_task(self._fetch(key, fetch))
+                    self._refreshes.add(task)
+                    task.add_done_callback(self._refresh_done)
+                return list(flights)
+
+        self.misses += 1
+        return list(await self._fetch(key, fetch))
+
+    async def _fetch(self, key: FlightCacheKey, fetch: Callable[[], Awaitable[List[Any]]]) -> List[Any]:
+        """
+        Run the upstream call, sharing it with any identical call already in flight.
+        The call runs in its own task, so a caller that is cancelled (e.g. a
+        disconnected stream) only stops waiting; the others still get the result.
+        """
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+        else:
+            in_flight = asyncio.create_task(self._fetch_and_store(key, fetch))
+            self._in_flight[key] = in_flight
+            in_flight.add_done_callback(lambda task: self._fetch_done(key, task))
+        return await asyncio.shield(in_flight)
+
+    async def _fetch_and_store(self, key: FlightCacheKey, fetch: Callable[[], Awaitable[List[Any]]]) -> List[Any]:
+        flights = await fetch()
+        self._store(key, flights)
+        return flights
+
+    def _fetch_done(self, key: FlightCacheKey, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Nobody may be waiting any more; mark the exception as retrieved
+        if not task.cancelled():
+            task.exception()
+
+    def merge_late(self, key: FlightCacheKey, flights: List[Any]):
+        """Replace an entry with a fuller result set without extending its freshness"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries[key] = (list(flights), entry[1])
+
+    def _refresh_done(self, task: asyncio.Task):
+        self._refreshes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Background flight cache refresh failed: {task.exception()}")
+
+    def _store(self, key: FlightCacheKey, flights: List[Any]):
+        self._entries[key] = (list(flights), time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced
+        }
+
+@lru_cache()
+def get_flight_cache() -> Optional[FlightSearchCache]:
+    """Shared flight search cache, None when settings.flight_cache_ttl is 0"""
+    if settings.flight_cache_ttl <= 0:
+        return None
+    return FlightSearchCache(settings.flight_cache_ttl, settings.flight_cache_stale_ttl, settings.flight_cache_max_entries)
@@ -0,0 +1,137 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+import random
+from app.config import get_settings
+from app.models import Flight
+from app.services.http_client import get_provider_http_client
+from app.services.simulation import MockBehavior
+
+settings = get_settings()
+
+class FlightProvider(ABC):
+    """Adapter for one flight supplier"""
+    name = "provider"
+    
+    @abstractmethod
+    async def search(self, search_params: Dict[str, Any]) -> List[Flight]:
+        """Flights matching the search, sorted by price"""
+    
+    @abstractmethod
+    async def book(self, flight_id: str, passenger_details: Dict[str, Any]) -> Dict[str, Any]:
+        """Book one of this supplier's flights by its own flight_id"""
+
+class MockFlightProvider(FlightProvider):
+    """
+    Local provider generating mock data for demonstration.
+    With a seed, results depend only on the search params, so load tests
+    and cache checks are reproducible.
+    """
+    name = "mock"
+    
+    def __init__(self, behavior: Optional[MockBehavior] = None):
+        self.behavior = behavior or MockBehavior()
+    
+    async def search(self, search_params: Dict[str, Any]) -> List[Flight]:
+        random = self.behavior.rng(
+            "flights",
+            search_params.get('origin'),
+            search_params.get('destination'),
+            search_params.get('departure_date'),
+            search_params.get('cabin_class'),
+            search_params.get('passengers')
+        )
+        await self.behavior.simulate("flight search")
+        
+        airlines = ["Air India", "IndiGo", "SpiceJet", "Vistara", "GoAir"]
+        mock_flights = []
+        
+        base_price = 3000 if search_params.get('cabin_class') == 'economy' else 8000
+        
+        for i in range(10):
+            flight = Flight(
+                flight_id=f"FL{random.randint(1000, 9999)}",
+                airline=random.choice(airlines),
+                flight_number=f"{random.choice(['6E', 'AI', 'SG', 'UK', 'G8'])}{random.randint(100, 999)}",
+                departure_time=self._generate_time(random, search_params['departure_date'], i),
+                arrival_time=self._generate_time(random, search_params['departure_date'], i, hours_offset=random.randint(2, 8)),
+                duration=f"{random.randint(2, 8)}h {random.randint(0, 59)}m",
+                price=round(base_price + random.uniform(-1000, 3000), 2),
+                currency="INR",
+                stops=random.choice([0, 1, 2]),
+                origin=search_params['origin'],
+                destination=search_params['destination'],
+                cabin_class=search_params.get('cabin_class', 'economy')
+            )
+            mock_flights.append(flight)
+        
+        # Sort by price
+        mock_flights.sort(key=lambda x: x.price)
+        
+        return mock_flights
+    
+    def _generate_time(self, random: random.Random, date_str: str, offset: int, hours_offset: int = 0) -> str:
+        """Generate a time string for mock data"""
+        base_hour = 6 + offset
+        hour = (base_hour + hours_offset) % 24
+        minute = random.randint(0, 59)
+        return f"{date_str}T{hour:02d}:{minute:02d}:00"
+    
+    async def book(self, flight_id: str, passenger_details: Dict[str, Any]) -> Dict[str, Any]:
+        await self.behavior.simulate("flight booking")
+        booking_id = self.behavior.unique_id("BK")
+        random = self.behavior.rng("flight_booking", flight_id, booking_id)
+        
+        return {
+            "booking_id": booking_id,
+            "confirmation_code": f"{''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=6))}",
+            "status": "confirmed",
+            "message": "Booking successful! Confirmation email sent."
+        }
+
+class HTTPFlightProvider(FlightProvider):
+    """Real supplier reached through the shared pooled, retrying client"""
+    def __init__(self, name: str, base_url: str):
+        self.name = name
+        self.base_url = base_url
+    
+    async def search(self, search_params: Dict[str, Any]) -> List[Flight]:
+        response = await get_provider_http_client(self.base_url).get("/search", params={
+            "origin": search_params['origin'],
+            "destination": search_params['destination'],
+            "departure_date": search_params['departure_date'],
+            "return_date": search_params.get('return_date') or "",
+            "passengers": search_params.get('passengers', 1),
+            "cabin_class": search_params.get('cabin_class', 'economy')
+        })
+        flights = [Flight(**f) for f in response.json().get('flights', [])]
+        flights.sort(key=lambda x: x.price)
+        return flights
+    
+    async def book(self, flight_id: str, passenger_details: Dict[str, Any]) -> Dict[str, Any]:
+        # Not idempotent - only retried if the connection failed before sending
+        response = await get_provider_http_client(self.base_url).post("/bookings", json={
+            "flight_id": flight_id,
+            "passenger": passenger_details
+        })
+        return response.json()
+
+def build_providers(spec: str) -> List[FlightProvider]:
+    """
+    Build provider adapters from a comma separated spec:
+    "mock" for local mock data, "live" for settings.flight_api_url,
+    or "name=https://..." for any other supplier.
+    """
+    providers: List[FlightProvider] = []
+    for entry in (part.strip() for part in spec.split(",")):
+        if not entry:
+            continue
+        if entry == "mock":
+            providers.append(MockFlightProvider())
+        elif entry == "live":
+            providers.append(HTTPFlightProvider("live", settings.flight_api_url))
+        elif "=" in entry:
+            name, url = entry.split("=", 1)
+            providers.append(HTTPFlightProvider(name.strip(), url.strip()))
+        else:
+            raise ValueError(f"Unknown flight provider: {entry}")
+    return providers or [MockFlightProvider()]
@@ -1,49 +1,17 @@
-import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+from app.metrics import timed
+from app.services.hotel_catalog import get_hotel_catalog
+from app.services.simulation import MockBehavior
 
 class HotelAPI:
-    def __init__(self):
-        self.hotels_database = {
-            "goa": [
-                {"name": "Taj Exotica", "category": "luxury", "base_price": 8000, "rating": 4.8, "amenities": ["Pool", "Spa", "Beach Access", "Restaurant"]},
-                {"name": "The Leela Goa", "category": "luxury", "base_price": 7500, "rating": 4.7, "amenities": ["Golf Course", "Spa", "Beach Access", "Multiple Restaurants"]},
-                {"name": "Alila Diwa", "category": "premium", "base_price": 5500, "rating": 4.6, "amenities": ["Pool", "Spa", "Gym", "Restaurant"]},
-                {"name": "Novotel Goa", "category": "premium", "base_price": 4500, "rating": 4.4, "amenities": ["Pool", "Beach Access", "Restaurant", "Bar"]},
-                {"name": "Fortune Miramar", "category": "mid-range", "base_price": 3000, "rating": 4.2, "amenities": ["Pool", "Restaurant", "Room Service"]},
-                {"name": "Ginger Goa", "category": "budget", "base_price": 2000, "rating": 3.9, "amenities": ["WiFi", "Restaurant", "Parking"]},
-                {"name": "FabHotel Palm Grove", "category": "budget", "base_price": 1500, "rating": 3.8, "amenities": ["WiFi", "AC", "Room Service"]},
-            ],
-            "mumbai": [
-                {"name": "The Taj Mahal Palace", "category": "luxury", "base_price": 12000, "rating": 4.9, "amenities": ["Pool", "Spa", "Multiple Restaurants", "Sea View"]},
-                {"name": "The Oberoi Mumbai", "category": "luxury", "base_price": 11000, "rating": 4.8, "amenities": ["Pool", "Spa", "Fine Dining", "Business Center"]},
-                {"name": "JW Marriott Mumbai", "category": "premium", "base_price": 7000, "rating": 4.6, "amenities": ["Pool", "Gym", "Restaurant", "Bar"]},
-                {"name": "Novotel Mumbai", "category": "mid-range", "base_price": 4500, "rating": 4.3, "amenities": ["Restaurant", "Gym", "Business Center"]},
-                {"name": "Treebo Trend", "category": "budget", "base_price": 2500, "rating": 4.0, "amenities": ["WiFi", "AC", "Breakfast"]},
-            ],
-            "delhi": [
-                {"name": "The Imperial", "category": "luxury", "base_price": 10000, "rating": 4.8, "amenities": ["Pool", "Spa", "Fine Dining", "Heritage Property"]},
-                {"name": "ITC Maurya", "category": "luxury", "base_price": 9500, "rating": 4.7, "amenities": ["Multiple Restaurants", "Spa", "Business Center"]},
-                {"name": "Radisson Blu", "category": "premium", "base_price": 6000, "rating": 4.5, "amenities": ["Pool", "Restaurant", "Gym"]},
-                {"name": "Lemon Tree Premier", "category": "mid-range", "base_price": 3500, "rating": 4.2, "amenities": ["Restaurant", "WiFi", "Room Service"]},
-                {"name": "OYO Flagship", "category": "budget", "base_price": 1800, "rating": 3.9, "amenities": ["WiFi", "AC", "TV"]},
-            ],
-            "bangalore": [
-                {"name": "The Leela Palace", "category": "luxury", "base_price": 9000, "rating": 4.8, "amenities": ["Pool", "Spa", "Fine Dining", "Butler Service"]},
-                {"name": "Taj West End", "category": "luxury", "base_price": 8500, "rating": 4.7, "amenities": ["Heritage Property", "Garden", "Spa", "Restaurant"]},
-                {"name": "Marriott Whitefield", "category": "premium", "base_price": 5500, "rating": 4.5, "amenities": ["Pool", "Gym", "Restaurant", "Business Center"]},
-                {"name": "Ramada Bangalore", "category": "mid-range", "base_price": 3200, "rating": 4.1, "amenities": ["Restaurant", "Gym", "WiFi"]},
-                {"name": "Zostel Bangalore", "category": "budget", "base_price": 1200, "rating": 4.0, "amenities": ["Hostel", "Common Area", "WiFi"]},
-            ],
-            "jaipur": [
-                {"name": "Rambagh Palace", "category": "luxury", "base_price": 15000, "rating": 4.9, "amenities": ["Palace Hotel", "Pool", "Spa", "Heritage Dining"]},
-                {"name": "Fairmont Jaipur", "category": "luxury", "base_price": 10000, "rating": 4.7, "amenities": ["Pool", "Spa", "Multiple Restaurants", "Golf"]},
-                {"name": "Hilton Jaipur", "category": "premium", "base_price": 6000, "rating": 4.5, "amenities": ["Pool", "Restaurant", "Rooftop Bar"]},
-                {"name": "Hotel Clarks Amer", "category": "mid-range", "base_price": 3500, "rating": 4.2, "amenities": ["Pool", "Restaurant", "Cultural Shows"]},
-                {"name": "Moustache Hostel", "category": "budget", "base_price": 1500, "rating": 4.0, "amenities": ["Hostel", "Rooftop", "Common Kitchen"]},
-            ],
-        }
+    def __init__(self, behavior: Optional[MockBehavior] = None):
+        # Loaded and indexed once per process, shared by every HotelAPI
+        self.catalog = get_hotel_catalog()
+        # Seed, latency and failure injection for the mock results
+        self.behavior = behavior or MockBehavior()
     
+    @timed("hotel_api.search_hotels")
     async def search_hotels(self, search_params: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Search for hotels based on destination, budget, and preferences
@@ -51,27 +19,45 @@ class HotelAPI:
         destination = search_params.get('destination', '').lower()
         budget_per_night = search_params.get('budget_per_night', 5000)
         interests = search_params.get('interests', [])
+        category = search_params.get('category')
+        amenities = search_params.get('amenities', [])
         check_in = search_params.get('check_in')
         check_out = search_params.get('check_out')
         
+        random = self.behavior.rng(
+            "hotels", destination, budget_per_night, sorted(interests),
+            category, sorted(amenities), check_in, check_out
+        )
+        await self.behavior.simulate("hotel search")
+        
         # Get hotels for destination
-        hotels = self.hotels_database.get(destination, self.hotels_database.get('goa', []))
+        index = self.catalog.get(destination)
+        if index is None:
+            return []
         
-        # Filter by budget
-        filtered_hotels = [h for h in hotels if h['base_price'] <= budget_per_night * 1.2]
-        
-        # If no hotels in budget, return cheapest options
-        if not filtered_hotels:
-            filtered_hotels = sorted(hotels, key=lambda x: x['base_price'])[:3]
+        # Optional category / amenity filters from the lookup indexes
+        allowed = None
+        if category:
+            allowed = set(index.category_rows(category))
+        for amenity in amenities:
+            matching = set(index.amenity_rows(amenity))
+            allowed = matching if allowed is None else allowed & matching
         
         # Prioritize based on interests
         if 'luxury' in interests or 'relaxation' in interests:
-            filtered_hotels = sorted(filtered_hotels, key=lambda x: x['rating'], reverse=True)
+            ordering = 'rating'
         elif 'budget' in interests or 'backpacking' in interests:
-            filtered_hotels = sorted(filtered_hotels, key=lambda x: x['base_price'])
+            ordering = 'price'
         else:
             # Balance of price and rating
-            filtered_hotels = sorted(filtered_hotels, key=lambda x: (x['rating'] * 100 - x['base_price']), reverse=True)
+            ordering = 'value'
+        
+        # Filter by budget
+        filtered_hotels = index.top(ordering, budget_per_night * 1.2, 6, allowed)
+        
+        # If no hotels in budget, return cheapest options
+        if not filtered_hotels:
+            filtered_hotels = index.cheapest(3, ordering)
         
         # Generate hotel results with mock data
         results = []
@@ -118,12 +104,17 @@ class HotelAPI:
             }
         }
     
+    @timed("hotel_api.book_hotel")
     async def book_hotel(self, hotel_id: str, booking_details: Dict[str, Any]) -> Dict[str, Any]:
         """
         Book a hotel (mock implementation)
         """
+        await self.behavior.simulate("hotel booking")
+        booking_id = self.behavior.unique_id("HB")
+        random = self.behavior.rng("hotel_booking", hotel_id, booking_id)
+        
         return {
-            "booking_id": f"HB{random.randint(10000, 99999)}",
+            "booking_id": booking_id,
             "confirmation_code": f"{''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=8))}",
             "status": "confirmed",
             "message": "Hotel booking successful! Confirmation email sent.",
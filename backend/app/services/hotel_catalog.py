@@ -0,0 +1,201 @@
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+import heapq
+from typing import Dict, Any, List, Iterable, Optional, Sequence
+from app.config import get_settings
+import csv
+import json
+import os
+
+settings = get_settings()
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "hotels.json")
+
+# Common alternate names in supplier feeds
+DESTINATION_ALIASES = {
+    "bengaluru": "bangalore",
+    "bombay": "mumbai",
+    "new delhi": "delhi",
+    "panaji": "goa",
+    "north goa": "goa",
+    "south goa": "goa",
+}
+
+def normalize_destination(destination: str) -> str:
+    name = " ".join((destination or "").lower().split())
+    return DESTINATION_ALIASES.get(name, name)
+
+def value_score(price: float, rating: float) -> float:
+    """Balance of price and rating used for the default ordering"""
+    return rating * 100 - price
+
+class DestinationIndex(ABC):
+    """
+    Precomputed orderings for one destination.
+    Hotels are addressed by position in price order; subclasses provide
+    the prices array, the rating/value orderings and hotel(pos).
+    """
+    prices: Sequence[float]
+    rating_order: Sequence[int]
+    value_order: Sequence[int]
+    _ranks: Optional[Dict[str, Sequence[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @abstractmethod
+    def hotel(self, pos: int) -> Dict[str, Any]:
+        """Hotel at a position in price order"""
+
+    @abstractmethod
+    def category_rows(self, category: str) -> List[int]:
+        """Positions of the hotels in a category"""
+
+    @abstractmethod
+    def amenity_rows(self, amenity: str) -> List[int]:
+        """Positions of the hotels with an amenity"""
+
+    def count_within(self, max_price: float) -> int:
+        """Number of hotels priced at or below max_price"""
+        return bisect_right(self.prices, max_price)
+
+    def rank(self, ordering: str) -> Sequence[int]:
+        """Place of each position in the rating or value ordering, built on first use"""
+        if self._ranks is None:
+            self._ranks = {}
+        ranks = self._ranks
+        if ordering not in ranks:
+            order = self.rating_order if ordering == "rating" else self.value_order
+            rank = array("I", bytes(4 * len(order)))
+            for place, pos in enumerate(order):
+                rank[pos] = place
+            ranks[ordering] = rank
+        return ranks[ordering]
+
+    def _first(self, ordering: str, candidates: Iterable[int], limit: int) -> List[int]:
+        """The `limit` candidates that come first in an ordering"""
+        if ordering == "price":
+            return heapq.nsmallest(limit, candidates)
+        return heapq.nsmallest(limit, candidates, key=self.rank(ordering).__getitem__)
+
+    def cheapest(self, limit: int, ordering: str = "price") -> List[Dict[str, Any]]:
+        """The `limit` cheapest hotels, presented in the given ordering"""
+        return [self.hotel(pos) for pos in self._first(ordering, range(min(limit, len(self))), limit)]
+
+    def top(self, ordering: str, max_price: float, limit: int, allowed: Optional[set] = None) -> List[Dict[str, Any]]:
+        """
+        First `limit` hotels in a precomputed ordering ("price", "rating" or "value")
+        that are within max_price and, if given, in the allowed set of positions.
+        """
+        # Positions are in price order, so the budget filter is the prefix [0, within)
+        within = self.count_within(max_price)
+        if allowed is not None:
+            positions = self._first(ordering, (pos for pos in allowed if pos < within), limit)
+        elif ordering == "price":
+            positions = list(range(min(limit, within)))
+        elif within * within <= limit * len(self):
+            # Few hotels in budget: rank the prefix instead of walking an
+            # ordering that is mostly hotels over budget
+            positions = self._first(ordering, range(within), limit)
+        else:
+            # Most hotels in budget: the walk finds `limit` of them early
+            order = self.rating_order if ordering == "rating" else self.value_order
+            positions = []
+            for pos in order:
+                if pos < within:
+                    positions.append(pos)
+                    if len(positions) >= limit:
+                        break
+        return [self.hotel(pos) for pos in positions]
+
+class InMemoryDestinationIndex(DestinationIndex):
+    """Index over a list of hotel dicts"""
+    def __init__(self, hotels: List[Dict[str, Any]]):
+        self.hotels = sorted(hotels, key=lambda h: h['base_price'])
+        self.prices = [h['base_price'] for h in self.hotels]
+        positions = range(len(self.hotels))
+        self.rating_order = sorted(positions, key=lambda p: self.hotels[p]['rating'], reverse=True)
+        self.value_order = sorted(
+            positions,
+            key=lambda p: value_score(self.hotels[p]['base_price'], self.hotels[p]['rating']),
+            reverse=True
+        )
+
+        self.by_category: Dict[str, List[int]] = {}
+        self.by_amenity: Dict[str, List[int]] = {}
+        for pos, hotel in enumerate(self.hotels):
+            self.by_category.setdefault(hotel['category'].lower(), []).append(pos)
+            for amenity in hotel['amenities']:
+                self.by_amenity.setdefault(amenity.lower(), []).append(pos)
+
+    def hotel(self, pos: int) -> Dict[str, Any]:
+        return self.hotels[pos]
+
+    def category_rows(self, category: str) -> List[int]:
+        return self.by_category.get(category.lower(), [])
+
+    def amenity_rows(self, amenity: str) -> List[int]:
+        return self.by_amenity.get(amenity.lower(), [])
+
+class HotelCatalog:
+    """
+    Hotel inventory loaded once per process, indexed by destination.
+    Budget filters are bisect lookups on price-sorted arrays, so search
+    cost doesn't grow with the size of the catalog.
+    """
+    def __init__(self, destinations: Dict[str, DestinationIndex], default_destination: str = "goa"):
+        self.destinations = destinations
+        self.default_destination = default_destination
+
+    @classmethod
+    def from_hotels(cls, hotels: Iterable[Dict[str, Any]]) -> "HotelCatalog":
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for hotel in hotels:
+            grouped.setdefault(normalize_destination(hotel['destination']), []).append(hotel)
+        return cls({name: InMemoryDestinationIndex(items) for name, items in grouped.items()})
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self.destinations.values())
+
+    def get(self, destination: str) -> Optional[DestinationIndex]:
+        """Index for a destination, falling back to the default destination"""
+        index = self.destinations.get(normalize_destination(destination))
+        if index is None:
+            index = self.destinations.get(self.default_destination)
+        return index
+
+def _read_json(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _read_csv(path: str) -> List[Dict[str, Any]]:
+    """CSV columns: destination,name,category,base_price,rating,amenities (amenities split on |)"""
+    hotels = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            hotels.append({
+                "destination": row['destination'],
+                "name": row['name'],
+                "category": row['category'],
+                "base_price": float(row['base_price']),
+                "rating": float(row['rating']),
+                "amenities": [a.strip() for a in row.get('amenities', '').split('|') if a.strip()],
+            })
+    return hotels
+
+def load_catalog(path: str) -> HotelCatalog:
+    """Load a catalog from a .snap snapshot, or a .json / .csv file"""
+    lowered = path.lower()
+    if lowered.endswith(".snap"):
+        from app.services.hotel_snapshot import load_snapshot
+        return load_snapshot(path)
+    if lowered.endswith(".csv"):
+        return HotelCatalog.from_hotels(_read_csv(path))
+    return HotelCatalog.from_hotels(_read_json(path))
+
+@lru_cache()
+def get_hotel_catalog() -> HotelCatalog:
+    """Shared catalog from settings.hotel_catalog_path, or the bundled sample data"""
+    return load_catalog(settings.hotel_catalog_path or DEFAULT_CATALOG_PATH)
@@ -0,0 +1,335 @@
+"""
+Compact columnar snapshot of the hotel catalog.
+
+Layout: an 8 byte magic, a little JSON header (length-prefixed) describing
+the columns, then each column as a raw array aligned to 8 bytes. Rows are
+grouped by destination and sorted by price inside each group. The file is
+memory-mapped read-only, so several worker processes share the same pages
+and startup doesn't parse the catalog at all.
+"""
+from array import array
+from typing import Dict, Any, List, Iterator, Optional, Tuple
+from app.services.hotel_catalog import (
+    HotelCatalog, DestinationIndex, normalize_destination, value_score
+)
+import csv
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+MAGIC = b"TSHOTEL1"
+
+# column name -> array typecode
+COLUMNS = {
+    "price": "d",
+    "rating": "f",
+    "category": "H",
+    "name_offset": "I",
+    "name_length": "H",
+    "amenity_offset": "I",
+    "amenity_count": "H",
+    "rating_order": "I",
+    "value_order": "I",
+    "names": "B",
+    "amenity_ids": "H",
+}
+
+# Reading feeds
+
+def _iter_feed(path: str, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield chunks of raw rows from a CSV or JSONL feed"""
+    chunk: List[Dict[str, Any]] = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows: Iterator[Dict[str, Any]] = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def _amenity_list(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(a).strip() for a in value if str(a).strip()]
+    return [a.strip() for a in (value or "").split("|") if a.strip()]
+
+class _DestinationBuffer:
+    """Compact column buffers for one destination, read back from its spill file"""
+    def __init__(self):
+        self.price = array("d")
+        self.rating = array("f")
+        self.category = array("H")
+        self.names: List[bytes] = []
+        self.amenities: List[array] = []
+
+# Spilled row: price, rating, category, name length, amenity count,
+# followed by the name bytes and the amenity ids
+_SPILL_ROW = struct.Struct("<dfHHH")
+
+def _read_spill(path: str) -> _DestinationBuffer:
+    buffer = _DestinationBuffer()
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 0
+    while pos < len(data):
+        price, rating, category, name_length, amenity_count = _SPILL_ROW.unpack_from(data, pos)
+        pos += _SPILL_ROW.size
+        buffer.price.append(price)
+        buffer.rating.append(rating)
+        buffer.category.append(category)
+        buffer.names.append(data[pos:pos + name_length])
+        pos += name_length
+        amenities = array("H")
+        amenities.frombytes(data[pos:pos + 2 * amenity_count])
+        buffer.amenities.append(amenities)
+        pos += 2 * amenity_count
+    return buffer
+
+class SnapshotBuilder:
+    """
+    Streams rows in and writes the snapshot file. Each chunk is appended to
+    per-destination spill files as it's added, and write() assembles the
+    columns one destination at a time, so memory holds a chunk while reading
+    and a destination while writing rather than the whole feed.
+    """
+    def __init__(self, workdir: Optional[str] = None):
+        self._spill_dir = tempfile.TemporaryDirectory(prefix="hotel-snapshot-", dir=workdir)
+        self.spills: Dict[str, str] = {}
+        self.categories: Dict[str, int] = {}
+        self.amenities: Dict[str, int] = {}
+        self.skipped = 0
+
+    def _intern(self, table: Dict[str, int], value: str) -> int:
+        if value not in table:
+            table[value] = len(table)
+        return table[value]
+
+    def _encode(self, row: Dict[str, Any]) -> Optional[Tuple[str, bytes]]:
+        try:
+            destination = normalize_destination(row['destination'])
+            price = float(row['base_price'])
+            rating = float(row['rating'])
+            name = str(row['name']).strip()
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not destination or not name:
+            return None
+
+        name_bytes = name.encode("utf-8")[:65535]
+        category = self._intern(self.categories, str(row.get('category', '')).strip().lower())
+        amenities = array("H", (self._intern(self.amenities, a) for a in _amenity_list(row.get('amenities'))))
+        record = _SPILL_ROW.pack(price, rating, category, len(name_bytes), len(amenities))
+        return destination, record + name_bytes + amenities.tobytes()
+
+    def add_chunk(self, rows: List[Dict[str, Any]]):
+        """Encode a chunk of feed rows and append them to their destinations' spill files"""
+        grouped: Dict[str, bytearray] = {}
+        for row in rows:
+            encoded = self._encode(row)
+            if encoded is None:
+                self.skipped += 1
+                continue
+            destination, record = encoded
+            grouped.setdefault(destination, bytearray()).extend(record)
+
+        for destination, records in grouped.items():
+            if destination not in self.spills:
+                self.spills[destination] = os.path.join(self._spill_dir.name, f"{len(self.spills)}.rows")
+            with open(self.spills[destination], "ab") as f:
+                f.write(records)
+
+    def write(self, path: str) -> int:
+        """Write the snapshot atomically. Returns the number of hotels written"""
+        # Each column is streamed to its own file, then copied into place
+        column_files = {
+            name: open(os.path.join(self._spill_dir.name, f"{name}.col"), "w+b")
+            for name in COLUMNS
+        }
+        lengths = dict.fromkeys(COLUMNS, 0)
+        destinations: Dict[str, List[int]] = {}
+
+        try:
+            for destination in sorted(self.spills):
+                buffer = _read_spill(self.spills[destination])
+                columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+                start = lengths["price"]
+                order = sorted(range(len(buffer.price)), key=lambda i: buffer.price[i])
+
+                for i in order:
+                    columns["price"].append(buffer.price[i])
+                    columns["rating"].append(buffer.rating[i])
+                    columns["category"].append(buffer.category[i])
+                    columns["name_offset"].append(lengths["names"] + len(columns["names"]))
+                    columns["name_length"].append(len(buffer.names[i]))
+                    columns["names"].frombytes(buffer.names[i])
+                    columns["amenity_offset"].append(lengths["amenity_ids"] + len(columns["amenity_ids"]))
+                    columns["amenity_count"].append(len(buffer.amenities[i]))
+                    columns["amenity_ids"].extend(buffer.amenities[i])
+
+                # Orderings are positions relative to the destination's first row
+                positions = range(len(order))
+                prices = [buffer.price[i] for i in order]
+                ratings = [buffer.rating[i] for i in order]
+                columns["rating_order"].extend(sorted(positions, key=lambda p: ratings[p], reverse=True))
+                columns["value_order"].extend(sorted(positions, key=lambda p: value_score(prices[p], ratings[p]), reverse=True))
+
+                for name, values in columns.items():
+                    values.tofile(column_files[name])
+                    lengths[name] += len(values)
+                destinations[destination] = [start, lengths["price"]]
+
+            header = {
+                "byteorder": sys.byteorder,
+                "count": lengths["price"],
+                "destinations": destinations,
+                "categories": sorted(self.categories, key=self.categories.get),
+                "amenities": sorted(self.amenities, key=self.amenities.get),
+                "columns": {},
+            }
+
+            # Column offsets depend on the header size, so lay out after encoding a draft
+            def layout(header_bytes_len: int) -> int:
+                offset = _align(len(MAGIC) + 4 + header_bytes_len)
+                for name, typecode in COLUMNS.items():
+                    size = lengths[name] * array(typecode).itemsize
+                    header["columns"][name] = [offset, lengths[name], typecode]
+                    offset = _align(offset + size)
+                return offset
+
+            header_len = 0
+            while True:
+                layout(header_len)
+                encoded = json.dumps(header).encode("utf-8")
+                if len(encoded) == header_len:
+                    break
+                header_len = len(encoded)
+
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(MAGIC)
+                f.write(struct.pack("<I", len(encoded)))
+                f.write(encoded)
+                for name, column_file in column_files.items():
+                    f.seek(header["columns"][name][0])
+                    column_file.seek(0)
+                    shutil.copyfileobj(column_file, f)
+                f.truncate(_align(f.tell()))
+            os.replace(tmp_path, path)
+        finally:
+            for column_file in column_files.values():
+                column_file.close()
+        return header["count"]
+
+    def close(self):
+        """Remove the spill files"""
+        self._spill_dir.cleanup()
+
+def _align(offset: int, to: int = 8) -> int:
+    return (offset + to - 1) // to * to
+
+def ingest(feed_paths: List[str], output_path: str, chunk_size: int = 10000) -> Dict[str, int]:
+    """
+    Stream one or more CSV/JSONL feeds into a snapshot file. Rows are spilled
+    to disk a chunk at a time, so chunk_size bounds the rows held in memory.
+    """
+    builder = SnapshotBuilder(workdir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        for feed_path in feed_paths:
+            for chunk in _iter_feed(feed_path, chunk_size):
+                builder.add_chunk(chunk)
+        written = builder.write(output_path)
+        return {"hotels": written, "destinations": len(builder.spills), "skipped": builder.skipped}
+    finally:
+        builder.close()
+
+# Reading snapshots
+
+class SnapshotDestinationIndex(DestinationIndex):
+    """Destination view over memory-mapped columns; hotels are decoded on demand"""
+    def __init__(self, snapshot: "HotelSnapshot", destination: str, start: int, end: int):
+        self.snapshot = snapshot
+        self.destination = destination
+        self.start = start
+        cols = snapshot.columns
+        self.prices = cols["price"][start:end]
+        self.rating_order = cols["rating_order"][start:end]
+        self.value_order = cols["value_order"][start:end]
+        self._by_category: Optional[Dict[str, List[int]]] = None
+        self._by_amenity: Optional[Dict[str, List[int]]] = None
+
+    def hotel(self, pos: int) -> Dict[str, Any]:
+        cols = self.snapshot.columns
+        row = self.start + pos
+        name_start = cols["name_offset"][row]
+        amenity_start = cols["amenity_offset"][row]
+        amenity_ids = cols["amenity_ids"][amenity_start:amenity_start + cols["amenity_count"][row]]
+        return {
+            "destination": self.destination,
+            "name": bytes(cols["names"][name_start:name_start + cols["name_length"][row]]).decode("utf-8"),
+            "category": self.snapshot.categories[cols["category"][row]],
+            "base_price": cols["price"][row],
+            "rating": round(cols["rating"][row], 2),
+            "amenities": [self.snapshot.amenities[a] for a in amenity_ids],
+        }
+
+    def _build_lookups(self):
+        # Built the first time a destination is filtered by category or amenity
+        cols = self.snapshot.columns
+        self._by_category, self._by_amenity = {}, {}
+        for pos in range(len(self)):
+            row = self.start + pos
+            self._by_category.setdefault(self.snapshot.categories[cols["category"][row]], []).append(pos)
+            amenity_start = cols["amenity_offset"][row]
+            for a in cols["amenity_ids"][amenity_start:amenity_start + cols["amenity_count"][row]]:
+                self._by_amenity.setdefault(self.snapshot.amenities[a].lower(), []).append(pos)
+
+    def category_rows(self, category: str) -> List[int]:
+        if self._by_category is None:
+            self._build_lookups()
+        return self._by_category.get(category.lower(), [])
+
+    def amenity_rows(self, amenity: str) -> List[int]:
+        if self._by_amenity is None:
+            self._build_lookups()
+        return self._by_amenity.get(amenity.lower(), [])
+
+class HotelSnapshot:
+    """Read-only memory map of a snapshot file"""
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a hotel catalog snapshot")
+
+        (header_len,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(self._mmap[header_start:header_start + header_len])
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {header['byteorder']}-endian host")
+
+        view = memoryview(self._mmap)
+        self.columns = {}
+        for name, (offset, length, typecode) in header["columns"].items():
+            size = length * array(typecode).itemsize
+            self.columns[name] = view[offset:offset + size].cast(typecode)
+        self.categories: List[str] = header["categories"]
+        self.amenities: List[str] = header["amenities"]
+        self.destinations: Dict[str, List[int]] = header["destinations"]
+
+def load_snapshot(path: str) -> HotelCatalog:
+    """Memory-map a snapshot and wrap it as a HotelCatalog"""
+    snapshot = HotelSnapshot(path)
+    catalog = HotelCatalog({
+        name: SnapshotDestinationIndex(snapshot, name, start, end)
+        for name, (start, end) in snapshot.destinations.items()
+    })
+    catalog.snapshot = snapshot  # keep the mapping alive with the catalog
+    return catalog
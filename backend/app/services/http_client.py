@@ -0,0 +1,180 @@
+from typing import Dict, Any, Optional
+from app.config import get_settings
+import asyncio
+import httpx
+import random
+import time
+
+settings = get_settings()
+
+# Status codes worth retrying - the provider may succeed on the next attempt
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider that keeps failing"""
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds, then lets one trial call through (half-open).
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """Raises CircuitOpenError if the call isn't allowed; returns True for the half-open trial call"""
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_in_flight):
+            raise CircuitOpenError("Provider circuit is open, skipping call")
+        if state == "half_open":
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def after_call(self, trial: bool):
+        """Every call ends here, so a cancelled or unexpected failure can't leave the trial slot taken"""
+        if trial:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+class ProviderHTTPClient:
+    """
+    Shared HTTP client for an upstream provider: one keep-alive pool
+    (HTTP/2 when available), timeouts, jittered exponential retries and a
+    circuit breaker around every call.
+    """
+    def __init__(
+        self,
+        base_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_connections: int = 20,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            http2=settings.flight_api_http2 and _http2_available(),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            # One client per provider host, so these are per-host limits
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60
+            )
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: random delay up to the exponential cap"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def request(self, method: str, url: str, idempotent: bool = True, **kwargs) -> httpx.Response:
+        """
+        Send a request and return the successful response.
+        Non-idempotent requests are only retried when the connection failed
+        before anything was sent.
+        """
+        attempt = 0
+        while True:
+            trial = self.breaker.before_call()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+                if response.status_code in RETRY_STATUS_CODES and idempotent and attempt < self.max_retries:
+                    self.breaker.record_failure()
+                    await asyncio.sleep(self._backoff(attempt))
+                    attempt += 1
+                    continue
+                response.raise_for_status()
+                self.breaker.record_success()
+                return response
+            except httpx.HTTPStatusError:
+                if response.status_code >= 500 or response.status_code == 429:
+                    self.breaker.record_failure()
+                else:
+                    # Client errors mean the provider is up
+                    self.breaker.record_success()
+                raise
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+            except httpx.TransportError:
+                self.breaker.record_failure()
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+            finally:
+                self.breaker.after_call(trial)
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, idempotent: bool = False, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, idempotent=idempotent, **kwargs)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+_provider_clients: Dict[str, ProviderHTTPClient] = {}
+
+def get_provider_http_client(base_url: Optional[str] = None) -> ProviderHTTPClient:
+    """Shared client per provider base URL (settings.flight_api_url by default)"""
+    base_url = base_url or settings.flight_api_url
+    client = _provider_clients.get(base_url)
+    if client is None:
+        client = ProviderHTTPClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {settings.flight_api_key}"} if settings.flight_api_key else None,
+            timeout=settings.flight_api_timeout,
+            connect_timeout=settings.flight_api_connect_timeout,
+            max_connections=settings.flight_api_max_connections,
+            max_retries=settings.flight_api_max_retries,
+            breaker=CircuitBreaker(settings.flight_api_breaker_threshold, settings.flight_api_breaker_reset)
+        )
+        _provider_clients[base_url] = client
+    return client
+
+async def close_http_clients():
+    """Close pooled provider connections. Call this when app shuts down"""
+    clients = list(_provider_clients.values())
+    _provider_clients.clear()
+    for client in clients:
+        await client.aclose()
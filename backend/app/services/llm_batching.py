@@ -0,0 +1,187 @@
+"""
+Micro-batching of independent LLM prompts.
+
+Prompts submitted close together (the steps of one request, or concurrent
+requests) are merged into one structured multi-task completion and the
+answers are split back out per task. A batch takes whatever has queued up
+by the time an LLM slot is free (plus an optional window), so a quiet server
+sends single prompts unchanged and a busy one makes fewer, larger calls.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from app.metrics import Histogram, registry
+from app.services.llm_parsing import extract_json_object
+from app.services.prompts import MULTI_TASK
+import asyncio
+import json
+
+# (messages, format, options) -> completion text
+Complete = Callable[[List[Dict[str, str]], Optional[Any], Optional[Dict[str, Any]]], Awaitable[str]]
+
+batch_size = registry.register(Histogram(
+    "tripscout_llm_batch_size", "Prompts answered per LLM completion",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16)
+))
+
+class BatchSplitError(Exception):
+    """The merged completion had no usable answer for this task"""
+
+def _resolve(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None):
+    """Settle a caller's future unless it was cancelled (e.g. the client went away)"""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+def _rename_refs(node: Any, names: Dict[str, str]) -> Any:
+    """Copy of a JSON schema with "#/$defs/<name>" refs pointing at the renamed definitions"""
+    if isinstance(node, dict):
+        renamed = {key: _rename_refs(value, names) for key, value in node.items()}
+        ref = node.get("$ref")
+        if isinstance(ref, str) and ref.startswith("#/$defs/") and ref[8:] in names:
+            renamed["$ref"] = f"#/$defs/{names[ref[8:]]}"
+        return renamed
+    if isinstance(node, list):
+        return [_rename_refs(value, names) for value in node]
+    return node
+
+class _BatchTask:
+    def __init__(self, system: Optional[str], prompt: str, schema: Optional[Dict[str, Any]]):
+        self.system = system
+        self.prompt = prompt
+        self.schema = schema
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def messages(self) -> List[Dict[str, str]]:
+        messages = [{"role": "system", "content": self.system}] if self.system else []
+        messages.append({"role": "user", "content": self.prompt})
+        return messages
+
+class LLMBatcher:
+    def __init__(self, complete: Complete, semaphore: asyncio.Semaphore, window: float = 0.0, max_tasks: int = 4, structured: bool = True):
+        self.complete = complete
+        self.semaphore = semaphore
+        self.window = window
+        self.max_tasks = max_tasks
+        self.structured = structured
+        self._pending: List[_BatchTask] = []
+        self._flusher: Optional[asyncio.Task] = None
+        # Running batches, kept so they aren't garbage collected and can be awaited on close
+        self._running: Set[asyncio.Task] = set()
+        self.completions = 0
+        self.tasks = 0
+
+    async def submit(self, prompt: str, system: Optional[str] = None, schema: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Answer one prompt, possibly together with others. schema constrains
+        the answer to a JSON object (returned as JSON text), otherwise it's
+        free text. Raises BatchSplitError if the merged answer for this
+        prompt was missing or malformed; the caller should retry it alone.
+        """
+        task = _BatchTask(system, prompt, schema)
+        self._pending.append(task)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+        return await task.future
+
+    async def _flush(self):
+        while self._pending:
+            # Yield at least once so prompts submitted in the same step join the batch
+            await asyncio.sleep(self.window)
+            # Prompts keep queueing while we wait for a free LLM slot
+            await self.semaphore.acquire()
+            # Callers that gave up while queued don't need an answer
+            self._pending = [t for t in self._pending if not t.future.done()]
+            batch, self._pending = self._pending[:self.max_tasks], self._pending[self.max_tasks:]
+            if not batch:
+                self.semaphore.release()
+                continue
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[_BatchTask]):
+        try:
+            batch_size.observe(len(batch))
+            self.completions += 1
+            self.tasks += len(batch)
+            if len(batch) == 1:
+                task = batch[0]
+                options = {"temperature": 0} if task.schema else None
+                content = await self.complete(task.messages(), task.schema, options)
+                _resolve(task.future, content)
+                return
+
+            content = await self.complete(self._merged_messages(batch), self._merged_schema(batch), {"temperature": 0})
+            answers = extract_json_object(content) or {}
+            for i, task in enumerate(batch):
+                answer = answers.get(self._task_id(i))
+                if task.schema is not None and isinstance(answer, dict):
+                    _resolve(task.future, json.dumps(answer))
+                elif task.schema is None and isinstance(answer, str) and answer.strip():
+                    _resolve(task.future, answer)
+                else:
+                    _resolve(task.future, error=BatchSplitError(f"No answer for {self._task_id(i)}"))
+        except Exception as e:
+            for task in batch:
+                _resolve(task.future, error=e)
+        finally:
+            self.semaphore.release()
+
+    def _task_id(self, index: int) -> str:
+        return f"task_{index + 1}"
+
+    def _merged_messages(self, batch: List[_BatchTask]) -> List[Dict[str, str]]:
+        sections = [
+            MULTI_TASK.render(task_id=self._task_id(i), instructions=task.system or "", input=task.prompt)
+            for i, task in enumerate(batch)
+        ]
+        return [
+            {"role": "system", "content": MULTI_TASK.system},
+            {"role": "user", "content": "\n".join(sections)}
+        ]
+
+    def _merged_schema(self, batch: List[_BatchTask]) -> Any:
+        if not self.structured:
+            return "json"
+        properties: Dict[str, Any] = {}
+        defs: Dict[str, Any] = {}
+        for i, task in enumerate(batch):
+            task_id = self._task_id(i)
+            if not task.schema:
+                properties[task_id] = {"type": "string"}
+                continue
+            # $refs point at the root, so definitions move up to the merged schema,
+            # renamed per task so two tasks' same-named models can't collide
+            names = {name: f"{task_id}__{name}" for name in task.schema.get("$defs", {})}
+            schema = _rename_refs(task.schema, names)
+            for name, definition in schema.pop("$defs", {}).items():
+                defs[names[name]] = definition
+            properties[task_id] = schema
+        merged = {"type": "object", "properties": properties, "required": list(properties)}
+        if defs:
+            merged["$defs"] = defs
+        return merged
+
+    async def close(self):
+        """Stop taking batches and wait for the ones in flight. Call this when app shuts down"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        for task in self._pending:
+            task.future.cancel()
+        self._pending = []
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "completions": self.completions,
+            "tasks": self.tasks,
+            "pending": len(self._pending)
+        }
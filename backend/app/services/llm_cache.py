@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
+from app.config import get_settings
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import time
+
+settings = get_settings()
+
+_WHITESPACE = re.compile(r'\s+')
+
+def make_cache_key(model: str, messages: List[Dict[str, str]], format: Any = None) -> str:
+    """
+    Build a cache key from the model, a normalized prompt and the output format, if any.
+    Whitespace is collapsed so indentation changes in prompt templates don't miss.
+    """
+    normalized = [
+        {"role": m.get("role", "user"), "content": _WHITESPACE.sub(" ", m.get("content", "")).strip()}
+        for m in messages
+    ]
+    key = {"model": model, "messages": normalized}
+    if format:
+        key["format"] = format
+    payload = json.dumps(key, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class InMemoryLLMCache:
+    """In-process LRU cache with TTL"""
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: str):
+        self._entries[key] = (value, time.time() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+class SQLiteLLMCache:
+    """
+    Persistent LRU cache with TTL, stored in a SQLite file.
+    Queries run in a worker thread so they don't block the event loop.
+    """
+    def __init__(self, path: str, max_entries: int = 10000, ttl: float = 86400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = asyncio.Lock()
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)")
+        # Kept up to date by _get/_set so stats() doesn't query the database
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        row = self._conn.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        with self._conn:
+            if row[1] < now:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._entries -= 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def _set(self, key: str, value: str) -> int:
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now)
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self._entries = self.max_entries
+                return overflow
+        self._entries = count
+        return 0
+
+    async def get(self, key: str) -> Optional[str]:
+        async with self._lock:
+            value = await asyncio.to_thread(self._get, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: str):
+        async with self._lock:
+            self.evictions += await asyncio.to_thread(self._set, key, value)
+
+    async def clear(self):
+        async with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM llm_cache")
+            self._entries = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "sqlite",
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+@lru_cache()
+def get_llm_cache():
+    """
+    Shared response cache selected by settings.llm_cache_backend
+    ("memory", "sqlite" or "none"). Returns None when caching is disabled.
+    """
+    backend = settings.llm_cache_backend.lower()
+    if backend == "memory":
+        return InMemoryLLMCache(settings.llm_cache_max_entries, settings.llm_cache_ttl)
+    if backend == "sqlite":
+        return SQLiteLLMCache(settings.llm_cache_path, settings.llm_cache_max_entries, settings.llm_cache_ttl)
+    return None
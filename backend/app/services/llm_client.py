@@ -1,70 +1,284 @@
 import ollama
-from typing import Dict, Any, List
+import httpx
+import asyncio
+from functools import lru_cache
+from typing import Dict, Any, List, Callable, Optional, Type, Union
+from pydantic import BaseModel
 from app.config import get_settings
+from app.metrics import timed, span
+from app.models import TravelInfoExtraction, FlightSelection
+from app.services.fast_extract import extract_rules
+from app.services.llm_batching import BatchSplitError, LLMBatcher
+from app.services.llm_cache import get_llm_cache, make_cache_key
+from app.services.llm_context import ContextWindow, context_budget, fit_to_budget
+from app.services.prompts import (
+    SEARCH_INTENT, FLIGHT_SELECTION, DECISION, SEARCH_SUMMARY, EXTRACTION, NEXT_QUESTION, PLAN_SUMMARY
+)
+from app.services.llm_parsing import (
+    extract_json_object, merge_extracted, parse_flight_selection, resolve_flight_id, validate_lenient
+)
 import json
-import re
 
 settings = get_settings()
 
+@lru_cache()
+def get_ollama_client() -> ollama.AsyncClient:
+    """
+    Shared async Ollama client with a pooled connection to settings.ollama_host.
+    Every LLMClient instance reuses it so keep-alive connections are shared.
+    """
+    return ollama.AsyncClient(
+        host=settings.ollama_host,
+        timeout=httpx.Timeout(settings.ollama_timeout, connect=settings.ollama_connect_timeout),
+        limits=httpx.Limits(
+            max_connections=settings.ollama_max_connections,
+            max_keepalive_connections=settings.ollama_max_connections
+        )
+    )
+
+@lru_cache()
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """Caps the number of concurrent completions sent to Ollama"""
+    return asyncio.Semaphore(settings.ollama_max_concurrency)
+
+async def close_ollama_client():
+    """Close the pooled Ollama connections. Call this when app shuts down"""
+    if get_ollama_client.cache_info().currsize:
+        await get_ollama_client()._client.aclose()
+        get_ollama_client.cache_clear()
+
+async def preload_model():
+    """
+    Load the model into memory ahead of the first request and keep it there
+    for settings.ollama_keep_alive, so no user waits on the model load
+    """
+    try:
+        await get_ollama_client().chat(
+            model=settings.ollama_model,
+            messages=[],
+            options={"num_ctx": context_budget(settings.ollama_model)},
+            keep_alive=settings.ollama_keep_alive
+        )
+    except Exception as e:
+        print(f"Error preloading LLM model: {e}")
+
+async def _complete(messages: List[Dict[str, str]], format: Optional[Union[str, Dict[str, Any]]] = None, options: Optional[Dict[str, Any]] = None) -> str:
+    """One non-streamed completion. Callers hold the LLM semaphore"""
+    response = await get_ollama_client().chat(
+        model=settings.ollama_model,
+        messages=messages,
+        format=format,
+        # A fixed num_ctx keeps Ollama from reloading the model between requests
+        options={"num_ctx": context_budget(settings.ollama_model), **(options or {})},
+        keep_alive=settings.ollama_keep_alive
+    )
+    return response['message']['content']
+
+@lru_cache()
+def get_llm_batcher() -> LLMBatcher:
+    """Shared batcher, so prompts from concurrent requests can be merged"""
+    return LLMBatcher(
+        _complete,
+        get_llm_semaphore(),
+        window=settings.llm_batch_window_ms / 1000,
+        max_tasks=settings.llm_batch_max_tasks,
+        structured=settings.llm_structured_output
+    )
+
+async def close_llm_batcher():
+    """Wait for batched completions in flight. Call this when app shuts down"""
+    if get_llm_batcher.cache_info().currsize:
+        await get_llm_batcher().close()
+        get_llm_batcher.cache_clear()
+
 class LLMClient:
     def __init__(self):
         self.model = settings.ollama_model
         self.host = settings.ollama_host
+        self.client = get_ollama_client()
+        self.cache = get_llm_cache()
+        self.context_tokens = context_budget(self.model)
     
-    async def generate_response(self, prompt: str, context: List[Dict[str, str]] = None) -> str:
+    @timed("llm.generate_response")
+    async def generate_response(
+        self,
+        prompt: str,
+        context: Optional[Union[List[Dict[str, str]], ContextWindow]] = None,
+        system: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        use_cache: bool = True,
+        format: Optional[Union[str, Dict[str, Any]]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        batch: bool = False
+    ) -> str:
         """
-        Generate a response from the LLM
+        Generate a response from the LLM.
+        context is earlier messages (a list or a ContextWindow); it is never modified,
+        and older messages are dropped if the request would exceed the model's token budget.
+        system goes first so calls for the same task share a cacheable prefix
+        (a ContextWindow brings its own system prompt).
+        If on_token is given the completion is streamed and each chunk is passed to it.
+        format is passed to Ollama ("json" or a JSON schema) to constrain the output.
+        Responses are cached by model, normalized prompt and format unless use_cache is False.
+        With batch, a non-streamed prompt without context may be answered together with
+        other prompts in one completion (see LLMBatcher); options are then not applied.
         """
         try:
-            messages = context or []
-            messages.append({
-                "role": "user",
-                "content": prompt
-            })
+            if isinstance(context, ContextWindow):
+                messages = context.build(prompt)
+            else:
+                # New list, so the caller's history isn't modified
+                messages = [{"role": "system", "content": system}] if system else []
+                messages = fit_to_budget(
+                    messages + list(context or []) + [{"role": "user", "content": prompt}],
+                    self.context_tokens
+                )
+            # A fixed num_ctx keeps Ollama from reloading the model between requests
+            options = {"num_ctx": self.context_tokens, **(options or {})}
             
-            response = ollama.chat(
-                model=self.model,
-                messages=messages
-            )
+            cache_key = None
+            if self.cache is not None and use_cache:
+                cache_key = make_cache_key(self.model, messages, format)
+                cached = await self.cache.get(cache_key)
+                if cached is not None:
+                    if on_token:
+                        on_token(cached)
+                    return cached
+            
+            if on_token:
+                chunks = []
+                async with get_llm_semaphore():
+                    async for part in await self.client.chat(
+                        model=self.model,
+                        messages=messages,
+                        stream=True,
+                        format=format,
+                        options=options,
+                        keep_alive=settings.ollama_keep_alive
+                    ):
+                        piece = part['message']['content']
+                        if piece:
+                            chunks.append(piece)
+                            on_token(piece)
+                content = "".join(chunks)
+            else:
+                content = None
+                if batch and settings.llm_batching and context is None and not isinstance(format, str):
+                    try:
+                        content = await get_llm_batcher().submit(prompt, system=system, schema=format)
+                    except BatchSplitError:
+                        pass  # Ask again on its own
+                if content is None:
+                    async with get_llm_semaphore():
+                        content = await _complete(messages, format, options)
             
-            return response['message']['content']
+            if cache_key is not None:
+                await self.cache.set(cache_key, content)
+            
+            return content
+        except httpx.TimeoutException:
+            print(f"LLM request timed out after {settings.ollama_timeout}s")
+            return "Error: LLM request timed out"
         except Exception as e:
             print(f"Error generating LLM response: {e}")
             return f"Error: {str(e)}"
     
+    async def generate_structured(
+        self,
+        prompt: str,
+        schema: Type[BaseModel],
+        system: Optional[str] = None,
+        json_schema: Optional[Dict[str, Any]] = None,
+        fallback: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+        batch: bool = False
+    ) -> Optional[BaseModel]:
+        """
+        Generate a response constrained to a Pydantic schema (json_schema overrides
+        the schema sent to Ollama). Fields that don't validate are dropped rather
+        than failing the whole response; fallback parses the raw text if no JSON
+        object came back. Returns None if nothing usable came back.
+        batch is passed on to generate_response.
+        """
+        format_spec = None
+        if settings.llm_structured_output:
+            format_spec = json_schema or schema.model_json_schema()
+        
+        response = await self.generate_response(
+            prompt,
+            system=system,
+            format=format_spec,
+            options={"temperature": 0} if format_spec else None,
+            batch=batch
+        )
+        if response.startswith("Error:"):
+            return None
+        
+        data = extract_json_object(response)
+        if data is None and fallback is not None:
+            data = fallback(response)
+        if data is None:
+            print(f"Error parsing structured LLM response, Response: {response}")
+            return None
+        return validate_lenient(schema, data)
+    
+    @timed("llm.analyze_search_intent")
     async def analyze_search_intent(self, search_params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analyze the user's search intent and determine the best approach
         """
-        prompt = f"""
-        Analyze this flight search request and provide insights:
-        
-        Origin: {search_params.get('origin')}
-        Destination: {search_params.get('destination')}
-        Departure Date: {search_params.get('departure_date')}
-        Return Date: {search_params.get('return_date', 'N/A')}
-        Passengers: {search_params.get('passengers')}
-        Trip Type: {search_params.get('trip_type')}
-        Cabin Class: {search_params.get('cabin_class')}
-        
-        Provide a brief analysis in 2-3 sentences about:
-        1. The search parameters
-        2. What to look for in the results
-        
-        Keep it concise and helpful.
-        """
-        
-        response = await self.generate_response(prompt)
+        prompt = SEARCH_INTENT.render(
+            origin=search_params.get('origin'),
+            destination=search_params.get('destination'),
+            departure_date=search_params.get('departure_date'),
+            return_date=search_params.get('return_date', 'N/A'),
+            passengers=search_params.get('passengers'),
+            trip_type=search_params.get('trip_type'),
+            cabin_class=search_params.get('cabin_class')
+        )
+        
+        response = await self.generate_response(prompt, system=SEARCH_INTENT.system, batch=True)
         
         return {
             "analysis": response,
-            "search_strategy": "price_focused" if search_params.get('cabin_class') == 'economy' else "comfort_focused"
+            "search_strategy": self.get_search_strategy(search_params)
         }
     
+    def get_search_strategy(self, search_params: Dict[str, Any]) -> str:
+        """Deterministic search strategy - no LLM call needed"""
+        return "price_focused" if search_params.get('cabin_class') == 'economy' else "comfort_focused"
+    
+    @timed("llm.select_best_flight")
     async def select_best_flight(self, flights: List[Dict[str, Any]], search_params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Use AI to select the best flight from available options
         """
+        flight_ids = [f['flight_id'] for f in flights[:10]]
+        
+        # Only the offered flight ids are valid output
+        schema = FlightSelection.model_json_schema()
+        schema['properties']['flight_id'] = {**schema['properties']['flight_id'], 'enum': flight_ids}
+        
+        selection = await self.generate_structured(
+            self._flight_selection_prompt(flights, search_params),
+            FlightSelection,
+            system=FLIGHT_SELECTION.system,
+            json_schema=schema,
+            fallback=lambda text: parse_flight_selection(text, flight_ids),
+            batch=True
+        )
+        flight_id = resolve_flight_id(selection.flight_id, flight_ids) if selection is not None else None
+        if flight_id is None:
+            # Fallback: select the first flight (best price since they're sorted)
+            return {
+                "flight_id": flights[0]['flight_id'],
+                "reason": "Selected based on best price and value"
+            }
+        return {
+            "flight_id": flight_id,
+            "reason": selection.reason or "Selected as the best overall option"
+        }
+    
+    def _flight_selection_prompt(self, flights: List[Dict[str, Any]], search_params: Dict[str, Any]) -> str:
         # Prepare flight summary for LLM
         flight_summaries = []
         for i, flight in enumerate(flights[:10]):  # Limit to top 10 to avoid token limits
@@ -77,150 +291,86 @@ class LLMClient:
                 f"ID: {flight['flight_id']}"
             )
         
-        cabin_class = search_params.get('cabin_class', 'economy')
-        
-        prompt = f"""
-        You are a travel booking AI agent. Select the BEST flight from these options for the user.
-        
-        User preferences:
-        - Cabin Class: {cabin_class}
-        - Passengers: {search_params.get('passengers', 1)}
-        
-        Available flights:
-        {chr(10).join(flight_summaries)}
-        
-        Selection criteria priority:
-        1. For economy class: Best value (balance of price and convenience)
-        2. For business/first: Comfort and convenience over price
-        3. Prefer non-stop or fewer stops
-        4. Prefer reasonable departure times
-        
-        Respond ONLY in this exact format:
-        FLIGHT_ID: [the flight_id]
-        REASON: [one sentence explaining why this is the best choice]
-        
-        Example:
-        FLIGHT_ID: FL1234
-        REASON: Best value with non-stop service at a competitive price.
-        """
-        
-        response = await self.generate_response(prompt)
-        
-        # Parse the response
-        flight_id_match = re.search(r'FLIGHT_ID:\s*(\S+)', response)
-        reason_match = re.search(r'REASON:\s*(.+?)(?:\n|$)', response, re.DOTALL)
-        
-        if flight_id_match:
-            flight_id = flight_id_match.group(1).strip()
-            reason = reason_match.group(1).strip() if reason_match else "Selected as the best overall option"
-        else:
-            # Fallback: select the first flight (best price since they're sorted)
-            flight_id = flights[0]['flight_id']
-            reason = "Selected based on best price and value"
-        
-        return {
-            "flight_id": flight_id,
-            "reason": reason
-        }
+        return FLIGHT_SELECTION.render(
+            cabin_class=search_params.get('cabin_class', 'economy'),
+            passengers=search_params.get('passengers', 1),
+            flights=chr(10).join(flight_summaries)
+        )
     
+    @timed("llm.make_decision")
     async def make_decision(self, situation: str, options: List[str]) -> str:
         """
         Make a decision based on the given situation and options
         """
-        prompt = f"""
-        Situation: {situation}
+        prompt = DECISION.render(
+            situation=situation,
+            options=chr(10).join(f"{i+1}. {opt}" for i, opt in enumerate(options))
+        )
         
-        Available options:
-        {chr(10).join(f"{i+1}. {opt}" for i, opt in enumerate(options))}
-        
-        Choose the best option and explain why in one sentence.
-        Format: "Option X because [reason]"
-        """
-        
-        response = await self.generate_response(prompt)
+        response = await self.generate_response(prompt, system=DECISION.system, batch=True)
         return response
     
-    async def generate_search_summary(self, flights: List[Dict[str, Any]]) -> str:
+    def _price_band(self, price: float, step: int = 500) -> int:
+        """Round a price to its band so similar searches share a cached summary"""
+        return int(round(price / step) * step)
+    
+    @timed("llm.generate_search_summary")
+    async def generate_search_summary(self, flights: List[Dict[str, Any]], on_token: Optional[Callable[[str], None]] = None) -> str:
         """
         Generate a summary of the search results
         """
         if not flights:
             return "No flights found matching your criteria."
         
-        prompt = f"""
-        Summarize these flight search results in 2-3 sentences:
+        prompt = SEARCH_SUMMARY.render(
+            total=len(flights),
+            min_price=self._price_band(min(f.get('price', 0) for f in flights)),
+            max_price=self._price_band(max(f.get('price', 0) for f in flights)),
+            airlines=', '.join(sorted(set(f.get('airline', 'Unknown') for f in flights[:5])))
+        )
         
-        Total flights found: {len(flights)}
-        Price range: ${min(f.get('price', 0) for f in flights)} - ${max(f.get('price', 0) for f in flights)}
-        Airlines: {', '.join(set(f.get('airline', 'Unknown') for f in flights[:5]))}
-        
-        Provide a helpful summary for the user.
-        """
-        
-        response = await self.generate_response(prompt)
+        response = await self.generate_response(prompt, system=SEARCH_SUMMARY.system, on_token=on_token, batch=True)
         return response
     
     # New methods for conversational travel planning
     
+    @timed("llm.extract_travel_info")
     async def extract_travel_info(self, user_message: str, current_info: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Extract travel information from user message
-        """
-        prompt = f"""
-        Extract travel information from this user message. Current information we have:
-        {json.dumps(current_info, indent=2)}
-        
-        User message: "{user_message}"
-        
-        Extract and respond ONLY with a JSON object containing any of these fields that you can identify:
-        {{
-            "destination": "city name or null",
-            "origin": "city name or null",
-            "budget": number or null,
-            "days": number or null,
-            "interests": ["interest1", "interest2"] or [],
-            "departure_date": "YYYY-MM-DD or null",
-            "passengers": number or null
-        }}
-        
-        Rules:
-        - Only include fields that are mentioned in the message
-        - For budget, extract numeric values (convert "50k" to 50000, "1 lakh" to 100000)
-        - For interests, look for keywords like: relaxation, adventure, food, culture, luxury, budget, beach, mountains, etc.
-        - For days, extract numbers like "3 days", "a week" (7 days)
-        - Return valid JSON only, no explanation
+        Extract travel information from user message.
+        Rules handle the common phrasings first; the LLM is only called when
+        part of the message couldn't be resolved by them.
         """
-        
-        response = await self.generate_response(prompt)
-        
-        try:
-            # Clean the response
-            cleaned = response.strip()
-            if '```json' in cleaned:
-                cleaned = cleaned.split('```json')[1].split('```')[0].strip()
-            elif '```' in cleaned:
-                cleaned = cleaned.split('```')[1].split('```')[0].strip()
-            
-            extracted = json.loads(cleaned)
-            
-            # Merge with current info
-            result = {**current_info}
-            for key, value in extracted.items():
-                if value is not None and value != [] and value != "":
-                    if key == 'interests' and isinstance(value, list):
-                        # Append interests instead of replacing
-                        result[key] = list(set(result.get(key, []) + value))
-                    else:
-                        result[key] = value
-            
-            return result
-        except Exception as e:
-            print(f"Error parsing LLM extraction: {e}, Response: {response}")
-            return current_info
+        rule_fields, needs_llm = {}, True
+        if settings.chat_fast_extract:
+            with span("extract.rules"):
+                rule_fields, needs_llm = extract_rules(user_message, current_info)
+        if not needs_llm:
+            return merge_extracted(current_info, rule_fields)
+        
+        # The rules weren't sure about this message, so the LLM reads it from what we knew before
+        extracted = await self.generate_structured(
+            self._extraction_prompt(user_message, current_info),
+            TravelInfoExtraction,
+            system=EXTRACTION.system,
+            batch=True
+        )
+        if extracted is None:
+            return merge_extracted(current_info, rule_fields)
+        
+        # The LLM's reading wins; rule fields only fill in what it left out
+        llm_fields = {k: v for k, v in extracted.dict().items() if v is not None and v != [] and v != ""}
+        hints = {k: v for k, v in rule_fields.items() if k not in llm_fields}
+        return merge_extracted(merge_extracted(current_info, hints), llm_fields)
     
-    async def generate_next_question(self, extracted_info: Dict[str, Any]) -> str:
+    def _extraction_prompt(self, user_message: str, current_info: Dict[str, Any]) -> str:
+        return EXTRACTION.render(current_info=json.dumps(current_info), message=user_message)
+    
+    @timed("llm.generate_next_question")
+    async def generate_next_question(self, extracted_info: Dict[str, Any], context: Optional[ContextWindow] = None) -> str:
         """
-        Generate the next question to ask based on what information is missing
+        Generate the next question to ask based on what information is missing.
+        context is the conversation so far, so questions already asked aren't repeated.
         """
         missing_fields = []
         if not extracted_info.get('destination'):
@@ -235,44 +385,26 @@ class LLMClient:
         if not missing_fields:
             return "Great! I have all the information. Let me create your travel plan!"
         
-        prompt = f"""
-        You are a friendly travel planning AI assistant. Generate a natural follow-up question.
-        
-        Information we have:
-        {json.dumps(extracted_info, indent=2)}
+        prompt = NEXT_QUESTION.render(info=json.dumps(extracted_info), missing=', '.join(missing_fields))
         
-        Missing information: {', '.join(missing_fields)}
-        
-        Generate ONE friendly question to ask next. Priority order:
-        1. destination (if missing)
-        2. budget (if missing)
-        3. days (if missing)
-        4. interests (if missing)
-        
-        Keep it conversational and friendly. Don't ask for all missing info at once.
-        Response should be 1-2 sentences maximum.
-        """
-        
-        response = await self.generate_response(prompt)
+        # With a conversation the window brings the same system prompt
+        response = await self.generate_response(prompt, context=context, system=NEXT_QUESTION.system, batch=True)
         return response.strip()
     
+    @timed("llm.generate_travel_plan_summary")
     async def generate_travel_plan_summary(self, plan_details: Dict[str, Any]) -> str:
         """
         Generate a friendly summary of the travel plan
         """
-        prompt = f"""
-        Create a brief, exciting summary (2-3 sentences) of this travel plan:
-        
-        Destination: {plan_details['destination']}
-        Duration: {plan_details['days']} days
-        Budget: ₹{plan_details['budget']}
-        Total Cost: ₹{plan_details['total_cost']}
-        Flight: {plan_details['flight'].get('airline', '')} {plan_details['flight'].get('flight_number', '')}
-        Hotel: {plan_details['hotel'].get('name', '')} ({plan_details['hotel'].get('rating', 0)}★)
-        Interests: {', '.join(plan_details.get('interests', []))}
-        
-        Make it enthusiastic and highlight key features!
-        """
-        
-        response = await self.generate_response(prompt)
+        prompt = PLAN_SUMMARY.render(
+            destination=plan_details['destination'],
+            days=plan_details['days'],
+            budget=plan_details['budget'],
+            total_cost=plan_details['total_cost'],
+            flight=f"{plan_details['flight'].get('airline', '')} {plan_details['flight'].get('flight_number', '')}",
+            hotel=f"{plan_details['hotel'].get('name', '')} ({plan_details['hotel'].get('rating', 0)}★)",
+            interests=', '.join(plan_details.get('interests', []))
+        )
+        
+        response = await self.generate_response(prompt, system=PLAN_SUMMARY.system, batch=True)
         return response.strip()
\ No newline at end of file
@@ -0,0 +1,152 @@
+from typing import Dict, Any, List, Optional, Tuple
+from app.config import get_settings
+
+settings = get_settings()
+
+Message = Dict[str, str]
+
+# Chat roles used by the app -> roles Ollama understands
+_ROLES = {"ai": "assistant", "assistant": "assistant", "user": "user", "system": "system"}
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English with llama tokenizers)"""
+    return len(text) // 4 + 1
+
+def message_tokens(message: Message) -> int:
+    # A few tokens of per-message overhead for the role and template markers
+    return estimate_tokens(message.get("content", "")) + 4
+
+def context_budget(model: str) -> int:
+    """
+    Token budget for a model: settings.llm_context_overrides ("model=tokens,...")
+    or settings.llm_context_tokens
+    """
+    for item in settings.llm_context_overrides.split(","):
+        name, _, tokens = item.partition("=")
+        if name.strip() == model and tokens.strip().isdigit():
+            return int(tokens)
+    return settings.llm_context_tokens
+
+def fit_to_budget(messages: List[Message], budget: int) -> List[Message]:
+    """
+    Drop the oldest non-system messages until the list fits the budget.
+    The last message (the prompt) is always kept. Returns a new list.
+    """
+    total = sum(message_tokens(m) for m in messages)
+    if total <= budget:
+        return list(messages)
+    kept = list(messages)
+    i = 0
+    while total > budget and i < len(kept) - 1:
+        if kept[i].get("role") == "system":
+            i += 1
+            continue
+        total -= message_tokens(kept.pop(i))
+    return kept
+
+class ContextWindow:
+    """
+    Bounded multi-turn context for one conversation.
+
+    Turns are held in an immutable tuple, so snapshots and the lists handed
+    to the client share messages without copying, and callers never see
+    their history change underneath them (copy-on-write).
+
+    When the turns outgrow the budget, the oldest are folded into a short
+    summary in one step, down to low_water of the budget. The prefix
+    (system prompt, summary, older turns) then stays byte-identical for
+    many turns, so Ollama can reuse its KV cache for it instead of
+    re-evaluating the whole prompt every turn.
+    """
+    def __init__(
+        self,
+        max_tokens: int,
+        system: Optional[str] = None,
+        reserve_tokens: int = 512,
+        low_water: float = 0.6,
+        summary_tokens: int = 200
+    ):
+        self.max_tokens = max_tokens
+        self.system = system
+        self.reserve_tokens = reserve_tokens
+        self.low_water = low_water
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        self._turns: Tuple[Message, ...] = ()
+        self._tokens = 0
+
+    @classmethod
+    def from_messages(cls, messages: List[Dict[str, Any]], max_tokens: int, system: Optional[str] = None) -> "ContextWindow":
+        window = cls(max_tokens, system)
+        for message in messages:
+            window.add(message.get("role", "user"), message.get("content", ""))
+        return window
+
+    @property
+    def messages(self) -> Tuple[Message, ...]:
+        """Current turns (read-only)"""
+        return self._turns
+
+    @property
+    def tokens(self) -> int:
+        return self._tokens + self._prefix_tokens()
+
+    def _prefix_tokens(self) -> int:
+        return sum(message_tokens(m) for m in self._prefix())
+
+    def _prefix(self) -> List[Message]:
+        prefix = []
+        if self.system:
+            prefix.append({"role": "system", "content": self.system})
+        if self.summary:
+            prefix.append({"role": "system", "content": f"Earlier in this conversation: {self.summary}"})
+        return prefix
+
+    def add(self, role: str, content: str):
+        message = {"role": _ROLES.get(role, "user"), "content": content}
+        self._turns = self._turns + (message,)
+        self._tokens += message_tokens(message)
+        if self.tokens > self.max_tokens - self.reserve_tokens:
+            self._compact()
+
+    def snapshot(self) -> "ContextWindow":
+        """Independent copy sharing the same turns"""
+        copy = ContextWindow(self.max_tokens, self.system, self.reserve_tokens, self.low_water, self.summary_tokens)
+        copy.summary = self.summary
+        copy._turns = self._turns
+        copy._tokens = self._tokens
+        return copy
+
+    def _compact(self):
+        """Fold the oldest turns into the summary until under the low-water mark"""
+        target = int((self.max_tokens - self.reserve_tokens) * self.low_water)
+        turns = list(self._turns)
+        dropped: List[Message] = []
+        # Always keep the latest exchange verbatim
+        while turns[:-2] and self._tokens + self._prefix_tokens() > target:
+            message = turns.pop(0)
+            self._tokens -= message_tokens(message)
+            dropped.append(message)
+        if dropped:
+            self.summary = self._summarize(dropped)
+            self._turns = tuple(turns)
+
+    def _summarize(self, dropped: List[Message]) -> str:
+        """Extractive summary: the first sentence of each dropped turn, newest kept when too long"""
+        parts = [self.summary] if self.summary else []
+        for message in dropped:
+            first = message["content"].strip().split("\n")[0]
+            first = first.split(". ")[0][:160]
+            speaker = "User" if message["role"] == "user" else "Assistant"
+            parts.append(f"{speaker}: {first}")
+        summary = " | ".join(parts)
+        # Capped well under the low-water mark so compaction frees room for new turns
+        max_chars = min(self.summary_tokens, (self.max_tokens - self.reserve_tokens) // 5) * 4
+        return summary[-max_chars:] if len(summary) > max_chars else summary
+
+    def build(self, prompt: Optional[str] = None) -> List[Message]:
+        """Messages to send: stable prefix, turns, then the new prompt. Returns a new list"""
+        messages = self._prefix() + list(self._turns)
+        if prompt is not None:
+            messages.append({"role": "user", "content": prompt})
+        return fit_to_budget(messages, self.max_tokens)
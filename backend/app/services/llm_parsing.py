@@ -0,0 +1,109 @@
+"""
+Parsing helpers for LLM responses.
+
+Kept free of I/O so they can be benchmarked against recorded model output
+(see benchmarks/llm_parsing.py).
+"""
+from typing import Any, Dict, List, Optional, Type
+from pydantic import BaseModel, ValidationError
+import json
+import re
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+# Ids are "<provider>:<id>", e.g. mock:FL1234
+_FLIGHT_ID = re.compile(r"FLIGHT[_ ]ID\W*?[:=]\W*([A-Za-z0-9][\w:-]*)", re.IGNORECASE)
+_REASON = re.compile(r"REASON\W*?[:=][\s*]*(.+)", re.IGNORECASE)
+
+def extract_json_object(response: str) -> Optional[Dict[str, Any]]:
+    """
+    Pull a JSON object out of a model response.
+    Handles markdown fences, prose around the object and trailing commas.
+    Returns None if no object can be parsed.
+    """
+    text = response
+    fence = text.find("```")
+    if fence >= 0:
+        # Keep what's inside the first fenced block; the language tag is skipped below
+        closing = text.find("```", fence + 3)
+        text = text[fence + 3:closing if closing >= 0 else len(text)]
+
+    start = text.find("{")
+    end = text.rfind("}")
+    if start < 0 or end < start:
+        return None
+    text = text[start:end + 1]
+
+    try:
+        value = json.loads(text)
+    except ValueError:
+        try:
+            value = json.loads(_TRAILING_COMMA.sub(r"\1", text))
+        except ValueError:
+            return None
+    return value if isinstance(value, dict) else None
+
+def validate_lenient(schema: Type[BaseModel], data: Dict[str, Any]) -> Optional[BaseModel]:
+    """
+    Validate model output against a schema, dropping fields that fail
+    instead of rejecting the whole object
+    """
+    try:
+        return schema.model_validate(data)
+    except ValidationError as e:
+        bad_fields = {error["loc"][0] for error in e.errors() if error["loc"]}
+    try:
+        return schema.model_validate({k: v for k, v in data.items() if k not in bad_fields})
+    except ValidationError:
+        return None
+
+def merge_extracted(current_info: Dict[str, Any], extracted: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge newly extracted fields into what we already know; interests accumulate"""
+    result = {**current_info}
+    for key, value in extracted.items():
+        if value is None or value == [] or value == "":
+            continue
+        if key == 'interests' and isinstance(value, list):
+            # Append interests instead of replacing, keeping first-seen order
+            result[key] = list(dict.fromkeys(result.get(key, []) + value))
+        else:
+            result[key] = value
+    return result
+
+def resolve_flight_id(candidate: str, flight_ids: List[str]) -> Optional[str]:
+    """
+    The offered id the model meant: an exact match, or the one offered id whose
+    part after the provider prefix matches a bare id. None if there's no such id.
+    """
+    if candidate in flight_ids:
+        return candidate
+    matches = [fid for fid in flight_ids if fid.partition(":")[2] == candidate]
+    return matches[0] if len(matches) == 1 else None
+
+def parse_flight_selection(response: str, flight_ids: List[str]) -> Optional[Dict[str, str]]:
+    """
+    Read the FLIGHT_ID / REASON reply to the selection prompt.
+    Tolerates markdown emphasis and brackets around the values. An id that
+    isn't one of the offered flights is ignored in favour of any offered id
+    mentioned in the text. Returns None if no offered flight was chosen.
+    """
+    match = _FLIGHT_ID.search(response)
+    flight_id = resolve_flight_id(match.group(1).rstrip(":-"), flight_ids) if match else None
+    if flight_id is None:
+        # Earliest offered id mentioned anywhere, with or without its provider prefix
+        mentions = []
+        for fid in flight_ids:
+            found = re.search(rf"(?<![\w:-]){re.escape(fid)}(?![\w-])", response)
+            if found is None:
+                found = re.search(rf"(?<![\w:-]){re.escape(fid.partition(':')[2] or fid)}(?![\w-])", response)
+            if found is not None:
+                mentions.append((found.start(), fid))
+        flight_id = min(mentions)[1] if mentions else None
+    if flight_id is None:
+        return None
+
+    reason_match = _REASON.search(response)
+    reason = reason_match.group(1).strip(" *[]\t\r") if reason_match else ""
+    return {
+        "flight_id": flight_id,
+        "reason": reason or "Selected as the best overall option"
+    }
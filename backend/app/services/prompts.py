@@ -0,0 +1,168 @@
+"""
+Prompt templates for LLMClient.
+
+Each task has a fixed system prompt holding the instructions, criteria and
+output format, and a user template that holds only the per-call data.
+Requests for the same task then share an identical prefix, which Ollama
+keeps in its KV cache and doesn't re-evaluate (see benchmarks/prompt_eval.py).
+Keep anything that varies per call out of the system prompts.
+"""
+from typing import Dict, List
+
+class PromptTemplate:
+    def __init__(self, name: str, system: str, user: str):
+        self.name = name
+        self.system = system
+        self.user = user
+
+    def render(self, **data) -> str:
+        """The variable part of the prompt"""
+        return self.user.format(**data)
+
+    def messages(self, **data) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.render(**data)}
+        ]
+
+PROMPTS: Dict[str, PromptTemplate] = {}
+
+def register(template: PromptTemplate) -> PromptTemplate:
+    PROMPTS[template.name] = template
+    return template
+
+SEARCH_INTENT = register(PromptTemplate(
+    "search_intent",
+    system="""You are a travel booking AI agent. Analyze the flight search request you are given and provide insights.
+
+Provide a brief analysis in 2-3 sentences about:
+1. The search parameters
+2. What to look for in the results
+
+Keep it concise and helpful.""",
+    user="""Origin: {origin}
+Destination: {destination}
+Departure Date: {departure_date}
+Return Date: {return_date}
+Passengers: {passengers}
+Trip Type: {trip_type}
+Cabin Class: {cabin_class}"""
+))
+
+FLIGHT_SELECTION = register(PromptTemplate(
+    "flight_selection",
+    system="""You are a travel booking AI agent. Select the BEST flight for the user from the options you are given.
+
+Selection criteria priority:
+1. For economy class: Best value (balance of price and convenience)
+2. For business/first: Comfort and convenience over price
+3. Prefer non-stop or fewer stops
+4. Prefer reasonable departure times
+
+Respond ONLY with a JSON object:
+{"flight_id": "the flight_id", "reason": "one sentence explaining why this is the best choice"}
+
+Example:
+{"flight_id": "mock:FL1234", "reason": "Best value with non-stop service at a competitive price."}""",
+    user="""User preferences:
+- Cabin Class: {cabin_class}
+- Passengers: {passengers}
+
+Available flights:
+{flights}"""
+))
+
+DECISION = register(PromptTemplate(
+    "decision",
+    system="""Choose the best option for the situation you are given and explain why in one sentence.
+Format: "Option X because [reason]\"""",
+    user="""Situation: {situation}
+
+Available options:
+{options}"""
+))
+
+SEARCH_SUMMARY = register(PromptTemplate(
+    "search_summary",
+    system="""Summarize the flight search results you are given in 2-3 sentences.
+Provide a helpful summary for the user.""",
+    user="""Total flights found: {total}
+Price range: ${min_price} - ${max_price}
+Airlines: {airlines}"""
+))
+
+EXTRACTION = register(PromptTemplate(
+    "extraction",
+    system="""Extract travel information from the user message you are given, using the information we already have as context.
+
+Extract and respond ONLY with a JSON object containing any of these fields that you can identify:
+{
+    "destination": "city name or null",
+    "origin": "city name or null",
+    "budget": number or null,
+    "days": number or null,
+    "interests": ["interest1", "interest2"] or [],
+    "departure_date": "YYYY-MM-DD or null",
+    "passengers": number or null
+}
+
+Rules:
+- Only include fields that are mentioned in the message
+- For budget, extract numeric values (convert "50k" to 50000, "1 lakh" to 100000)
+- For interests, look for keywords like: relaxation, adventure, food, culture, luxury, budget, beach, mountains, etc.
+- For days, extract numbers like "3 days", "a week" (7 days)
+- Return valid JSON only, no explanation""",
+    user="""Current information we have:
+{current_info}
+
+User message: "{message}\""""
+))
+
+NEXT_QUESTION = register(PromptTemplate(
+    "next_question",
+    system="""You are a friendly travel planning AI assistant. Generate a natural follow-up question from the information we have and what is missing.
+
+Generate ONE friendly question to ask next. Priority order:
+1. destination (if missing)
+2. budget (if missing)
+3. days (if missing)
+4. interests (if missing)
+
+Keep it conversational and friendly. Don't ask for all missing info at once. Don't repeat a question you already asked.
+Response should be 1-2 sentences maximum.""",
+    user="""Information we have:
+{info}
+
+Missing information: {missing}"""
+))
+
+PLAN_SUMMARY = register(PromptTemplate(
+    "plan_summary",
+    system="""Create a brief, exciting summary (2-3 sentences) of the travel plan you are given.
+Make it enthusiastic and highlight key features!""",
+    user="""Destination: {destination}
+Duration: {days} days
+Budget: ₹{budget}
+Total Cost: ₹{total_cost}
+Flight: {flight}
+Hotel: {hotel}
+Interests: {interests}"""
+))
+
+# Used by LLMBatcher to answer several of the prompts above in one completion
+MULTI_TASK = register(PromptTemplate(
+    "multi_task",
+    system="""You are a travel booking AI agent handling several independent tasks at once.
+Each task below starts with its id and has its own instructions and input. Complete every task
+as if it were the only one, following its instructions exactly.
+
+Respond ONLY with a JSON object with one key per task id. The value is that task's answer:
+the JSON object the task asks for, or a string for tasks that ask for text.""",
+    user="""### {task_id}
+Instructions:
+{instructions}
+
+Input:
+{input}
+"""
+))
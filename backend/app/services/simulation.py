@@ -0,0 +1,63 @@
+from typing import Any, Optional
+from app.config import get_settings
+import asyncio
+import hashlib
+import json
+import random
+import secrets
+
+settings = get_settings()
+
+class SimulatedProviderError(Exception):
+    """Failure injected into a mock provider"""
+
+def seeded_random(seed: Optional[int], *parts: Any) -> random.Random:
+    """
+    Random generator for one mock call. With a seed, the output depends only
+    on the seed and the call's parameters; without one it is unseeded as before.
+    """
+    if seed is None:
+        return random.Random()
+    payload = json.dumps([seed, *parts], sort_keys=True, default=str)
+    return random.Random(int.from_bytes(hashlib.sha256(payload.encode("utf-8")).digest()[:8], "big"))
+
+class MockBehavior:
+    """Artificial latency and failure injection for mock providers"""
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        latency_ms: Optional[float] = None,
+        latency_jitter_ms: Optional[float] = None,
+        failure_rate: Optional[float] = None
+    ):
+        self.seed = settings.mock_seed if seed is None else seed
+        self.latency_ms = settings.mock_latency_ms if latency_ms is None else latency_ms
+        self.latency_jitter_ms = settings.mock_latency_jitter_ms if latency_jitter_ms is None else latency_jitter_ms
+        self.failure_rate = settings.mock_failure_rate if failure_rate is None else failure_rate
+        self._ids = 0
+        self._simulated = 0
+        # Per process, so ids from a seeded run don't repeat after a restart
+        self._nonce = secrets.token_hex(3).upper()
+
+    def rng(self, *parts: Any) -> random.Random:
+        """Generator for a call's results: depends only on the seed and the parts"""
+        return seeded_random(self.seed, *parts)
+
+    def unique_id(self, prefix: str) -> str:
+        """Id that differs on every call and across restarts (e.g. booking ids)"""
+        self._ids += 1
+        return f"{prefix}{self._nonce}{self._ids:05d}"
+
+    async def simulate(self, operation: str):
+        """
+        Sleep for the configured latency and maybe raise an injected failure.
+        Drawn per call from their own generator, so latency and failure
+        settings never change the results and each call can fail independently.
+        """
+        self._simulated += 1
+        rng = seeded_random(self.seed, "simulate", operation, self._simulated)
+        delay = self.latency_ms + rng.uniform(0, self.latency_jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.failure_rate and rng.random() < self.failure_rate:
+            raise SimulatedProviderError(f"Simulated {operation} failure")
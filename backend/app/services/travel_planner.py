@@ -1,8 +1,11 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple, Callable, Awaitable
 from datetime import datetime, timedelta
+import asyncio
+import time
 from app.services.flight_api import FlightAPI
 from app.services.hotel_api import HotelAPI
 from app.services.llm_client import LLMClient
+from app.metrics import record_span
 import random
 
 class TravelPlanner:
@@ -34,7 +37,6 @@ class TravelPlanner:
         hotel_budget = budget * 0.5
         hotel_budget_per_night = hotel_budget / days
         
-        # Search for flights
         flight_search_params = {
             'origin': origin,
             'destination': destination,
@@ -45,22 +47,6 @@ class TravelPlanner:
             'cabin_class': 'economy' if budget < 80000 else 'business'
         }
         
-        flights = await self.flight_api.search_flights(flight_search_params)
-        
-        # Filter flights within budget
-        affordable_flights = [f for f in flights if f.price * passengers * 2 <= flight_budget]
-        if not affordable_flights:
-            affordable_flights = sorted(flights, key=lambda x: x.price)[:3]
-        
-        # Select best flight using LLM
-        selected_flight = await self._select_best_option(
-            [f.dict() for f in affordable_flights],
-            'flight',
-            interests,
-            flight_budget
-        )
-        
-        # Search for hotels
         hotel_search_params = {
             'destination': destination.lower(),
             'budget_per_night': hotel_budget_per_night,
@@ -69,36 +55,65 @@ class TravelPlanner:
             'check_out': return_date
         }
         
-        hotels = await self.hotel_api.search_hotels(hotel_search_params)
+        async def flight_step():
+            flights = await self.flight_api.search_flights(flight_search_params)
+            
+            # Filter flights within budget
+            affordable_flights = [f for f in flights if f.price * passengers * 2 <= flight_budget]
+            if not affordable_flights:
+                affordable_flights = sorted(flights, key=lambda x: x.price)[:3]
+            
+            # Select best flight using LLM
+            return await self._select_best_option(
+                [f.dict() for f in affordable_flights],
+                'flight',
+                interests,
+                flight_budget
+            )
         
-        # Select best hotel using LLM
-        selected_hotel = await self._select_best_option(
-            hotels,
-            'hotel',
-            interests,
-            hotel_budget_per_night
-        )
+        async def hotel_step():
+            hotels = await self.hotel_api.search_hotels(hotel_search_params)
+            
+            # Select best hotel using LLM
+            return await self._select_best_option(
+                hotels,
+                'hotel',
+                interests,
+                hotel_budget_per_night
+            )
         
-        # Calculate costs
-        flight_cost = selected_flight['price'] * passengers * 2  # Round trip
-        hotel_cost = selected_hotel['price_per_night'] * days
-        total_cost = flight_cost + hotel_cost
-        remaining_budget = budget - total_cost
+        async def itinerary_step():
+            # Generate day-wise itinerary
+            return await self._generate_itinerary(destination, days, interests)
         
-        # Generate day-wise itinerary
-        itinerary = await self._generate_itinerary(destination, days, interests)
+        async def summary_step(flight, hotel):
+            return await self.llm.generate_travel_plan_summary({
+                'destination': destination,
+                'days': days,
+                'budget': budget,
+                'total_cost': self._total_cost(flight, hotel, passengers, days),
+                'flight': flight,
+                'hotel': hotel,
+                'interests': interests
+            })
         
-        # Generate summary
-        summary = await self.llm.generate_travel_plan_summary({
-            'destination': destination,
-            'days': days,
-            'budget': budget,
-            'total_cost': total_cost,
-            'flight': selected_flight,
-            'hotel': selected_hotel,
-            'interests': interests
+        # Flight, hotel and itinerary are independent; only the summary waits on its inputs
+        results, step_timings = await self._run_steps({
+            'flight': ([], flight_step),
+            'hotel': ([], hotel_step),
+            'itinerary': ([], itinerary_step),
+            'summary': (['flight', 'hotel'], summary_step),
         })
         
+        selected_flight = results['flight']
+        selected_hotel = results['hotel']
+        itinerary = results['itinerary']
+        summary = results['summary']
+        
+        # Calculate costs
+        total_cost = self._total_cost(selected_flight, selected_hotel, passengers, days)
+        remaining_budget = budget - total_cost
+        
         return {
             'destination': destination,
             'origin': origin,
@@ -113,9 +128,47 @@ class TravelPlanner:
             'hotel': selected_hotel,
             'itinerary': itinerary,
             'summary': summary,
-            'interests': interests
+            'interests': interests,
+            'step_timings': step_timings
         }
     
+    def _total_cost(self, flight: Dict[str, Any], hotel: Dict[str, Any], passengers: int, days: int) -> float:
+        """Round trip flight for all passengers plus hotel nights"""
+        flight_cost = flight['price'] * passengers * 2  # Round trip
+        hotel_cost = hotel['price_per_night'] * days
+        return flight_cost + hotel_cost
+    
+    async def _run_steps(self, steps: Dict[str, Tuple[List[str], Callable[..., Awaitable[Any]]]]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Run a small dependency graph of plan steps.
+        steps maps name -> (dependency names, async fn). Each fn is called with its
+        dependencies' results as keyword arguments, so independent steps run concurrently.
+        Returns the results and the time each step took in milliseconds.
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        timings: Dict[str, float] = {}
+        
+        async def run_step(name: str, deps: List[str], fn: Callable[..., Awaitable[Any]]):
+            inputs = {dep: await tasks[dep] for dep in deps}
+            start = time.perf_counter()
+            result = await fn(**inputs)
+            elapsed = time.perf_counter() - start
+            timings[name] = round(elapsed * 1000, 2)
+            record_span(f"planner.{name}", elapsed)
+            return result
+        
+        for name, (deps, fn) in steps.items():
+            tasks[name] = asyncio.create_task(run_step(name, deps, fn))
+        
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        
+        return dict(zip(tasks.keys(), results)), timings
+    
     async def _select_best_option(self, options: List[Dict], option_type: str, interests: List[str], budget: float) -> Dict[str, Any]:
         """
         Use LLM to select best option based on interests and budget
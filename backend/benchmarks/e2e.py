@@ -0,0 +1,243 @@
+"""
+End-to-end benchmark for the API hot paths.
+
+Starts the app in-process against a fixed-latency fake Ollama, seeded mock
+providers and a throwaway SQLite database, then drives each endpoint at the
+given concurrency and reports latency percentiles, requests/sec and
+event-loop lag.
+
+    cd backend
+    python -m benchmarks.e2e --concurrency 16 --requests 200 --output results.json
+    python -m benchmarks.e2e --compare results.json      # diff against an earlier run
+
+Caches are off by default so every request takes the full path; pass
+--cache to measure with the LLM and flight caches enabled. The load
+generator shares the app's event loop, so loop lag includes client overhead.
+"""
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_ollama import FakeOllama
+
+ROUTES = [
+    ("Delhi", "Goa"),
+    ("Mumbai", "Bangalore"),
+    ("Delhi", "Mumbai"),
+    ("Bangalore", "Delhi"),
+    ("Chennai", "Kolkata"),
+]
+
+PASSENGER = {"firstName": "Asha", "lastName": "Rao", "email": "asha@example.com", "phone": "9999999999"}
+
+def _search_params(i: int) -> Dict[str, Any]:
+    origin, destination = ROUTES[i % len(ROUTES)]
+    return {
+        "origin": origin,
+        "destination": destination,
+        "departure_date": f"2026-12-{1 + i % 28:02d}",
+        "passengers": 1 + i % 3,
+        "cabin_class": "economy",
+    }
+
+# name -> (method, path, payload for the i-th request)
+SCENARIOS: Dict[str, Tuple[str, str, Callable[[int], Optional[Dict[str, Any]]]]] = {
+    "search": ("POST", "/api/search", _search_params),
+    "search-and-book": ("POST", "/api/search-and-book", lambda i: {
+        "search_params": _search_params(i),
+        "passenger_details": PASSENGER,
+    }),
+    "chat": ("POST", "/api/chat", lambda i: {
+        "message": f"I want a {3 + i % 5} day beach trip to Goa",
+    }),
+    "plan-travel": ("POST", "/api/plan-travel", lambda i: {
+        "destination": ROUTES[i % len(ROUTES)][1],
+        "origin": ROUTES[i % len(ROUTES)][0],
+        "budget": 40000 + (i % 5) * 10000,
+        "days": 3 + i % 5,
+        "interests": ["beach", "food"],
+        "departure_date": f"2026-12-{1 + i % 28:02d}",
+    }),
+    "history": ("GET", "/api/history?limit=20", lambda i: None),
+}
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "p50": round(percentile(ordered, 50), 3),
+        "p95": round(percentile(ordered, 95), 3),
+        "p99": round(percentile(ordered, 99), 3),
+        "max": round(ordered[-1], 3) if ordered else 0.0,
+        "mean": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+    }
+
+async def run_scenario(client, name: str, total: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    from app.metrics import LoopLagMonitor
+    method, path, payload = SCENARIOS[name]
+
+    async def call(i: int) -> bool:
+        response = await client.request(method, path, json=payload(i))
+        return response.status_code < 400
+
+    for i in range(warmup):
+        await call(i)
+
+    latencies: List[float] = []
+    errors = 0
+    next_index = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in next_index:
+            start = time.perf_counter()
+            try:
+                ok = await call(warmup + i)
+            except Exception:
+                ok = False
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not ok:
+                errors += 1
+
+    monitor = LoopLagMonitor(interval=0.01, keep_samples=True)
+    monitor.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    lag = [seconds * 1000 for seconds in await monitor.stop()]
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": summarize(latencies),
+        "loop_lag_ms": summarize(lag),
+    }
+
+async def run_benchmark(args) -> Dict[str, Dict[str, Any]]:
+    # Imported here so the environment set up in main() is what Settings reads
+    import httpx
+    from app.main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name in args.endpoints:
+                results[name] = await run_scenario(client, name, args.requests, args.concurrency, args.warmup)
+                print_row(name, results[name])
+    return results
+
+def print_row(name: str, result: Dict[str, Any]):
+    latency, lag = result["latency_ms"], result["loop_lag_ms"]
+    print(
+        f"{name:<16} {result['rps']:>9.1f} req/s  "
+        f"p50 {latency['p50']:>8.1f}  p95 {latency['p95']:>8.1f}  p99 {latency['p99']:>8.1f} ms  "
+        f"lag p99 {lag['p99']:>6.1f} ms  errors {result['errors']}"
+    )
+
+def compare(results: Dict[str, Dict[str, Any]], baseline_path: str):
+    """Print the change against an earlier results file"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["endpoints"]
+
+    def delta(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\nCompared with {baseline_path}:")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        print(
+            f"{name:<16} req/s {delta(result['rps'], old['rps']):>8}  "
+            f"p50 {delta(result['latency_ms']['p50'], old['latency_ms']['p50']):>8}  "
+            f"p99 {delta(result['latency_ms']['p99'], old['latency_ms']['p99']):>8}"
+        )
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end API benchmark")
+    parser.add_argument("--endpoints", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per endpoint")
+    parser.add_argument("--llm-latency", type=float, default=50.0, help="Fake LLM latency per call (ms)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Delay between streamed tokens (ms)")
+    parser.add_argument("--seed", type=int, default=42, help="Mock provider seed")
+    parser.add_argument("--cache", action="store_true", help="Keep the LLM and flight caches enabled")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Extra setting overrides")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Results file from an earlier run to compare against")
+    args = parser.parse_args()
+    args.endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = [e for e in args.endpoints if e not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(unknown)}")
+
+    workdir = tempfile.mkdtemp(prefix="tripscout-bench-")
+    with FakeOllama(args.llm_latency, args.token_delay) as fake_llm:
+        overrides = {
+            "OLLAMA_HOST": fake_llm.url,
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            "MOCK_SEED": str(args.seed),
+            "LATENCY_PROFILE": "production",
+        }
+        if not args.cache:
+            overrides.update({"LLM_CACHE_BACKEND": "none", "FLIGHT_CACHE_TTL": "0"})
+        for item in args.set:
+            key, _, value = item.partition("=")
+            overrides[key.strip().upper()] = value
+        os.environ.update(overrides)
+
+        print(f"Benchmarking {', '.join(args.endpoints)}: {args.requests} requests, concurrency {args.concurrency}, LLM latency {args.llm_latency}ms")
+        results = asyncio.run(run_benchmark(args))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "llm_latency_ms": args.llm_latency,
+            "seed": args.seed,
+            "cache": args.cache,
+            "overrides": args.set,
+        },
+        "endpoints": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Local stand-in for the Ollama HTTP API used by the benchmarks.
+
+Serves /api/chat with a fixed latency and canned answers shaped like the
+prompts LLMClient sends, so the app's full request path runs without a model.
+With prompt_eval_ms it also models Ollama's prompt cache: each of `slots`
+runners keeps the tokens of its last prompt, a request reuses the slot with
+the longest common prefix, and only the tokens after it are evaluated
+(and reported as prompt_eval_count / prompt_eval_duration).
+It runs on its own thread and event loop so it doesn't add to the app's
+event-loop lag.
+"""
+from datetime import datetime, timezone
+import asyncio
+import json
+import re
+import socket
+import threading
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+_TASK_HEADER = re.compile(r"^### (task_\d+)$", re.MULTILINE)
+
+def canned_batch_reply(prompt: str, format: dict) -> str:
+    """Answer each task of an LLMBatcher multi-task prompt under its id"""
+    properties = format.get("properties", {}) if isinstance(format, dict) else {}
+    parts = _TASK_HEADER.split(prompt)
+    answers = {}
+    for task_id, section in zip(parts[1::2], parts[2::2]):
+        structured = properties.get(task_id, {}).get("type") == "object"
+        reply = canned_reply(section, structured)
+        answers[task_id] = json.loads(reply) if structured else reply
+    return json.dumps(answers)
+
+def canned_reply(prompt: str, structured: bool = False) -> str:
+    """Answer in the format each LLMClient prompt asks for"""
+    if "Extract travel information" in prompt:
+        # Partial extraction so /api/chat also asks a follow-up question
+        reply = '{"destination": "Goa", "budget": null, "days": null, "interests": ["beach"]}'
+        return reply if structured else f"```json\n{reply}\n```"
+    if "Select the BEST flight" in prompt:
+        match = re.search(r"ID: (\S+)", prompt)
+        flight_id = match.group(1) if match else "FL0000"
+        return json.dumps({"flight_id": flight_id, "reason": "Best value with non-stop service at a competitive price."})
+    if "follow-up question" in prompt:
+        return "Sounds great! What budget do you have in mind for this trip?"
+    return "A good spread of options across several airlines, with the best fares on early departures."
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+def prompt_tokens(messages: list) -> list:
+    """Approximate tokens of the prompt as a chat template would lay it out"""
+    tokens = []
+    for m in messages:
+        tokens.append(f"<|{m.get('role', 'user')}|>")
+        tokens.extend(_TOKEN.findall(m.get("content", "")))
+    return tokens
+
+class PromptCache:
+    """Per-slot KV cache of the last prompt, matched by longest common prefix"""
+    def __init__(self, slots: int = 4):
+        self.slots = [[] for _ in range(slots)]
+        self.last_used = [0.0] * slots
+
+    def evaluate(self, tokens: list) -> int:
+        """Tokens that have to be evaluated for this prompt"""
+        def common(cached: list) -> int:
+            n = 0
+            for a, b in zip(cached, tokens):
+                if a != b:
+                    break
+                n += 1
+            return n
+
+        reused = [common(cached) for cached in self.slots]
+        best = max(range(len(self.slots)), key=lambda i: reused[i])
+        slot = best
+        if reused[best] < len(self.slots[best]):
+            # Like Ollama, copy the shared prefix into the oldest slot rather than
+            # discarding the rest of the best slot's cache
+            slot = min(range(len(self.slots)), key=lambda i: self.last_used[i])
+        self.slots[slot] = tokens
+        self.last_used[slot] = time.monotonic()
+        # At least one token is always evaluated to produce the first output
+        return max(1, len(tokens) - reused[best])
+
+def create_app(latency_ms: float, token_delay_ms: float = 0.0, prompt_eval_ms: float = 0.0, slots: int = 4) -> FastAPI:
+    app = FastAPI()
+    cache = PromptCache(slots)
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        messages = body.get("messages") or []
+
+        def message(content: str, done: bool, **extra) -> dict:
+            return {
+                "model": body.get("model", "fake"),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "message": {"role": "assistant", "content": content},
+                "done": done,
+                **extra,
+            }
+
+        if not messages:
+            # Ollama loads the model and returns straight away
+            return JSONResponse(message("", True, done_reason="load"))
+
+        prompt = "\n".join(m.get("content", "") for m in messages)
+        if "several independent tasks" in messages[0].get("content", ""):
+            reply = canned_batch_reply(messages[-1]["content"], body.get("format"))
+        else:
+            reply = canned_reply(prompt, bool(body.get("format")))
+        evaluated = cache.evaluate(prompt_tokens(messages))
+        eval_seconds = evaluated * prompt_eval_ms / 1000
+        await asyncio.sleep(latency_ms / 1000 + eval_seconds)
+        stats = {"prompt_eval_count": evaluated, "prompt_eval_duration": int(eval_seconds * 1e9)}
+
+        if not body.get("stream", True):
+            return JSONResponse(message(reply, True, **stats))
+
+        async def stream():
+            for word in re.findall(r"\S+\s*", reply):
+                if token_delay_ms:
+                    await asyncio.sleep(token_delay_ms / 1000)
+                yield json.dumps(message(word, False)) + "\n"
+            yield json.dumps(message("", True, **stats)) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+class FakeOllama:
+    """Runs the fake server in a background thread; use as a context manager"""
+    def __init__(self, latency_ms: float = 50.0, token_delay_ms: float = 0.0, port: int = 0, prompt_eval_ms: float = 0.0, slots: int = 4):
+        self.port = port or _free_port()
+        self.server = uvicorn.Server(uvicorn.Config(
+            create_app(latency_ms, token_delay_ms, prompt_eval_ms, slots),
+            host="127.0.0.1",
+            port=self.port,
+            log_level="warning",
+            access_log=False,
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "FakeOllama":
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("Fake Ollama server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
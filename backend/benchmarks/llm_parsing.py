@@ -0,0 +1,187 @@
+"""
+Micro-benchmarks for LLM prompt building and response parsing.
+
+Times the CPU-side work around each completion and checks parse accuracy
+against the corpora in benchmarks/corpora:
+
+- extraction.jsonl: chat messages, the info known so far, the model's
+  reply to the extraction prompt and the info we expect after merging
+  (also used to check the rule-based fast path)
+- flight_selection.jsonl: offered flight ids, the model's reply to the
+  selection prompt and the id we expect (null = should fall back)
+- extraction_rules.jsonl: chat messages with the exact fields the rules
+  should return and whether the LLM must still be asked (run with --check
+  to fail on any mismatch)
+
+When a reply shape breaks parsing in the logs, add it to the corpus with
+the expected result. The previous inline parsers are kept here as
+"legacy" so changes can be compared.
+
+    cd backend
+    python -m benchmarks.llm_parsing --output parsing.json
+"""
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.fast_extract import extract_rules
+from app.services.flight_providers import MockFlightProvider
+from app.services.llm_client import LLMClient
+from app.services.llm_parsing import extract_json_object, merge_extracted, parse_flight_selection
+from app.services.simulation import MockBehavior
+
+CORPORA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpora")
+
+def load_corpus(name: str) -> List[Dict[str, Any]]:
+    with open(os.path.join(CORPORA_DIR, name), encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# Parsers as they were inlined in LLMClient before llm_parsing
+
+def legacy_extraction(response: str, current_info: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        cleaned = response.strip()
+        if '```json' in cleaned:
+            cleaned = cleaned.split('```json')[1].split('```')[0].strip()
+        elif '```' in cleaned:
+            cleaned = cleaned.split('```')[1].split('```')[0].strip()
+        extracted = json.loads(cleaned)
+        result = {**current_info}
+        for key, value in extracted.items():
+            if value is not None and value != [] and value != "":
+                if key == 'interests' and isinstance(value, list):
+                    result[key] = list(set(result.get(key, []) + value))
+                else:
+                    result[key] = value
+        return result
+    except Exception:
+        return current_info
+
+def legacy_selection(response: str, flight_ids: List[str]) -> Optional[str]:
+    match = re.search(r'FLIGHT_ID:\s*(\S+)', response)
+    if not match:
+        return None
+    re.search(r'REASON:\s*(.+?)(?:\n|$)', response, re.DOTALL)
+    return match.group(1).strip()
+
+def current_extraction(response: str, current_info: Dict[str, Any]) -> Dict[str, Any]:
+    extracted = extract_json_object(response)
+    return current_info if extracted is None else merge_extracted(current_info, extracted)
+
+def current_selection(response: str, flight_ids: List[str]) -> Optional[str]:
+    selection = parse_flight_selection(response, flight_ids)
+    return selection["flight_id"] if selection else None
+
+def _same_info(got: Dict[str, Any], expected: Dict[str, Any]) -> bool:
+    """Compare merged info, ignoring interest order"""
+    normalize = lambda info: {k: sorted(v) if isinstance(v, list) else v for k, v in info.items()}
+    return normalize(got) == normalize(expected)
+
+# Fixed "today" so date phrasings in extraction_rules.jsonl stay valid
+RULES_TODAY = date(2026, 10, 1)
+
+def check_rules() -> List[Dict[str, Any]]:
+    """Run every extraction_rules.jsonl case; returns the ones that didn't match"""
+    failures = []
+    for case in load_corpus("extraction_rules.jsonl"):
+        fields, needs_llm = extract_rules(case["message"], case["current_info"], today=RULES_TODAY)
+        if fields != case["expected"] or needs_llm != case["needs_llm"]:
+            failures.append({**case, "got": fields, "got_needs_llm": needs_llm})
+    return failures
+
+def time_per_call(fn: Callable[[], Any], number: int) -> float:
+    """Best-of-5 microseconds per call"""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+def run(number: int) -> Dict[str, Any]:
+    extraction = load_corpus("extraction.jsonl")
+    selection = load_corpus("flight_selection.jsonl")
+
+    client = LLMClient()
+    provider = MockFlightProvider(MockBehavior(seed=42, latency_ms=0, failure_rate=0))
+    search_params = {"origin": "Delhi", "destination": "Goa", "departure_date": "2026-12-01", "passengers": 2, "cabin_class": "economy"}
+    flights = [f.dict() for f in asyncio.run(provider.search(search_params))]
+    chat_info = {"destination": "Goa", "budget": 50000, "days": 5, "interests": ["beach", "food"]}
+
+    results: Dict[str, Any] = {"timings_us": {}, "accuracy": {}}
+    timings = results["timings_us"]
+
+    # Prompt building
+    timings["selection_prompt"] = time_per_call(lambda: client._flight_selection_prompt(flights, search_params), number)
+    timings["extraction_prompt"] = time_per_call(lambda: client._extraction_prompt("3 days in Goa", chat_info), number)
+
+    # Parsing, per corpus entry
+    for label, parse in (("legacy", legacy_extraction), ("current", current_extraction)):
+        timings[f"extraction_parse_{label}"] = time_per_call(
+            lambda: [parse(e["response"], e["current_info"]) for e in extraction], number
+        ) / len(extraction)
+        correct = sum(_same_info(parse(e["response"], e["current_info"]), e["expected"]) for e in extraction)
+        results["accuracy"][f"extraction_{label}"] = round(correct / len(extraction), 3)
+
+    # Rule fast path: how often it avoids the LLM, and whether its fields are right
+    timings["extraction_rules"] = time_per_call(
+        lambda: [extract_rules(e["message"], e["current_info"]) for e in extraction], number // 10 or 1
+    ) / len(extraction)
+    resolved = fields_total = fields_correct = 0
+    for e in extraction:
+        fields, needs_llm = extract_rules(e["message"], e["current_info"])
+        resolved += not needs_llm
+        for key, value in fields.items():
+            fields_total += 1
+            expected = e["expected"].get(key)
+            if key == "interests":
+                fields_correct += set(value) <= set(expected or [])
+            else:
+                fields_correct += isinstance(expected, str) and expected.lower() == str(value).lower() or expected == value
+    results["accuracy"]["extraction_rules_resolved"] = round(resolved / len(extraction), 3)
+    results["accuracy"]["extraction_rules_fields"] = round(fields_correct / fields_total, 3) if fields_total else 1.0
+    cases = len(load_corpus("extraction_rules.jsonl"))
+    results["rules_failures"] = check_rules()
+    results["accuracy"]["extraction_rules_cases"] = round(1 - len(results["rules_failures"]) / cases, 3)
+
+    for label, parse in (("legacy", legacy_selection), ("current", current_selection)):
+        timings[f"selection_parse_{label}"] = time_per_call(
+            lambda: [parse(e["response"], e["flight_ids"]) for e in selection], number
+        ) / len(selection)
+        correct = sum(parse(e["response"], e["flight_ids"]) == e["expected_flight_id"] for e in selection)
+        results["accuracy"][f"selection_{label}"] = round(correct / len(selection), 3)
+
+    results["timings_us"] = {k: round(v, 2) for k, v in timings.items()}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM prompt/parse micro-benchmarks")
+    parser.add_argument("--number", type=int, default=2000, help="Calls per timing sample")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--check", action="store_true", help="Only run the extraction_rules.jsonl cases; exit 1 on a mismatch")
+    args = parser.parse_args()
+
+    if args.check:
+        failures = check_rules()
+        for case in failures:
+            print(f"FAIL {case['message']!r}: got {case['got']} needs_llm={case['got_needs_llm']}, "
+                  f"expected {case['expected']} needs_llm={case['needs_llm']}")
+        print(f"{len(load_corpus('extraction_rules.jsonl')) - len(failures)} passed, {len(failures)} failed")
+        sys.exit(1 if failures else 0)
+
+    results = run(args.number)
+    for name, us in results["timings_us"].items():
+        print(f"{name:<28} {us:>9.2f} us/call")
+    for name, accuracy in results["accuracy"].items():
+        print(f"{name:<28} {accuracy:>9.1%} correct")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Prompt evaluation benchmark: inline prompts vs the template registry.
+
+Sends the same mixed workload (chat extraction and follow-up questions,
+flight selection and search summaries with varying data) twice: once with
+the prompts as they were inlined in LLMClient before app/services/prompts.py
+(variable data mixed into the instructions) and once with the templates
+(fixed system prefix, data last). Generation is capped at one token, so the
+timings are prompt evaluation, which is what the shared prefix saves.
+
+Against a real Ollama it reports the server's prompt_eval_count and
+prompt_eval_duration. Without --host it starts the fake server, which
+models Ollama's per-slot prompt cache at --prompt-eval-ms per token.
+
+    cd backend
+    python -m benchmarks.prompt_eval
+    python -m benchmarks.prompt_eval --host http://localhost:11434 --rounds 10
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ollama
+
+from app.services.flight_providers import MockFlightProvider
+from app.services.llm_client import LLMClient
+from app.services.prompts import EXTRACTION, NEXT_QUESTION, SEARCH_SUMMARY, FLIGHT_SELECTION
+from app.services.simulation import MockBehavior
+from benchmarks.fake_ollama import FakeOllama
+from benchmarks.llm_parsing import load_corpus
+
+DESTINATIONS = ["Goa", "Mumbai", "Jaipur", "Bangalore", "Kochi", "Chennai", "Kolkata", "Hyderabad"]
+
+Messages = List[Dict[str, str]]
+
+# Prompts as they were inlined in LLMClient before the template registry
+
+def legacy_extraction(user_message: str, current_info: Dict[str, Any]) -> Messages:
+    prompt = f"""
+        Extract travel information from this user message. Current information we have:
+        {json.dumps(current_info)}
+
+        User message: "{user_message}"
+
+        Extract and respond ONLY with a JSON object containing any of these fields that you can identify:
+        {{
+            "destination": "city name or null",
+            "origin": "city name or null",
+            "budget": number or null,
+            "days": number or null,
+            "interests": ["interest1", "interest2"] or [],
+            "departure_date": "YYYY-MM-DD or null",
+            "passengers": number or null
+        }}
+
+        Rules:
+        - Only include fields that are mentioned in the message
+        - For budget, extract numeric values (convert "50k" to 50000, "1 lakh" to 100000)
+        - For interests, look for keywords like: relaxation, adventure, food, culture, luxury, budget, beach, mountains, etc.
+        - For days, extract numbers like "3 days", "a week" (7 days)
+        - Return valid JSON only, no explanation
+        """
+    return [{"role": "user", "content": prompt}]
+
+def legacy_next_question(extracted_info: Dict[str, Any], missing_fields: List[str]) -> Messages:
+    prompt = f"""
+        You are a friendly travel planning AI assistant. Generate a natural follow-up question.
+
+        Information we have:
+        {json.dumps(extracted_info)}
+
+        Missing information: {', '.join(missing_fields)}
+
+        Generate ONE friendly question to ask next. Priority order:
+        1. destination (if missing)
+        2. budget (if missing)
+        3. days (if missing)
+        4. interests (if missing)
+
+        Keep it conversational and friendly. Don't ask for all missing info at once.
+        Response should be 1-2 sentences maximum.
+        """
+    return [{"role": "user", "content": prompt}]
+
+def legacy_selection(flight_summaries: List[str], search_params: Dict[str, Any]) -> Messages:
+    prompt = f"""
+        You are a travel booking AI agent. Select the BEST flight from these options for the user.
+
+        User preferences:
+        - Cabin Class: {search_params.get('cabin_class', 'economy')}
+        - Passengers: {search_params.get('passengers', 1)}
+
+        Available flights:
+        {chr(10).join(flight_summaries)}
+
+        Selection criteria priority:
+        1. For economy class: Best value (balance of price and convenience)
+        2. For business/first: Comfort and convenience over price
+        3. Prefer non-stop or fewer stops
+        4. Prefer reasonable departure times
+
+        Respond ONLY with a JSON object:
+        {{"flight_id": "the flight_id", "reason": "one sentence explaining why this is the best choice"}}
+
+        Example:
+        {{"flight_id": "FL1234", "reason": "Best value with non-stop service at a competitive price."}}
+        """
+    return [{"role": "user", "content": prompt}]
+
+def legacy_search_summary(total: int, min_price: int, max_price: int, airlines: str) -> Messages:
+    prompt = f"""
+        Summarize these flight search results in 2-3 sentences:
+
+        Total flights found: {total}
+        Price range: ${min_price} - ${max_price}
+        Airlines: {airlines}
+
+        Provide a helpful summary for the user.
+        """
+    return [{"role": "user", "content": prompt}]
+
+def build_workload(rounds: int) -> Dict[str, List[tuple]]:
+    """(task, messages) in request order for each variant, from the same data"""
+    client = LLMClient()
+    provider = MockFlightProvider(MockBehavior(seed=42, latency_ms=0, failure_rate=0))
+    chats = load_corpus("extraction.jsonl")
+    workload: Dict[str, List[tuple]] = {"inline": [], "templates": []}
+
+    for i in range(rounds):
+        chat = chats[i % len(chats)]
+        info = chat["expected"]
+        missing = [f for f in ("destination", "budget", "days", "interests") if not info.get(f)] or ["interests"]
+        search_params = {
+            "origin": "Delhi", "destination": DESTINATIONS[i % len(DESTINATIONS)],
+            "departure_date": f"2026-12-{i % 28 + 1:02d}", "passengers": i % 3 + 1, "cabin_class": "economy"
+        }
+        flights = [f.dict() for f in asyncio.run(provider.search(search_params))]
+        selection_prompt = client._flight_selection_prompt(flights, search_params)
+        flight_summaries = selection_prompt.split("Available flights:\n", 1)[1].split("\n")
+        summary = {
+            "total": len(flights),
+            "min_price": client._price_band(min(f["price"] for f in flights)),
+            "max_price": client._price_band(max(f["price"] for f in flights)),
+            "airlines": ", ".join(sorted(set(f["airline"] for f in flights[:5])))
+        }
+
+        workload["inline"] += [
+            ("extraction", legacy_extraction(chat["message"], chat["current_info"])),
+            ("next_question", legacy_next_question(info, missing)),
+            ("flight_selection", legacy_selection(flight_summaries, search_params)),
+            ("search_summary", legacy_search_summary(**summary)),
+        ]
+        workload["templates"] += [
+            ("extraction", [
+                {"role": "system", "content": EXTRACTION.system},
+                {"role": "user", "content": client._extraction_prompt(chat["message"], chat["current_info"])}
+            ]),
+            ("next_question", NEXT_QUESTION.messages(info=json.dumps(info), missing=", ".join(missing))),
+            ("flight_selection", [
+                {"role": "system", "content": FLIGHT_SELECTION.system},
+                {"role": "user", "content": selection_prompt}
+            ]),
+            ("search_summary", SEARCH_SUMMARY.messages(**summary)),
+        ]
+    return workload
+
+async def run_variant(host: str, model: str, requests: List[tuple], keep_alive: str) -> Dict[str, Any]:
+    client = ollama.AsyncClient(host=host)
+    # Load the model first so the first request doesn't pay for it
+    await client.chat(model=model, messages=[], keep_alive=keep_alive)
+
+    per_task: Dict[str, Dict[str, float]] = {}
+    start = time.perf_counter()
+    for task, messages in requests:
+        response = await client.chat(
+            model=model,
+            messages=messages,
+            options={"num_predict": 1, "temperature": 0},
+            keep_alive=keep_alive
+        )
+        stats = per_task.setdefault(task, {"calls": 0, "tokens": 0, "eval_ms": 0.0})
+        stats["calls"] += 1
+        stats["tokens"] += response.get("prompt_eval_count") or 0
+        stats["eval_ms"] += (response.get("prompt_eval_duration") or 0) / 1e6
+    wall_ms = (time.perf_counter() - start) * 1000
+    await client._client.aclose()
+
+    return {
+        "tasks": {
+            task: {
+                "tokens_per_call": round(s["tokens"] / s["calls"], 1),
+                "eval_ms_per_call": round(s["eval_ms"] / s["calls"], 2)
+            }
+            for task, s in per_task.items()
+        },
+        "eval_ms": round(sum(s["eval_ms"] for s in per_task.values()), 1),
+        "tokens": sum(s["tokens"] for s in per_task.values()),
+        "wall_ms": round(wall_ms, 1)
+    }
+
+def run(host: str, model: str, rounds: int, keep_alive: str, prompt_eval_ms: float, slots: int) -> Dict[str, Any]:
+    workload = build_workload(rounds)
+    results: Dict[str, Any] = {"rounds": rounds, "host": host or "fake", "variants": {}}
+    for variant, requests in workload.items():
+        if host:
+            results["variants"][variant] = asyncio.run(run_variant(host, model, requests, keep_alive))
+        else:
+            # A fresh fake per variant so neither starts with the other's cache
+            with FakeOllama(latency_ms=0, prompt_eval_ms=prompt_eval_ms, slots=slots) as fake:
+                results["variants"][variant] = asyncio.run(run_variant(fake.url, model, requests, keep_alive))
+    before, after = results["variants"]["inline"], results["variants"]["templates"]
+    if after["eval_ms"]:
+        results["eval_speedup"] = round(before["eval_ms"] / after["eval_ms"], 2)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt evaluation: inline prompts vs templates")
+    parser.add_argument("--host", help="Ollama host to measure; default starts the fake server")
+    parser.add_argument("--model", default=os.environ.get("OLLAMA_MODEL", "llama3.2:latest"))
+    parser.add_argument("--rounds", type=int, default=8, help="Chat + search rounds (4 calls each)")
+    parser.add_argument("--keep-alive", default="30m")
+    parser.add_argument("--prompt-eval-ms", type=float, default=2.0, help="Fake server cost per evaluated token")
+    parser.add_argument("--slots", type=int, default=4, help="Fake server parallel slots (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.host, args.model, args.rounds, args.keep_alive, args.prompt_eval_ms, args.slots)
+    print(f"{'task':<18} {'variant':<10} {'tokens/call':>12} {'eval ms/call':>13}")
+    for task in results["variants"]["inline"]["tasks"]:
+        for variant, data in results["variants"].items():
+            stats = data["tasks"][task]
+            print(f"{task:<18} {variant:<10} {stats['tokens_per_call']:>12} {stats['eval_ms_per_call']:>13}")
+    for variant, data in results["variants"].items():
+        print(f"{variant:<10} prompt eval {data['eval_ms']:>9.1f} ms  ({data['tokens']} tokens, wall {data['wall_ms']:.0f} ms)")
+    if "eval_speedup" in results:
+        print(f"prompt eval speedup: {results['eval_speedup']}x")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import sys
+import os
+import argparse
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a hotel catalog snapshot from CSV/JSONL feeds")
+    parser.add_argument("feeds", nargs="+", help="CSV or JSONL hotel feed files")
+    parser.add_argument("-o", "--output", default="hotels.snap", help="Snapshot file to write")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows parsed and spilled to disk per chunk")
+    args = parser.parse_args()
+
+    from app.services.hotel_snapshot import ingest
+    stats = ingest(args.feeds, args.output, args.chunk_size)
+    print(f"✅ Wrote {stats['hotels']} hotels across {stats['destinations']} destinations to {args.output} ({stats['skipped']} rows skipped)")
+    print(f"Set HOTEL_CATALOG_PATH={os.path.abspath(args.output)} to serve it")
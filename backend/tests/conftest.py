@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Run from anywhere: make the backend package importable like the app and benchmarks do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings are read once at import, so point the app at a scratch database before any test imports it
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
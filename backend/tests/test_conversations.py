@@ -0,0 +1,69 @@
+import asyncio
+from app.database import init_db
+from app.services import conversations
+from app.services.conversations import ConversationStore
+
+init_db()
+
+def test_overflow_eviction_skips_sessions_mid_turn():
+    async def scenario():
+        store = ConversationStore(max_active=2)
+        first = await store.get(None)
+        await first.lock.acquire()
+        second = await store.get(None)
+        third = await store.get(None)
+        return first, second, third, store
+    first, second, third, store = asyncio.run(scenario())
+    assert list(store._sessions) == [first.conversation_id, third.conversation_id]
+
+def test_evicted_session_is_revived_before_it_is_flushed():
+    async def scenario():
+        store = ConversationStore(max_active=1)
+        session = await store.get(None)
+        session.add_message("user", "Goa for 5 days")
+        await store.get(None)
+        assert session.conversation_id in store._evicted
+
+        revived = await store.get(session.conversation_id)
+        revived.add_message("user", "budget 50k")
+        await store.flush()
+        return session, revived
+    session, revived = asyncio.run(scenario())
+    assert revived is session
+    assert [m["content"] for m in revived.messages] == ["Goa for 5 days", "budget 50k"]
+
+def test_flushed_session_reloads_from_the_database():
+    async def scenario():
+        store = ConversationStore(max_active=1)
+        session = await store.get(None)
+        session.add_message("user", "hello")
+        session.update_info({"destination": "Goa"}, False)
+        await store.get(None)
+        await store.flush()
+        assert not store._evicted
+
+        reloaded = await store.get(session.conversation_id)
+        return session, reloaded, store
+    session, reloaded, store = asyncio.run(scenario())
+    assert reloaded is not session
+    assert store.loads == 1
+    assert [m["content"] for m in reloaded.messages] == ["hello"]
+    assert reloaded.extracted_info == {"destination": "Goa"}
+
+def test_failed_flush_keeps_changes(monkeypatch):
+    def broken_session():
+        raise RuntimeError("database is locked")
+
+    async def scenario():
+        store = ConversationStore(max_active=1)
+        session = await store.get(None)
+        session.add_message("user", "hello")
+        await store.get(None)
+        monkeypatch.setattr(conversations, "AsyncSessionLocal", broken_session)
+        await store.flush()
+        monkeypatch.undo()
+        return session, store
+    session, store = asyncio.run(scenario())
+    assert session.dirty
+    assert store._evicted == {session.conversation_id: session}
+    assert not store._writing
@@ -0,0 +1,59 @@
+from datetime import date
+import pytest
+from app.services.fast_extract import extract_rules
+from benchmarks.llm_parsing import RULES_TODAY, load_corpus
+
+def rules(message, current_info=None):
+    return extract_rules(message, current_info or {}, today=date(2026, 10, 1))
+
+@pytest.mark.parametrize("message", [
+    "We need 2 separate rooms in Goa for 5 days",
+    "Looking for 1 decent hotel in Goa",
+    "Goa trip, 2 juniors and 2 adults",
+    "We'll march on to Goa",
+])
+def test_words_starting_with_a_month_are_not_dates(message):
+    fields, _ = rules(message)
+    assert "departure_date" not in fields
+
+@pytest.mark.parametrize("message, expected", [
+    ("Leaving on 12th December", "2026-12-12"),
+    ("dec 5 works", "2026-12-05"),
+    ("Flying out on 5 sept", "2027-09-05"),
+    ("3 jan. 2027", "2027-01-03"),
+    ("june 20 please", "2027-06-20"),
+])
+def test_month_names_and_abbreviations(message, expected):
+    fields, _ = rules(message)
+    assert fields["departure_date"] == expected
+
+@pytest.mark.parametrize("message, days, needs_llm", [
+    ("twice a day meals in goa", None, True),
+    ("once a week is enough", None, True),
+    ("Goa for a week", 7, False),
+    ("a week long trip to Goa", 7, False),
+    ("5 days in Goa", 5, False),
+])
+def test_a_day_or_a_week_needs_a_trip_cue(message, days, needs_llm):
+    fields, llm = rules(message)
+    assert fields.get("days") == days
+    assert llm is needs_llm
+
+@pytest.mark.parametrize("message, passengers, needs_llm", [
+    ("2 adults", 2, False),
+    ("family of 4", 4, False),
+    ("honeymoon in Goa", 2, False),
+    ("2 adults, travelling with my wife", None, True),
+    ("family of 4, 2 adults", None, True),
+    ("3 people, just me really", None, True),
+])
+def test_conflicting_passenger_counts_go_to_the_llm(message, passengers, needs_llm):
+    fields, llm = rules(message)
+    assert fields.get("passengers") == passengers
+    assert llm is needs_llm
+
+@pytest.mark.parametrize("case", load_corpus("extraction_rules.jsonl"), ids=lambda case: case["message"])
+def test_extraction_rules_corpus(case):
+    fields, needs_llm = extract_rules(case["message"], case["current_info"], today=RULES_TODAY)
+    assert fields == case["expected"]
+    assert needs_llm == case["needs_llm"]
@@ -0,0 +1,41 @@
+import json
+import os
+from app.services.hotel_catalog import InMemoryDestinationIndex
+from app.services.hotel_snapshot import ingest, load_snapshot
+
+HOTELS = [
+    {"destination": ["Goa", "Manali"][i % 2], "name": f"Hotel {i}", "category": ["budget", "luxury"][i % 3 % 2],
+     "base_price": 1000 + (i * 7919) % 9000, "rating": 3 + (i % 5) / 2.5, "amenities": ["Pool", "Wifi"][:i % 3]}
+    for i in range(50)
+]
+
+def _write_feed(tmp_path) -> str:
+    path = os.path.join(tmp_path, "hotels.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for hotel in HOTELS:
+            f.write(json.dumps(hotel) + "\n")
+        f.write(json.dumps({"destination": "Goa", "name": "", "base_price": 1, "rating": 1}) + "\n")
+    return path
+
+def test_snapshot_is_the_same_for_any_chunk_size(tmp_path):
+    feed = _write_feed(str(tmp_path))
+    outputs = []
+    for chunk_size in (1, 7, 10000):
+        output = os.path.join(str(tmp_path), f"hotels-{chunk_size}.snap")
+        stats = ingest([feed], output, chunk_size)
+        assert stats == {"hotels": 50, "destinations": 2, "skipped": 1}
+        with open(output, "rb") as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert sorted(os.listdir(str(tmp_path))) == ["hotels-1.snap", "hotels-10000.snap", "hotels-7.snap", "hotels.jsonl"]
+
+def test_snapshot_matches_the_in_memory_index(tmp_path):
+    output = os.path.join(str(tmp_path), "hotels.snap")
+    ingest([_write_feed(str(tmp_path))], output, chunk_size=4)
+    catalog = load_snapshot(output)
+    for destination in ("goa", "manali"):
+        expected = InMemoryDestinationIndex([h for h in HOTELS if h["destination"].lower() == destination])
+        snapshot = catalog.get(destination)
+        for ordering in ("price", "rating", "value"):
+            assert [h["name"] for h in snapshot.top(ordering, 8000, 5)] == [h["name"] for h in expected.top(ordering, 8000, 5)]
+        assert snapshot.amenity_rows("pool") == expected.amenity_rows("pool")
@@ -0,0 +1,59 @@
+import asyncio
+import json
+from typing import List
+from pydantic import BaseModel, create_model
+from app.services.llm_batching import BatchSplitError, LLMBatcher
+
+class Room(BaseModel):
+    name: str
+
+class Hotel(BaseModel):
+    rooms: List[Room]
+
+# Same definition name as Room, different shape
+OtherRoom = create_model("Room", price=(float, ...))
+
+class Quote(BaseModel):
+    rooms: List[OtherRoom]
+
+def run_batch(prompts, reply):
+    """Submit prompts together against a fake completion; returns (results, messages, schema sent)"""
+    calls = []
+
+    async def complete(messages, format, options):
+        calls.append((messages, format))
+        return reply
+
+    async def scenario():
+        batcher = LLMBatcher(complete, asyncio.Semaphore(1))
+        results = await asyncio.gather(
+            *(batcher.submit(prompt, schema=schema) for prompt, schema in prompts),
+            return_exceptions=True
+        )
+        await batcher.close()
+        return results
+    results = asyncio.run(scenario())
+    return results, calls
+
+def test_same_named_definitions_are_kept_apart():
+    hotel, quote = Hotel.model_json_schema(), Quote.model_json_schema()
+    _, calls = run_batch([("hotel", hotel), ("quote", quote)], "{}")
+    schema = calls[0][1]
+    assert schema["$defs"]["task_1__Room"] == hotel["$defs"]["Room"]
+    assert schema["$defs"]["task_2__Room"] == quote["$defs"]["Room"]
+    assert schema["properties"]["task_2"]["properties"]["rooms"]["items"] == {"$ref": "#/$defs/task_2__Room"}
+    # The callers' schemas aren't modified
+    assert hotel["properties"]["rooms"]["items"] == {"$ref": "#/$defs/Room"}
+
+def test_answers_are_split_per_task():
+    reply = json.dumps({"task_1": {"rooms": []}, "task_2": "A sunny beach town"})
+    results, calls = run_batch([("hotel", Hotel.model_json_schema()), ("summary", None)], reply)
+    assert len(calls) == 1
+    assert json.loads(results[0]) == {"rooms": []}
+    assert results[1] == "A sunny beach town"
+
+def test_missing_answer_fails_only_that_task():
+    reply = json.dumps({"task_1": "Goa is great"})
+    results, _ = run_batch([("a", None), ("b", None)], reply)
+    assert results[0] == "Goa is great"
+    assert isinstance(results[1], BatchSplitError)
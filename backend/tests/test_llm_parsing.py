@@ -0,0 +1,64 @@
+from typing import List, Optional
+from pydantic import BaseModel
+import pytest
+from app.services.llm_parsing import (
+    extract_json_object, merge_extracted, parse_flight_selection, resolve_flight_id, validate_lenient
+)
+
+OFFERED = ["mock:FL1111", "mock:FL2222", "live:FL2222", "mock:FL3333"]
+
+@pytest.mark.parametrize("response, expected", [
+    ('{"days": 5}', {"days": 5}),
+    ('```json\n{"days": 5}\n```', {"days": 5}),
+    ('Sure! Here you go: {"days": 5, "interests": ["beach"]} Let me know.', {"days": 5, "interests": ["beach"]}),
+    ('{"days": 5, "interests": ["beach",],}', {"days": 5, "interests": ["beach"]}),
+    ('```\n{"budget": 50000}\n```\nand {"ignored": true}', {"budget": 50000}),
+    ("No JSON here", None),
+    ('{"days": 5', None),
+    ("[1, 2, 3]", None),
+])
+def test_extract_json_object(response, expected):
+    assert extract_json_object(response) == expected
+
+class _Trip(BaseModel):
+    destination: Optional[str] = None
+    days: Optional[int] = None
+    interests: List[str] = []
+
+def test_validate_lenient_drops_only_bad_fields():
+    trip = validate_lenient(_Trip, {"destination": "Goa", "days": "five", "interests": ["beach"]})
+    assert trip == _Trip(destination="Goa", interests=["beach"])
+
+def test_validate_lenient_passes_valid_data_through():
+    assert validate_lenient(_Trip, {"days": "5"}) == _Trip(days=5)
+
+def test_merge_extracted_skips_empty_values_and_accumulates_interests():
+    current = {"destination": "Goa", "budget": 40000, "interests": ["beach"]}
+    extracted = {"destination": None, "budget": 50000, "days": "", "interests": ["food", "beach"]}
+    assert merge_extracted(current, extracted) == {"destination": "Goa", "budget": 50000, "interests": ["beach", "food"]}
+    assert current["interests"] == ["beach"]
+
+@pytest.mark.parametrize("candidate, expected", [
+    ("mock:FL1111", "mock:FL1111"),
+    ("FL1111", "mock:FL1111"),
+    ("FL2222", None),  # offered by two providers
+    ("FL9999", None),
+])
+def test_resolve_flight_id(candidate, expected):
+    assert resolve_flight_id(candidate, OFFERED) == expected
+
+@pytest.mark.parametrize("response, expected_id", [
+    ("FLIGHT_ID: mock:FL3333\nREASON: Cheapest", "mock:FL3333"),
+    ("**FLIGHT_ID:** [mock:FL1111]\n**REASON:** Non-stop", "mock:FL1111"),
+    ("flight id = FL3333", "mock:FL3333"),
+    ("FLIGHT_ID: mock:FL3333\nREASON: Cheaper than mock:FL1111", "mock:FL3333"),
+    ("FLIGHT_ID: FL0000\nI'd go with mock:FL1111 over FL3333", "mock:FL1111"),
+    ("FLIGHT_ID: FL0000\nREASON: none of these work", None),
+])
+def test_parse_flight_selection(response, expected_id):
+    selection = parse_flight_selection(response, OFFERED)
+    assert (selection["flight_id"] if selection else None) == expected_id
+
+def test_parse_flight_selection_reason():
+    assert parse_flight_selection("FLIGHT_ID: mock:FL1111\nREASON: **Non-stop**", OFFERED)["reason"] == "Non-stop"
+    assert parse_flight_selection("FLIGHT_ID: mock:FL1111", OFFERED)["reason"] == "Selected as the best overall option"
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+import asyncio
+from fastapi import HTTPException
+from sqlalchemy import select
+import pytest
+from app.database import AsyncSessionLocal, init_db
+from app.db_models import SearchHistory
+from app.pagination import count_rows, decode_cursor, encode_cursor, fetch_page
+
+init_db()
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 1, 12, 30, 5, 123456)
+    cursor = encode_cursor(created_at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+@pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor(datetime(2026, 1, 1), 1)[:-3], "W10"])
+def test_bad_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor)
+    assert e.value.status_code == 400
+
+def _search(search_id: str, created_at: datetime, status: str = "success") -> SearchHistory:
+    return SearchHistory(search_id=search_id, origin="Delhi", destination="Goa", search_status=status, created_at=created_at)
+
+def test_keyset_pages_cover_every_row_once_newest_first():
+    base = datetime(2020, 1, 1)
+    # Pairs share a created_at, so ties are broken by id
+    rows = [_search(f"page-{i}", base + timedelta(minutes=i // 2)) for i in range(7)]
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            db.add_all(rows)
+            await db.commit()
+            query = select(SearchHistory).where(SearchHistory.search_id.like("page-%"))
+            pages, cursor = [], None
+            while True:
+                page, cursor = await fetch_page(db, query, SearchHistory, cursor, 0, 3)
+                pages.append([r.search_id for r in page])
+                if cursor is None:
+                    break
+            offset_page, _ = await fetch_page(db, query, SearchHistory, None, 3, 3)
+            for row in rows:
+                await db.delete(row)
+            await db.commit()
+            return pages, [r.search_id for r in offset_page]
+
+    pages, offset_page = asyncio.run(scenario())
+    assert pages == [["page-6", "page-5", "page-4"], ["page-3", "page-2", "page-1"], ["page-0"]]
+    assert offset_page == pages[1]
+
+def test_maintained_counts_follow_inserts_status_changes_and_deletes():
+    table = SearchHistory.__tablename__
+    query = select(SearchHistory)
+
+    async def counts(db):
+        return (await count_rows(db, query, table), await count_rows(db, query, table, "success"),
+                await count_rows(db, query, table, "error"))
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            before = await counts(db)
+            db.add_all([_search("count-1", datetime.utcnow()), _search("count-2", datetime.utcnow(), "error")])
+            await db.commit()
+            inserted = await counts(db)
+
+            row = await db.scalar(select(SearchHistory).where(SearchHistory.search_id == "count-2"))
+            row.search_status = "success"
+            await db.commit()
+            updated = await counts(db)
+
+            await db.delete(row)
+            await db.commit()
+            deleted = await counts(db)
+
+            await db.delete(await db.scalar(select(SearchHistory).where(SearchHistory.search_id == "count-1")))
+            await db.commit()
+            assert await counts(db) == before
+            return before, inserted, updated, deleted
+
+    before, inserted, updated, deleted = asyncio.run(scenario())
+    delta = lambda after: tuple(a - b for a, b in zip(after, before))
+    assert delta(inserted) == (2, 1, 1)
+    assert delta(updated) == (2, 2, 0)
+    assert delta(deleted) == (1, 1, 0)
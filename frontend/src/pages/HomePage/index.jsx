@@ -14,6 +14,7 @@ const HomePage = () => {
   ]);
   const [isLoading, setIsLoading] = useState(false);
   const [extractedInfo, setExtractedInfo] = useState({});
+  const [conversationId, setConversationId] = useState(null);
   const [isReadyToPlan, setIsReadyToPlan] = useState(false);
   const [travelPlan, setTravelPlan] = useState(null);
   const [isGeneratingPlan, setIsGeneratingPlan] = useState(false);
@@ -30,10 +31,10 @@ const HomePage = () => {
     setIsLoading(true);
 
     try {
+      // History and extracted info are kept server-side for the conversation
       const response = await chatWithAgent({
         message: userMessage,
-        conversation_history: messages,
-        extracted_info: extractedInfo
+        conversation_id: conversationId
       });
 
       // Add AI response to chat
@@ -44,6 +45,7 @@ const HomePage = () => {
       };
 
       setMessages(prev => [...prev, aiMessage]);
+      setConversationId(response.conversation_id);
       setExtractedInfo(response.extracted_info);
       setIsReadyToPlan(response.is_ready_to_plan);
 
@@ -33,6 +33,70 @@ export const searchAndBookAutonomous = async (searchParams, passengerDetails) =>
   }
 };
 
+// Streaming variants - onEvent(event, data) is called for each
+// "start", "thought", "token", "result" and "error" event. Searches may send
+// "flights" after "result" when slow providers answer late.
+// Resolves with the final result payload, including any late flights.
+const streamAgentEvents = async (path, body, onEvent) => {
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+  });
+  if (!response.ok) {
+    throw new Error(`Stream request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result = null;
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    const frames = buffer.split('\n\n');
+    buffer = frames.pop();
+    for (const frame of frames) {
+      const eventLine = frame.split('\n').find(line => line.startsWith('event: '));
+      const dataLine = frame.split('\n').find(line => line.startsWith('data: '));
+      if (!eventLine || !dataLine) continue;
+
+      const event = eventLine.slice(7);
+      const data = JSON.parse(dataLine.slice(6));
+      if (onEvent) onEvent(event, data);
+      if (event === 'result') result = data;
+      if (event === 'flights' && result) result = { ...result, flights: data };
+      if (event === 'error') throw new Error(data.detail);
+    }
+  }
+
+  return result;
+};
+
+export const searchFlightsStream = async (searchParams, onEvent) => {
+  try {
+    return await streamAgentEvents('/api/search/stream', searchParams, onEvent);
+  } catch (error) {
+    console.error('Error streaming flight search:', error);
+    throw error;
+  }
+};
+
+export const searchAndBookAutonomousStream = async (searchParams, passengerDetails, onEvent) => {
+  try {
+    return await streamAgentEvents('/api/search-and-book/stream', {
+      search_params: searchParams,
+      passenger_details: passengerDetails
+    }, onEvent);
+  } catch (error) {
+    console.error('Error streaming autonomous booking:', error);
+    throw error;
+  }
+};
+
 export const bookFlight = async (bookingData) => {
   try {
     const response = await api.post('/api/book', bookingData);
@@ -46,12 +110,14 @@ export const bookFlight = async (bookingData) => {
 // History - Updated with filters and pagination
 export const getSearchHistory = async (params = {}) => {
   try {
-    const { limit = 20, offset = 0, destination, origin, status } = params;
+    const { limit = 20, offset = 0, cursor, destination, origin, status } = params;
     const queryParams = new URLSearchParams({
       limit: limit.toString(),
       offset: offset.toString(),
     });
     
+    // Prefer the cursor from the previous page's next_cursor
+    if (cursor) queryParams.append('cursor', cursor);
     if (destination) queryParams.append('destination', destination);
     if (origin) queryParams.append('origin', origin);
     if (status) queryParams.append('status', status);
@@ -67,12 +133,13 @@ export const getSearchHistory = async (params = {}) => {
 // Bookings - New endpoint
 export const getBookings = async (params = {}) => {
   try {
-    const { limit = 20, offset = 0, status } = params;
+    const { limit = 20, offset = 0, cursor, status } = params;
     const queryParams = new URLSearchParams({
       limit: limit.toString(),
       offset: offset.toString(),
     });
     
+    if (cursor) queryParams.append('cursor', cursor);
     if (status) queryParams.append('status', status);
     
     const response = await api.get(`/api/bookings?${queryParams.toString()}`);